@@ -0,0 +1,44 @@
+from abc import abstractmethod
+from typing import List
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+
+class AbstractAsyncStreamingAPIClient:
+    """Asyncio twin of AbstractStreamingAPIClient, every method is a coroutine"""
+
+    @abstractmethod
+    async def get_track(self, track_id: str) -> TrackData:
+        ...
+
+    @abstractmethod
+    async def get_album(self, album_id: str) -> AlbumData:
+        ...
+
+    @abstractmethod
+    async def get_artist(self, artist_id: str) -> ArtistData:
+        ...
+
+    @abstractmethod
+    async def get_playlist(self, playlist_id: str) -> PlaylistData:
+        ...
+
+    @abstractmethod
+    async def get_user_info(self, user_id: str) -> UserInfo:
+        ...
+
+    @abstractmethod
+    async def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    async def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    async def get_track_neighbors(self, track_id: str) -> List[str]:
+        ...
@@ -1,25 +1,50 @@
 from abc import abstractmethod
-from typing import List
+from typing import Callable, Collection, List, Optional, TypeVar
 
 from music_graph.datamodel.album import AlbumData
 from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_features import AudioFeatures
 from music_graph.datamodel.playlist import PlaylistData
 from music_graph.datamodel.track import TrackData
 from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.rate_limiter import RateLimitScheduler
+
+T = TypeVar("T")
 
 
 class AbstractStreamingAPIClient:
+    scheduler: Optional[RateLimitScheduler] = None
+
+    def _request(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Issue a raw api call, through the rate limit scheduler when there is one
+
+        The endpoint budget used is the one named after the raw method.
+        """
+        if self.scheduler is None:
+            return func(*args, **kwargs)
+        return self.scheduler.call(func.__name__, func, *args, **kwargs)
+
     @abstractmethod
-    def get_track(self, track_id: str) -> TrackData:
-        ...
+    def get_track(
+        self, track_id: str, include: Optional[Collection[str]] = None
+    ) -> TrackData:
+        """Get a track, loading only the sub-resources in include when given
+
+        The sub-resources left out are loaded on first access of their field.
+        """
 
     @abstractmethod
     def get_album(self, album_id: str) -> AlbumData:
         ...
 
     @abstractmethod
-    def get_artist(self, artist_id: str) -> ArtistData:
-        ...
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        """Get an artist, loading only the sub-resources in include when given
+
+        The sub-resources left out are loaded on first access of their field.
+        """
 
     @abstractmethod
     def get_playlist(self, playlist_id: str) -> PlaylistData:
@@ -40,3 +65,38 @@ class AbstractStreamingAPIClient:
     @abstractmethod
     def get_track_neighbors(self, track_id: str) -> List[str]:
         ...
+
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        """Get several tracks, clients with a multi-id endpoint should override it
+
+        Sub-resources without a multi-id endpoint (audio analysis, ...) may be
+        deferred to their first access by the overriding implementations.
+        """
+        return [self.get_track(track_id=track_id) for track_id in track_ids]
+
+    def get_albums(self, album_ids: List[str]) -> List[AlbumData]:
+        """Get several albums, clients with a multi-id endpoint should override it"""
+        return [self.get_album(album_id=album_id) for album_id in album_ids]
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        """Get several artists, clients with a multi-id endpoint should override it
+
+        Sub-resources without a multi-id endpoint (albums, top tracks, similar
+        artists) may be deferred to their first access by the overriding
+        implementations.
+        """
+        return [self.get_artist(artist_id=artist_id) for artist_id in artist_ids]
+
+    def ids_per_call(self, method: str) -> int:
+        """Number of ids a multi-id method sends per api call, e.g. get_artists
+
+        1 for the clients calling the api once per id, like the default
+        implementations, so that the crawl budgets count every call.
+        """
+        return 1
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        """Get the audio features of several tracks, unknown ids are skipped"""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not provide audio features"
+        )
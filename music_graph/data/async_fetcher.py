@@ -0,0 +1,182 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+from music_graph.abstract.async_client import AbstractAsyncStreamingAPIClient
+from music_graph.data.crawler import (
+    CrawlBudget,
+    CrawlClock,
+    Frontier,
+    followed_neighbors,
+    push_neighbors,
+)
+from music_graph.data.general_fetcher import (
+    SEED_FIELDS,
+    GeneralFetcher,
+    GraphBuildingModeEnum,
+    relation_neighbor_ids,
+)
+from music_graph.datamodel.base_data import BaseData
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.user_info import UserInfo
+
+
+class AsyncGeneralFetcher:
+    def __init__(
+        self,
+        client: AbstractAsyncStreamingAPIClient,
+        graph_building_mode: GraphBuildingModeEnum,
+        crawl_budget: Optional[CrawlBudget] = None,
+        crawl_round_size: int = 16,
+    ) -> None:
+        """Asyncio variant of GeneralFetcher
+
+        Every entity of a build is requested at once, the number of requests
+        actually in flight is bounded by the client concurrency limit.
+
+        Args:
+            client (AbstractAsyncStreamingAPIClient): the client used to fetch the data
+            graph_building_mode (GraphBuildingModeEnum): the type of node of the graph
+            crawl_budget (Optional[CrawlBudget]): limits of enhance_recursive_graph
+            crawl_round_size (int): number of nodes requested at once by each
+                round of enhance_recursive_graph
+        """
+        self.client = client
+        self.graph_building_mode = graph_building_mode
+        self.crawl_budget = crawl_budget or CrawlBudget()
+        self.crawl_round_size = crawl_round_size
+
+    async def fetch_graph(self, user_id: str, augment_graph: bool = True) -> MusicGraph:
+        user_info = await self.client.get_user_info(user_id=user_id)
+        graph = await self.fetch_positive_graph(user_info=user_info)
+        if augment_graph:
+            graph = await self.enhance_recursive_graph(graph=graph)
+        return graph
+
+    async def fetch_graph_and_write(self, user_id: str, path: str, *args, **kwargs):
+        g = await self.fetch_graph(user_id, *args, **kwargs)
+        g.write(path)
+
+    async def fetch_positive_graph(self, user_info: UserInfo) -> MusicGraph:
+        get_entity, get_neighbors = self._mode_fetchers()
+        field_name: str = SEED_FIELDS[self.graph_building_mode]
+        return await self._build_graph(
+            entity_ids=getattr(user_info, field_name),
+            get_entity=get_entity,
+            get_neighbors=get_neighbors,
+        )
+
+    async def enhance_recursive_graph(
+        self, graph: MusicGraph, budget: Optional[CrawlBudget] = None
+    ) -> MusicGraph:
+        """Add the nodes close to the graph, the most relevant first, within a budget
+
+        The crawl of GeneralFetcher.enhance_recursive_graph, each round requests
+        crawl_round_size nodes at once. The ids the client fails to fetch are
+        logged and skipped, like the unknown ids of the batch lookups.
+
+        Args:
+            graph (MusicGraph): the graph to enhance in place
+            budget (Optional[CrawlBudget]): the crawl limits, defaults to the
+                fetcher crawl_budget
+
+        Returns:
+            MusicGraph: the enhanced graph
+        """
+        budget = budget or self.crawl_budget
+        get_entity, get_neighbors = self._mode_fetchers()
+        frontier: Frontier = Frontier(visited=set(graph.raw_node))
+        for node in list(graph.raw_node.values()):
+            push_neighbors(frontier, graph.raw_node, node, 0, budget)
+        clock: CrawlClock = CrawlClock(budget)
+        while len(frontier):
+            size: int = clock.round_size(max(1, self.crawl_round_size), 1)
+            if size == 0:
+                break
+            popped = frontier.pop_many(size)
+            results = await asyncio.gather(
+                *[get_entity(node_id) for node_id, _, _ in popped],
+                return_exceptions=True,
+            )
+            found: List[Tuple[BaseData, float, int]] = []
+            for (node_id, score, depth), result in zip(popped, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Could not fetch {node_id}: {result!r}")
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    found.append((result, score, depth))
+            all_neighbor_ids = await asyncio.gather(
+                *[self._neighbor_ids(data, get_neighbors) for data, _, _ in found]
+            )
+            for (data, score, depth), neighbor_ids in zip(found, all_neighbor_ids):
+                kept = followed_neighbors(neighbor_ids, graph.graph, budget.fan_out)
+                node = GeneralFetcher.make_node(data, kept, value=score)
+                graph.add_node(node=node)
+                push_neighbors(frontier, graph.raw_node, node, depth, budget)
+            clock.spend(nodes=len(found), requests=len(popped) + len(found))
+        logger.info(
+            f"Enhanced graph with {clock.stats.nodes} nodes in "
+            f"{clock.stats.requests} requests and {clock.stats.seconds:.1f}s, "
+            f"stopped on {clock.stats.stop_reason}"
+        )
+        return graph
+
+    def _mode_fetchers(
+        self,
+    ) -> Tuple[
+        Callable[[str], Awaitable[BaseData]], Callable[[str], Awaitable[List[str]]]
+    ]:
+        if self.graph_building_mode == GraphBuildingModeEnum.ARTIST:
+            return (
+                lambda _id: self.client.get_artist(artist_id=_id),
+                self.client.get_artist_neighbors,
+            )
+        elif self.graph_building_mode == GraphBuildingModeEnum.PLAYLIST:
+            return (
+                lambda _id: self.client.get_playlist(playlist_id=_id),
+                self._playlist_neighbors,
+            )
+        elif self.graph_building_mode == GraphBuildingModeEnum.TRACK:
+            return (
+                lambda _id: self.client.get_track(track_id=_id),
+                self.client.get_track_neighbors,
+            )
+        else:
+            raise NotImplementedError()
+
+    async def _playlist_neighbors(self, playlist_id: str) -> List[str]:
+        # Neither spotify nor tidal provide similar playlists
+        try:
+            return await self.client.get_playlist_neighbors(playlist_id)
+        except NotImplementedError:
+            return []
+
+    @staticmethod
+    async def _neighbor_ids(
+        data: BaseData, get_neighbors: Callable[[str], Awaitable[List[str]]]
+    ) -> List[str]:
+        # A pending relation field would load with a blocking call
+        neighbor_ids: Optional[List[str]] = relation_neighbor_ids(data, load=False)
+        if neighbor_ids is None:
+            return await get_neighbors(data.data_id)
+        return neighbor_ids
+
+    async def _build_graph(
+        self,
+        entity_ids: List[str],
+        get_entity: Callable[[str], Awaitable[BaseData]],
+        get_neighbors: Callable[[str], Awaitable[List[str]]],
+    ) -> MusicGraph:
+        graph: MusicGraph = MusicGraph()
+        raw_data: Dict[Hashable, BaseData] = {}
+        for data in await asyncio.gather(*[get_entity(_id) for _id in entity_ids]):
+            raw_data[data.data_id] = data
+        all_neighbor_ids = await asyncio.gather(
+            *[self._neighbor_ids(data, get_neighbors) for data in raw_data.values()]
+        )
+        for data, neighbor_ids in zip(raw_data.values(), all_neighbor_ids):
+            graph.add_node(node=GeneralFetcher.make_node(data, neighbor_ids))
+            graph.seed_versions[data.data_id] = getattr(data, "snapshot_id", None)
+        return graph
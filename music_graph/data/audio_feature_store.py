@@ -0,0 +1,202 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.audio_features import AudioFeatures
+from music_graph.datamodel.compact import CompactTrackData
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.track import TrackData
+from music_graph.utils.concurrency import bounded_map, chunks
+
+# Columns of the feature matrix, the numeric fields of AudioFeatures
+FEATURE_NAMES: Tuple[str, ...] = (
+    "acousticness",
+    "danceability",
+    "duration_ms",
+    "energy",
+    "instrumentalness",
+    "key",
+    "liveness",
+    "loudness",
+    "mode",
+    "speechiness",
+    "tempo",
+    "time_signature",
+    "valence",
+)
+# Ids per get_audio_features call, the size of the spotify multi-id endpoint
+FEATURES_BATCH_SIZE: int = 100
+
+
+def graph_track_ids(graph: MusicGraph) -> List[str]:
+    """Ids of the track nodes of a graph, in insertion order"""
+    return [
+        node_id
+        for node_id, node in graph.raw_node.items()
+        if isinstance(node.object, (TrackData, CompactTrackData))
+    ]
+
+
+@dataclass(eq=False)
+class AudioFeatureStore:
+    """Audio features of many tracks, as one float32 matrix with a row per track
+
+    Normalization, filters and cosine similarities are numpy operations on the
+    whole matrix, e.g. the tracks most similar to one among 100k tracks are one
+    matrix-vector product. Filters and normalization return a new store.
+    Requires numpy, the columnar extra.
+
+    Examples:
+        >>> store = AudioFeatureStore(
+        ...     ["a", "b", "c"],
+        ...     np.array([[0.0, 100.0], [0.5, 120.0], [1.0, 170.0]]),
+        ...     ("energy", "tempo"),
+        ... )
+        >>> store.filter(tempo_range=(90, 150), min_energy=0.4).track_ids
+        ['b']
+        >>> [round(v, 2) for v in store.normalized().column("energy").tolist()]
+        [-1.22, 0.0, 1.22]
+        >>> [track_id for track_id, _ in store.normalized().most_similar("a", k=1)]
+        ['b']
+    """
+
+    track_ids: List[str]
+    matrix: np.ndarray
+    feature_names: Tuple[str, ...] = FEATURE_NAMES
+    index: Dict[str, int] = field(init=False, repr=False)
+    _unit_rows: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.matrix = np.ascontiguousarray(self.matrix, dtype=np.float32).reshape(
+            len(self.track_ids), len(self.feature_names)
+        )
+        self.index = {track_id: i for i, track_id in enumerate(self.track_ids)}
+
+    @classmethod
+    def from_features(cls, features: Iterable[AudioFeatures]):
+        features = list(features)
+        values: List[float] = [
+            getattr(f, name) for f in features for name in FEATURE_NAMES
+        ]
+        return cls([f.data_id for f in features], np.array(values, dtype=np.float32))
+
+    @classmethod
+    def fetch(
+        cls,
+        client: AbstractStreamingAPIClient,
+        graph: MusicGraph,
+        max_workers: int = 1,
+    ):
+        """Fetch the audio features of every track of a graph, 100 ids per call
+
+        Args:
+            client (AbstractStreamingAPIClient): a client providing audio features
+            graph (MusicGraph): the graph, its track nodes are fetched
+            max_workers (int): number of batches fetched concurrently
+
+        Returns:
+            AudioFeatureStore: the features of the tracks, those without features
+            are left out
+        """
+        batches: Iterable[List[AudioFeatures]] = bounded_map(
+            client.get_audio_features,
+            chunks(graph_track_ids(graph), FEATURES_BATCH_SIZE),
+            max_workers=max_workers,
+        )
+        return cls.from_features(f for batch in batches for f in batch)
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self.index
+
+    def column(self, name: str) -> np.ndarray:
+        """The values of a feature for every track, a view of the matrix"""
+        return self.matrix[:, self.feature_names.index(name)]
+
+    def vector(self, track_id: str) -> np.ndarray:
+        return self.matrix[self.index[track_id]]
+
+    def select(self, mask: np.ndarray):
+        """The store of the tracks whose mask value is true"""
+        rows: np.ndarray = np.flatnonzero(mask)
+        return AudioFeatureStore(
+            [self.track_ids[i] for i in rows], self.matrix[rows], self.feature_names
+        )
+
+    def filter(
+        self,
+        tempo_range: Optional[Tuple[float, float]] = None,
+        min_energy: Optional[float] = None,
+        ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        """The store of the tracks within all the given bounds, inclusive
+
+        Args:
+            tempo_range (Optional[Tuple[float, float]]): minimum and maximum tempo
+            min_energy (Optional[float]): minimum energy
+            ranges (Optional[Dict[str, Tuple[float, float]]]): minimum and maximum
+                of other features, by name
+        """
+        bounds: Dict[str, Tuple[float, float]] = dict(ranges or {})
+        if tempo_range is not None:
+            bounds["tempo"] = tempo_range
+        if min_energy is not None:
+            bounds["energy"] = (min_energy, np.inf)
+        mask: np.ndarray = np.ones(len(self), dtype=bool)
+        for name, (low, high) in bounds.items():
+            values: np.ndarray = self.column(name)
+            mask &= (values >= low) & (values <= high)
+        return self.select(mask)
+
+    def normalized(self, method: str = "zscore"):
+        """The store with every feature rescaled, constant features become 0
+
+        Args:
+            method (str): "zscore" for zero mean and unit variance, "minmax" for
+                values between 0 and 1
+        """
+        if method == "zscore":
+            offset: np.ndarray = self.matrix.mean(axis=0)
+            scale: np.ndarray = self.matrix.std(axis=0)
+        elif method == "minmax":
+            offset = self.matrix.min(axis=0)
+            scale = self.matrix.max(axis=0) - offset
+        else:
+            raise ValueError(f"Unknown normalization {method}, use zscore or minmax")
+        scale[scale == 0] = 1
+        return AudioFeatureStore(
+            list(self.track_ids), (self.matrix - offset) / scale, self.feature_names
+        )
+
+    def unit_rows(self) -> np.ndarray:
+        """The rows scaled to unit norm, computed once, zero rows stay zero"""
+        if self._unit_rows is None:
+            norms: np.ndarray = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self._unit_rows = self.matrix / norms
+        return self._unit_rows
+
+    def cosine_similarities(self, track_ids: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of some tracks to every track, one row per given track
+
+        The features have different scales, so the similarities of a normalized
+        store are usually the meaningful ones.
+        """
+        unit_rows: np.ndarray = self.unit_rows()
+        queries: np.ndarray = unit_rows[[self.index[i] for i in track_ids]]
+        return queries @ unit_rows.T
+
+    def most_similar(self, track_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """The k tracks most similar to a track, itself excluded, best first"""
+        similarities: np.ndarray = self.cosine_similarities([track_id])[0]
+        similarities[self.index[track_id]] = -np.inf
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return []
+        best: np.ndarray = np.argpartition(-similarities, k - 1)[:k]
+        best = best[np.argsort(-similarities[best])]
+        return [(self.track_ids[i], float(similarities[i])) for i in best]
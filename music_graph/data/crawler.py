@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Container, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from music_graph.datamodel.graph.node import GraphNode
+
+
+@dataclass()
+class CrawlBudget:
+    """Limits of the graph augmentation
+
+    Attributes:
+        max_depth (int): maximum distance of a crawled node to the initial graph
+        max_nodes (int): maximum number of nodes fetched
+        max_requests (Optional[int]): maximum number of client calls
+        max_seconds (Optional[float]): maximum duration of the crawl
+        fan_out (int): maximum number of new neighbors followed per fetched node
+        decay (float): factor applied to the score given by a node to its neighbors
+    """
+
+    max_depth: int = 2
+    max_nodes: int = 100
+    max_requests: Optional[int] = None
+    max_seconds: Optional[float] = None
+    fan_out: int = 10
+    decay: float = 0.5
+
+
+@dataclass()
+class CrawlStats:
+    nodes: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+    stop_reason: str = "exhausted"
+
+
+@dataclass()
+class Frontier:
+    """Priority queue of the nodes to fetch, the best scored first
+
+    The score of a node is accumulated over the nodes pointing to it, so a node
+    shared by many fetched nodes is fetched before a node seen once, and its depth
+    is the shortest one it was pushed with. Ties are broken by insertion order.
+
+    Examples:
+        >>> frontier = Frontier(visited={"a"})
+        >>> frontier.push("a", 1.0, 1)
+        >>> frontier.push("b", 0.5, 1)
+        >>> frontier.push("c", 0.4, 1)
+        >>> frontier.push("c", 0.4, 2)
+        >>> frontier.pop()
+        ('c', 0.8, 1)
+        >>> frontier.pop(), frontier.pop()
+        (('b', 0.5, 1), None)
+    """
+
+    visited: Set[Hashable] = field(default_factory=set)
+    scores: Dict[Hashable, float] = field(default_factory=dict)
+    depths: Dict[Hashable, int] = field(default_factory=dict)
+    _heap: List[Tuple[float, int, Hashable]] = field(default_factory=list)
+    _counter: "itertools.count[int]" = field(default_factory=itertools.count)
+
+    def push(self, node_id: Hashable, score: float, depth: int) -> None:
+        if node_id in self.visited:
+            return
+        self.scores[node_id] = self.scores.get(node_id, 0.0) + score
+        self.depths[node_id] = min(depth, self.depths.get(node_id, depth))
+        # The previous entries of the node are stale, and skipped once visited
+        entry = (-self.scores[node_id], next(self._counter), node_id)
+        heapq.heappush(self._heap, entry)
+
+    def pop(self) -> Optional[Tuple[Hashable, float, int]]:
+        """Mark the best node as visited and return it, with its score and depth"""
+        while self._heap:
+            _, _, node_id = heapq.heappop(self._heap)
+            if node_id not in self.visited:
+                self.visited.add(node_id)
+                return node_id, self.scores.pop(node_id), self.depths.pop(node_id)
+        return None
+
+    def visit(self, node_id: Hashable) -> None:
+        self.visited.add(node_id)
+        self.scores.pop(node_id, None)
+        self.depths.pop(node_id, None)
+
+    def pop_many(self, size: int) -> List[Tuple[Hashable, float, int]]:
+        popped: List[Tuple[Hashable, float, int]] = []
+        while len(popped) < size:
+            item = self.pop()
+            if item is None:
+                break
+            popped.append(item)
+        return popped
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+class CrawlClock:
+    """Accounting of the crawl budget spent"""
+
+    def __init__(self, budget: CrawlBudget) -> None:
+        self.budget = budget
+        self.stats = CrawlStats()
+        self._start: float = time.monotonic()
+
+    def round_size(self, workers: int, batch_size: int) -> int:
+        """Number of nodes to fetch in the next round, 0 when the budget is spent
+
+        Fetching n nodes costs one entity lookup per batch of batch_size ids, 1
+        for the clients calling the api once per id, and one neighbor lookup
+        per node.
+        """
+        budget: CrawlBudget = self.budget
+        self.stats.seconds = time.monotonic() - self._start
+        if budget.max_seconds is not None and self.stats.seconds >= budget.max_seconds:
+            self.stats.stop_reason = "max_seconds"
+            return 0
+        size: int = min(workers, budget.max_nodes - self.stats.nodes)
+        if size <= 0:
+            self.stats.stop_reason = "max_nodes"
+            return 0
+        if budget.max_requests is not None:
+            remaining: int = budget.max_requests - self.stats.requests
+            while size > 0 and size + -(-size // batch_size) > remaining:
+                size -= 1
+            if size == 0:
+                self.stats.stop_reason = "max_requests"
+        return size
+
+    def spend(self, nodes: int, requests: int) -> None:
+        self.stats.nodes += nodes
+        self.stats.requests += requests
+        self.stats.seconds = time.monotonic() - self._start
+
+
+def followed_neighbors(
+    neighbor_ids: Iterable[str], known: Container[Hashable], fan_out: int
+) -> List[str]:
+    """Neighbors kept for a crawled node, the known ones and fan_out new ones
+
+    Examples:
+        >>> followed_neighbors(["a", "b", "c", "d"], known={"c"}, fan_out=1)
+        ['a', 'c']
+    """
+    kept: List[str] = []
+    new: int = 0
+    for neighbor_id in neighbor_ids:
+        if neighbor_id in known:
+            kept.append(neighbor_id)
+        elif new < fan_out:
+            kept.append(neighbor_id)
+            new += 1
+    return kept
+
+
+def push_neighbors(
+    frontier: Frontier,
+    known: Container[Hashable],
+    node: GraphNode,
+    depth: int,
+    budget: CrawlBudget,
+) -> None:
+    """Push the neighbors of a fetched node which are not known yet to the frontier
+
+    Their score is the node value times the edge weight and the budget decay,
+    and the neighbors with the heaviest edges are followed first, fan_out at most.
+    """
+    if depth >= budget.max_depth:
+        return
+    value: float = 1.0 if node.value is None else node.value
+    weights: Dict[str, float] = {
+        n.id: 1.0 if n.edge_weight is None else n.edge_weight for n in node.neighbor_ids
+    }
+    new_ids: List[str] = [n for n in weights if n not in known]
+    for neighbor_id in sorted(new_ids, key=lambda n: -weights[n])[: budget.fan_out]:
+        weight: float = weights[neighbor_id]
+        frontier.push(neighbor_id, value * weight * budget.decay, depth + 1)
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Set
+
+from music_graph.datamodel.graph.node import GraphNode
+
+
+@dataclass()
+class EntityStore:
+    """Entities fetched for a batch of graphs, each with all its neighbors
+
+    The graphs built from the store share its nodes, which must not be mutated.
+
+    Examples:
+        >>> store = EntityStore()
+        >>> store.add(["a", "b"], [GraphNode("a", None, [])])
+        >>> store.unknown(["a", "b", "c", "c"])
+        ['c']
+    """
+
+    nodes: Dict[Hashable, GraphNode] = field(default_factory=dict)
+    # Ids the client returned no entity for
+    missing: Set[Hashable] = field(default_factory=set)
+
+    def unknown(self, ids: Iterable[Hashable]) -> List[Hashable]:
+        """The distinct ids neither fetched nor missing, in order"""
+        return [
+            _id
+            for _id in dict.fromkeys(ids)
+            if _id not in self.nodes and _id not in self.missing
+        ]
+
+    def add(self, ids: Iterable[Hashable], nodes: Iterable[GraphNode]) -> None:
+        """Store the nodes fetched for ids, the ids without node are missing"""
+        for node in nodes:
+            self.nodes[node.id] = node
+        self.missing.update(_id for _id in ids if _id not in self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
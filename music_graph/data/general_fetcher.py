@@ -1,14 +1,54 @@
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import time
+import zlib
+from dataclasses import asdict
 from enum import Enum
-from typing import Dict, Hashable
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from loguru import logger
 
 from music_graph.abstract.client import AbstractStreamingAPIClient
 from music_graph.abstract.fetcher import AbstractFetcher
+from music_graph.data.crawler import (
+    CrawlBudget,
+    CrawlClock,
+    Frontier,
+    followed_neighbors,
+    push_neighbors,
+)
+from music_graph.data.entity_store import EntityStore
+from music_graph.data.journal import CrawlJournal
+from music_graph.data.work_queue import SQLiteWorkQueue
 from music_graph.datamodel.artist import ArtistData
-from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.base_data import BaseData
+from music_graph.datamodel.graph.graph import MusicGraph, node_from_dict, node_to_dict
 from music_graph.datamodel.graph.node import GraphNode, NeighborData
-from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.lazy import LazyFieldsMixin
 from music_graph.datamodel.track import TrackData
 from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.concurrency import bounded_map, chunks
+
+S = TypeVar("S")
+T = TypeVar("T")
 
 
 class GraphBuildingModeEnum(Enum):
@@ -18,22 +58,136 @@ class GraphBuildingModeEnum(Enum):
     ALBUM = "album"
 
 
+# UserInfo field holding the seed entities of each graph building mode
+SEED_FIELDS: Dict[GraphBuildingModeEnum, str] = {
+    GraphBuildingModeEnum.ARTIST: "artist_ids",
+    GraphBuildingModeEnum.TRACK: "top_track_ids",
+    GraphBuildingModeEnum.PLAYLIST: "playlist_ids",
+    GraphBuildingModeEnum.ALBUM: "saved_album_ids",
+}
+
+# Field of the entities holding the same ids as their neighbor endpoint, filled
+# by the clients with the entity: the similar artists, and the tidal track radio
+RELATION_FIELDS: Dict[Type, str] = {
+    ArtistData: "similar_artist_ids",
+    TrackData: "track_playlist_ids",
+}
+
+
+def relation_neighbor_ids(data: BaseData, load: bool = True) -> Optional[List[str]]:
+    """Neighbors of an entity read from its relation field, None when unknown
+
+    A pending relation field is loaded when load is True, its loader issues the
+    same request as the neighbor endpoint but keeps the result on the entity. An
+    empty loaded field is not trusted, the spotify tracks have none.
+
+    Examples:
+        >>> artist = ArtistData("a", [], 0, "", [], "", "a", 0.0, "", ["b"])
+        >>> relation_neighbor_ids(artist)
+        ['b']
+        >>> artist.defer("similar_artist_ids", lambda: ["c"], unloaded=[])
+        >>> relation_neighbor_ids(artist, load=False) is None
+        True
+        >>> relation_neighbor_ids(artist)
+        ['c']
+    """
+    field_name: Optional[str] = RELATION_FIELDS.get(type(data))
+    if field_name is None:
+        return None
+    pending: bool = isinstance(data, LazyFieldsMixin) and not data.is_loaded(field_name)
+    if pending and not load:
+        return None
+    neighbor_ids: List[str] = list(getattr(data, field_name))
+    return neighbor_ids if neighbor_ids or pending else None
+
+
 class GeneralFetcher(AbstractFetcher):
     def __init__(
         self,
         client: AbstractStreamingAPIClient,
         graph_building_mode: GraphBuildingModeEnum,
+        max_workers: int = 1,
+        max_in_flight: Optional[int] = None,
+        batch_size: int = 50,
+        crawl_budget: Optional[CrawlBudget] = None,
+        node_sink: Optional[Callable[[GraphNode], None]] = None,
     ) -> None:
+        """Fetcher building a MusicGraph from a streaming client
+
+        Args:
+            client (AbstractStreamingAPIClient): the client used to fetch the data
+            graph_building_mode (GraphBuildingModeEnum): the type of node of the graph
+            max_workers (int): number of threads issuing client calls, 1 keeps the
+                sequential behaviour. The client must be thread safe when above 1.
+            max_in_flight (Optional[int]): maximum number of pending client calls,
+                defaults to twice max_workers
+            batch_size (int): maximum number of ids per batch lookup, each batch is
+                one concurrent task. The batches are no larger than the ids the
+                client sends per api call, see ids_per_call, so that each one is
+                a single request of the crawl budgets.
+            crawl_budget (Optional[CrawlBudget]): limits of enhance_recursive_graph
+            node_sink (Optional[Callable[[GraphNode], None]]): called with every
+                node added to the graph, as soon as it is fetched
+        """
         self.client = client
         self.graph_building_mode = graph_building_mode
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.crawl_budget = crawl_budget or CrawlBudget()
+        self.node_sink = node_sink
+
+    def fetch_graph(
+        self,
+        user_id: str,
+        augment_graph: bool = True,
+        journal: Optional[CrawlJournal] = None,
+    ) -> MusicGraph:
+        """Build the graph of a user, resuming the crawl written in journal if any
+
+        The initial graph, of the seeds of the user, is journaled once fully
+        fetched, the crawl after each round. A failure while fetching the seeds
+        fetches all of them again, the seeds of a user being few next to the
+        nodes of the crawl.
 
-    def fetch_graph(self, user_id: str, augment_graph: bool = True) -> MusicGraph:
-        user_info = self.client.get_user_info(user_id=user_id)
-        graph = self.fetch_positive_graph(user_info=user_info)
+        Args:
+            user_id (str): the id of the user
+            augment_graph (bool): whether to crawl the neighbors of the user graph
+            journal (Optional[CrawlJournal]): journal of the crawl, the initial
+                graph and the crawl rounds it holds are not fetched again. It is
+                discarded when written for another user, mode or crawl budget.
+        """
+        crawl: Dict[str, Any] = {
+            "user_id": user_id,
+            "mode": self.graph_building_mode.value,
+            "budget": asdict(self.crawl_budget),
+        }
+        graph: Optional[MusicGraph] = (
+            None if journal is None else journal.read_seeds(crawl)
+        )
+        if graph is None:
+            user_info = self.client.get_user_info(user_id=user_id)
+            graph = self.fetch_positive_graph(user_info=user_info)
+            if journal is not None:
+                journal.write_seeds(graph, crawl)
         if augment_graph:
-            graph = self.enhance_recursive_graph(graph=graph)
+            graph = self.enhance_recursive_graph(graph=graph, journal=journal)
         return graph
 
+    def fetch_graph_and_write(
+        self, user_id: str, path: str, augment_graph: bool = True
+    ) -> None:
+        """Build the graph of a user and write it, resuming an interrupted build
+
+        The crawl is journaled next to path until the graph is written, so calling
+        it again after a failure resumes where it stopped, from the seeds again
+        when it failed while fetching them, see fetch_graph.
+        """
+        journal: CrawlJournal = CrawlJournal(f"{path}.journal")
+        graph: MusicGraph = self.fetch_graph(user_id, augment_graph, journal=journal)
+        graph.write(path)
+        journal.remove()
+
     def fetch_positive_graph(self, user_info: UserInfo) -> MusicGraph:
         if self.graph_building_mode == GraphBuildingModeEnum.ARTIST:
             return self.build_artist_graph(user_info)
@@ -46,82 +200,539 @@ class GeneralFetcher(AbstractFetcher):
         else:
             raise NotImplementedError()
 
-    def enhance_recursive_graph(self, graph: MusicGraph) -> MusicGraph:
-        # TODO: do the enhancing recursively by adding nodes which are close to the initial graph, but are not in the initial graph.
+    def enhance_recursive_graph(
+        self,
+        graph: MusicGraph,
+        budget: Optional[CrawlBudget] = None,
+        journal: Optional[CrawlJournal] = None,
+        store: Optional[EntityStore] = None,
+    ) -> MusicGraph:
+        """Add the nodes close to the graph, the most relevant first, within a budget
+
+        The neighbors of the fetched nodes which are not fetched yet form a
+        frontier, scored by the value of the nodes pointing to them times the edge
+        weight and the budget decay. The best scored ones are fetched, in rounds
+        of max_workers nodes, and their own neighbors join the frontier, until the
+        frontier is empty or a limit of the budget is reached.
+
+        With a journal, the rounds it holds are replayed first, then each new
+        round is appended to it. The node and request budgets count the replayed
+        rounds, the wall-clock budget only the current run.
+
+        Args:
+            graph (MusicGraph): the graph to enhance in place
+            budget (Optional[CrawlBudget]): the crawl limits, defaults to the
+                fetcher crawl_budget
+            journal (Optional[CrawlJournal]): journal of the crawl rounds
+            store (Optional[EntityStore]): entities shared with other crawls, the
+                ones it holds are not fetched again
+
+        Returns:
+            MusicGraph: the enhanced graph
+        """
+        budget = budget or self.crawl_budget
+        frontier: Frontier = Frontier(visited=set(graph.raw_node))
+        for node in list(graph.raw_node.values()):
+            push_neighbors(frontier, graph.raw_node, node, 0, budget)
+        clock: CrawlClock = CrawlClock(budget)
+        for record in () if journal is None else journal.rounds():
+            for node, depth in record["nodes"]:
+                frontier.visit(node.id)
+                self._add_node(graph, node)
+                push_neighbors(frontier, graph.raw_node, node, depth, budget)
+            for node_id in record["missing"]:
+                frontier.visit(node_id)
+            clock.spend(nodes=len(record["nodes"]), requests=record["requests"])
+        try:
+            self._crawl(graph, frontier, clock, journal, store)
+        finally:
+            if journal is not None:
+                journal.flush()
+        logger.info(
+            f"Enhanced graph with {clock.stats.nodes} nodes in "
+            f"{clock.stats.requests} requests and {clock.stats.seconds:.1f}s, "
+            f"stopped on {clock.stats.stop_reason}"
+        )
         return graph
 
-    def build_artist_graph(self, user_info: UserInfo) -> MusicGraph:
-        # TODO: finish the code for music graph construction
-        graph: MusicGraph = MusicGraph()
-        artist_raw_data: Dict[Hashable, ArtistData] = {}
-        for artist_id in user_info.artist_ids:
-            artist_data: ArtistData = self.client.get_artist(artist_id=artist_id)
-            artist_raw_data[artist_data.id] = artist_data
-        for data in artist_raw_data.values():
-            neighbor_ids = self.client.get_artist_neighbors(data.id)
-            graph.add_node(
-                node=GraphNode(
-                    id=data.id,
-                    object=data,
-                    neighbor_ids=[
-                        NeighborData(id=n, edge_weight=1.0, edge_cap=1.0)
-                        for n in neighbor_ids
-                    ],
-                    value=1.0,
+    def _crawl(
+        self,
+        graph: MusicGraph,
+        frontier: Frontier,
+        clock: CrawlClock,
+        journal: Optional[CrawlJournal],
+        store: Optional[EntityStore],
+    ) -> None:
+        budget: CrawlBudget = clock.budget
+        get_entities, get_neighbors, batch_size = self._mode_fetchers()
+        while len(frontier):
+            size: int = clock.round_size(max(1, self.max_workers), batch_size)
+            if size == 0:
+                break
+            popped = frontier.pop_many(size)
+            fetched, requests = self._fetch_stored_nodes(
+                [p[0] for p in popped], store, get_entities, get_neighbors, batch_size
+            )
+            # The ids the client does not know are visited but not fetched
+            found = [p for p in popped if p[0] in fetched]
+            nodes: List[Tuple[GraphNode, int]] = []
+            for node_id, score, depth in found:
+                neighbor_ids = followed_neighbors(
+                    (n.id for n in fetched[node_id].neighbor_ids),
+                    graph.graph,
+                    budget.fan_out,
                 )
+                data: BaseData = fetched[node_id].object
+                node = self.make_node(data, neighbor_ids, value=score)
+                self._add_node(graph, node)
+                push_neighbors(frontier, graph.raw_node, node, depth, budget)
+                nodes.append((node, depth))
+            clock.spend(nodes=len(found), requests=requests)
+            if journal is not None:
+                missing = [p[0] for p in popped if p[0] not in fetched]
+                journal.write_round(nodes, missing=missing, requests=requests)
+
+    def _fetch_stored_nodes(
+        self,
+        entity_ids: List[str],
+        store: Optional[EntityStore],
+        get_entities: Callable[[List[str]], List[BaseData]],
+        get_neighbors: Callable[[str], List[str]],
+        batch_size: int,
+    ) -> Tuple[Dict[Hashable, GraphNode], int]:
+        """Nodes of the ids with all their neighbors, and the requests it took
+
+        The ids already in the store are not fetched again, and the fetched ones
+        are added to it.
+        """
+        unknown: List[Hashable] = (
+            entity_ids if store is None else store.unknown(entity_ids)
+        )
+        fetched: List[GraphNode] = self._fetch_nodes(
+            unknown, get_entities, get_neighbors, batch_size
+        )
+        requests: int = -(-len(unknown) // batch_size) + len(fetched)
+        if store is None:
+            return {node.id: node for node in fetched}, requests
+        store.add(unknown, fetched)
+        found = {_id: store.nodes[_id] for _id in entity_ids if _id in store.nodes}
+        return found, requests
+
+    def enhance_with_processes(
+        self,
+        graph: MusicGraph,
+        client_factory: Callable[[], AbstractStreamingAPIClient],
+        processes: Optional[int] = None,
+        budget: Optional[CrawlBudget] = None,
+        queue_path: Optional[str] = None,
+        claim_size: int = 8,
+        poll_interval: float = 0.01,
+    ) -> MusicGraph:
+        """Crawl like enhance_recursive_graph, with worker processes fetching
+
+        The fetcher process keeps the frontier and the graph, and queues the best
+        scored ids in a SQLiteWorkQueue. Each worker process builds its own
+        client, claims ids, fetches and converts the entities and their
+        neighbors, and stores them back compressed. The json decoding and the
+        conversions are spread over the processes, so the throughput scales
+        with the cores when the client is not the bottleneck.
+
+        Args:
+            graph (MusicGraph): the graph to enhance in place
+            client_factory (Callable): builds the client of a worker, it must be
+                picklable, e.g. SpotifyStreamingAPIClient.from_env
+            processes (Optional[int]): number of worker processes, defaults to
+                the number of cores
+            budget (Optional[CrawlBudget]): the crawl limits, defaults to the
+                fetcher crawl_budget. Each id counts as two requests.
+            queue_path (Optional[str]): the queue database, a temporary file by
+                default, emptied when the crawl starts. Workers on other machines
+                can join the crawl with crawl_worker when it is on a shared
+                filesystem.
+            claim_size (int): number of ids claimed at once by a worker
+            poll_interval (float): seconds between two polls of an empty queue
+
+        Returns:
+            MusicGraph: the enhanced graph
+        """
+        budget = budget or self.crawl_budget
+        processes = processes or os.cpu_count() or 1
+        directory: Optional[str] = None
+        if queue_path is None:
+            directory = tempfile.mkdtemp(prefix="music_graph_crawl")
+            queue_path = os.path.join(directory, "queue.sqlite")
+        queue: SQLiteWorkQueue = SQLiteWorkQueue(queue_path)
+        queue.reset()
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(
+                target=crawl_worker,
+                args=(
+                    queue_path,
+                    client_factory,
+                    self.graph_building_mode.value,
+                    claim_size,
+                    poll_interval,
+                ),
+                daemon=True,
             )
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        frontier: Frontier = Frontier(visited=set(graph.raw_node))
+        for node in list(graph.raw_node.values()):
+            push_neighbors(frontier, graph.raw_node, node, 0, budget)
+        clock: CrawlClock = CrawlClock(budget)
+        # Score and depth of the queued ids, by id
+        in_flight: Dict[Hashable, Tuple[float, int]] = {}
+        stopped: bool = False
+        try:
+            while in_flight or (len(frontier) and not stopped):
+                free: int = 2 * processes * claim_size - len(in_flight)
+                if free > 0 and len(frontier) and not stopped:
+                    size: int = clock.round_size(free, 1)
+                    stopped = size == 0
+                    popped = frontier.pop_many(size)
+                    queue.put([(node_id, score) for node_id, score, _ in popped])
+                    in_flight.update((p[0], (p[1], p[2])) for p in popped)
+                    clock.spend(nodes=len(popped), requests=2 * len(popped))
+                results = queue.collect()
+                for node_id, result, error in results:
+                    if node_id not in in_flight:
+                        continue
+                    score, depth = in_flight.pop(node_id)
+                    if result is None:
+                        if error is not None:
+                            logger.warning(f"Could not fetch {node_id}: {error}")
+                        continue
+                    fetched = node_from_dict(json.loads(zlib.decompress(result)))
+                    all_neighbor_ids = [n.id for n in fetched.neighbor_ids]
+                    neighbor_ids = followed_neighbors(
+                        all_neighbor_ids, graph.graph, budget.fan_out
+                    )
+                    node = self.make_node(fetched.object, neighbor_ids, value=score)
+                    self._add_node(graph, node)
+                    push_neighbors(frontier, graph.raw_node, node, depth, budget)
+                if not results:
+                    if not any(worker.is_alive() for worker in workers):
+                        raise RuntimeError("Every crawl worker process exited")
+                    time.sleep(poll_interval)
+        finally:
+            queue.close()
+            for worker in workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+        logger.info(
+            f"Enhanced graph with {len(graph.raw_node)} nodes using {processes} "
+            f"processes in {clock.stats.seconds:.1f}s, stopped on "
+            f"{clock.stats.stop_reason}"
+        )
         return graph
 
+    def build_artist_graph(self, user_info: UserInfo) -> MusicGraph:
+        return self._build_graph(user_info.artist_ids, *self._mode_fetchers())
+
     def build_album_graph(self, user_info: UserInfo) -> MusicGraph:
-        # TODO: do the code for music graph construction
-        raise NotImplementedError
+        raise NotImplementedError(
+            "Album graphs are not supported, the clients provide no album neighbors"
+        )
 
     def build_playlist_graph(self, user_info: UserInfo) -> MusicGraph:
-        # TODO: do the code for music graph construction
-        graph: MusicGraph = MusicGraph()
-        playlist_raw_data: Dict[Hashable, PlaylistData] = {}
-        for playlist_id in user_info.artist_ids:
-            playlist_data: PlaylistData = self.client.get_playlist(
-                playlist_id=playlist_id
-            )
-            playlist_raw_data[playlist_data.id] = playlist_data
-        for data in playlist_raw_data.values():
-            neighbor_ids = self.client.get_playlist_neighbors(data.id)
-            graph.add_node(
-                node=GraphNode(
-                    id=data.id,
-                    object=data,
-                    neighbor_ids=[
-                        NeighborData(id=n, edge_weight=1.0, edge_cap=1.0)
-                        for n in neighbor_ids
-                    ],
-                    value=1.0,
-                )
-            )
-        return graph
+        return self._build_graph(user_info.playlist_ids, *self._mode_fetchers())
 
     def build_track_graph(self, user_info: UserInfo) -> MusicGraph:
-        # TODO: do the code for music graph construction
+        return self._build_graph(user_info.top_track_ids, *self._mode_fetchers())
+
+    def _add_node(self, graph: MusicGraph, node: GraphNode) -> None:
+        graph.add_node(node=node)
+        if self.node_sink is not None:
+            self.node_sink(node)
+
+    def _map(self, func: Callable[[S], T], items: Iterable[S]) -> Iterator[T]:
+        return bounded_map(
+            func, items, max_workers=self.max_workers, max_in_flight=self.max_in_flight,
+        )
+
+    def _build_graph(
+        self,
+        entity_ids: Iterable[str],
+        get_entities: Callable[[List[str]], List[BaseData]],
+        get_neighbors: Callable[[str], List[str]],
+        batch_size: Optional[int] = None,
+    ) -> MusicGraph:
         graph: MusicGraph = MusicGraph()
-        track_raw_data: Dict[Hashable, TrackData] = {}
-        for track_id in user_info.top_track_ids:
-            track_data: TrackData = self.client.get_track(track_id=track_id)
-            track_raw_data[track_data.id] = track_data
-        for data in track_raw_data.values():
-            neighbor_ids = self.client.get_track_neighbors(data.id)
-            graph.add_node(
-                node=GraphNode(
-                    id=data.id,
-                    object=data,
-                    neighbor_ids=[
-                        NeighborData(id=n, edge_weight=1.0, edge_cap=1.0)
-                        for n in neighbor_ids
-                    ],
-                    value=1.0,
-                )
-            )
+        self._add_nodes(graph, entity_ids, get_entities, get_neighbors, batch_size)
+        return graph
+
+    def _add_nodes(
+        self,
+        graph: MusicGraph,
+        entity_ids: Iterable[str],
+        get_entities: Callable[[List[str]], List[BaseData]],
+        get_neighbors: Callable[[str], List[str]],
+        batch_size: Optional[int] = None,
+    ) -> None:
+        nodes = self._fetch_nodes(entity_ids, get_entities, get_neighbors, batch_size)
+        for node in nodes:
+            self._add_node(graph, node)
+            graph.seed_versions[node.id] = getattr(node.object, "snapshot_id", None)
+
+    def _fetch_nodes(
+        self,
+        entity_ids: Iterable[str],
+        get_entities: Callable[[List[str]], List[BaseData]],
+        get_neighbors: Callable[[str], List[str]],
+        batch_size: Optional[int] = None,
+    ) -> List[GraphNode]:
+        raw_data: Dict[Hashable, BaseData] = {}
+        batches = chunks(entity_ids, batch_size or self.batch_size)
+        for batch in self._map(get_entities, batches):
+            for data in batch:
+                raw_data[data.data_id] = data
+        all_neighbor_ids = self._map(
+            partial(self.neighbor_ids, get_neighbors=get_neighbors),
+            list(raw_data.values()),
+        )
+        return [
+            self.make_node(data, neighbor_ids)
+            for data, neighbor_ids in zip(raw_data.values(), all_neighbor_ids)
+        ]
+
+    def fetch_graphs(
+        self,
+        user_ids: Iterable[str],
+        augment_graph: bool = True,
+        store: Optional[EntityStore] = None,
+    ) -> Tuple[Dict[str, MusicGraph], EntityStore]:
+        """Build the graphs of several users, fetching each entity once
+
+        The seeds of every user are fetched together, in full batches, then each
+        graph is assembled from the shared store and crawled through it, so the
+        request count follows the distinct entities rather than the users.
+
+        Args:
+            user_ids (Iterable[str]): the ids of the users
+            augment_graph (bool): whether to crawl the neighbors of each graph
+            store (Optional[EntityStore]): the store to fill, e.g. the one of a
+                previous batch, a new one by default
+
+        Returns:
+            Tuple[Dict[str, MusicGraph], EntityStore]: the graph of each user, and
+                the store of the entities fetched
+        """
+        store = EntityStore() if store is None else store
+        get_entities, get_neighbors, batch_size = self._mode_fetchers()
+        user_infos: List[UserInfo] = list(
+            self._map(lambda _id: self.client.get_user_info(user_id=_id), user_ids)
+        )
+        field_name: str = SEED_FIELDS[self.graph_building_mode]
+        seed_ids: Dict[str, List[str]] = {
+            user_info.id: list(getattr(user_info, field_name))
+            for user_info in user_infos
+        }
+        unknown: List[Hashable] = store.unknown(
+            _id for ids in seed_ids.values() for _id in ids
+        )
+        store.add(
+            unknown,
+            self._fetch_nodes(unknown, get_entities, get_neighbors, batch_size),
+        )
+        graphs: Dict[str, MusicGraph] = {}
+        for user_id, ids in seed_ids.items():
+            graph: MusicGraph = MusicGraph()
+            for seed_id in dict.fromkeys(ids):
+                if seed_id in store.nodes:
+                    node: GraphNode = store.nodes[seed_id]
+                    self._add_node(graph, node)
+                    version = getattr(node.object, "snapshot_id", None)
+                    graph.seed_versions[seed_id] = version
+            if augment_graph:
+                graph = self.enhance_recursive_graph(graph, store=store)
+            graphs[user_id] = graph
+        logger.info(f"Built {len(graphs)} graphs from {len(store)} distinct entities")
+        return graphs, store
+
+    def refresh_graph(self, graph: MusicGraph, user_info: UserInfo) -> MusicGraph:
+        """Update a previously built graph in place with the current user library
+
+        Only the new seed entities and the changed ones are fetched, with their
+        neighbors, and the entities no longer in the library are removed, with
+        the crawled nodes no longer connected to any seed. A playlist changed
+        when its snapshot id differs from the one stored in the graph, or when
+        one of them is unknown. The other entity types are not versioned, so the
+        ones already in the graph are kept as they are.
+
+        Args:
+            graph (MusicGraph): the graph to refresh, e.g. from MusicGraph.read
+            user_info (UserInfo): the current user info
+
+        Returns:
+            MusicGraph: the refreshed graph
+        """
+        mode: GraphBuildingModeEnum = self.graph_building_mode
+        get_entities, get_neighbors, batch_size = self._mode_fetchers()
+        current_ids: List[str] = list(getattr(user_info, SEED_FIELDS[mode]))
+        previous: Dict[Hashable, Optional[str]] = graph.seed_versions
+        current: Set[str] = set(current_ids)
+        removed: List[Hashable] = [_id for _id in previous if _id not in current]
+        changed: List[str] = []
+        if mode == GraphBuildingModeEnum.PLAYLIST:
+            known: List[str] = [_id for _id in current_ids if _id in previous]
+            versions = self._playlist_versions(known, user_info)
+            changed = [
+                _id
+                for _id, version in zip(known, versions)
+                if version is None or version != previous[_id]
+            ]
+        added: List[str] = [_id for _id in current_ids if _id not in previous]
+        for entity_id in removed + changed:
+            graph.remove_node(entity_id)
+            del graph.seed_versions[entity_id]
+        logger.info(
+            f"Refreshing graph: {len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed, {len(current_ids) - len(added) - len(changed)} "
+            "unchanged"
+        )
+        self._add_nodes(graph, changed + added, get_entities, get_neighbors, batch_size)
+        pruned: List[Hashable] = graph.remove_unreachable(current_ids)
+        if pruned:
+            logger.info(f"Pruned {len(pruned)} nodes no longer reachable from a seed")
         return graph
 
+    def refresh_graph_and_write(self, user_id: str, path: str) -> MusicGraph:
+        """Refresh the graph written at path, or build it when missing, and write it"""
+        user_info: UserInfo = self.client.get_user_info(user_id=user_id)
+        graph: MusicGraph = (
+            MusicGraph.read(path) if os.path.exists(path) else MusicGraph()
+        )
+        graph = self.refresh_graph(graph, user_info)
+        graph.write(path)
+        return graph
+
+    def _playlist_versions(
+        self, playlist_ids: List[str], user_info: UserInfo
+    ) -> List[Optional[str]]:
+        # The snapshot ids come with the user playlists, the missing ones are
+        # fetched alone when the client can, which is much lighter than the tracks
+        get_snapshot_id: Optional[Callable[[str], str]] = getattr(
+            self.client, "get_playlist_snapshot_id", None
+        )
+
+        def version(playlist_id: str) -> Optional[str]:
+            snapshot_id: Optional[str] = user_info.playlist_snapshots.get(playlist_id)
+            if snapshot_id is None and get_snapshot_id is not None:
+                snapshot_id = get_snapshot_id(playlist_id)
+            return snapshot_id
+
+        return list(self._map(version, playlist_ids))
+
+    def _mode_fetchers(
+        self,
+    ) -> Tuple[Callable[[List[str]], List[BaseData]], Callable[[str], List[str]], int]:
+        if self.graph_building_mode == GraphBuildingModeEnum.ARTIST:
+            return (
+                self.client.get_artists,
+                self.client.get_artist_neighbors,
+                self._lookup_size("get_artists"),
+            )
+        elif self.graph_building_mode == GraphBuildingModeEnum.PLAYLIST:
+            return (
+                lambda ids: [self.client.get_playlist(_id) for _id in ids],
+                self._playlist_neighbors,
+                1,
+            )
+        elif self.graph_building_mode == GraphBuildingModeEnum.TRACK:
+            return (
+                self.client.get_tracks,
+                self.client.get_track_neighbors,
+                self._lookup_size("get_tracks"),
+            )
+        else:
+            raise NotImplementedError(
+                f"{self.graph_building_mode.value} graphs are not supported"
+            )
+
+    def _lookup_size(self, method: str) -> int:
+        # A batch is one api call, per-id clients get batches of one id
+        return max(1, min(self.batch_size, self.client.ids_per_call(method)))
+
+    def _playlist_neighbors(self, playlist_id: str) -> List[str]:
+        # Neither spotify nor tidal provide similar playlists, the playlists of
+        # their graphs have no neighbors
+        try:
+            return self.client.get_playlist_neighbors(playlist_id)
+        except NotImplementedError:
+            return []
+
+    @staticmethod
+    def neighbor_ids(
+        data: BaseData, get_neighbors: Callable[[str], List[str]]
+    ) -> List[str]:
+        """Neighbors of an entity, requested only when its relation field is unknown"""
+        neighbor_ids: Optional[List[str]] = relation_neighbor_ids(data)
+        return get_neighbors(data.data_id) if neighbor_ids is None else neighbor_ids
+
+    @staticmethod
+    def make_node(
+        data: BaseData, neighbor_ids: Iterable[str], value: float = 1.0
+    ) -> GraphNode:
+        return GraphNode(
+            id=data.data_id,
+            object=data,
+            neighbor_ids=[
+                NeighborData(id=n, edge_weight=1.0, edge_cap=1.0) for n in neighbor_ids
+            ],
+            value=value,
+        )
+
+
+def crawl_worker(
+    queue_path: str,
+    client_factory: Callable[[], AbstractStreamingAPIClient],
+    mode: str,
+    claim_size: int = 8,
+    poll_interval: float = 0.01,
+) -> None:
+    """Fetch the ids of a SQLiteWorkQueue until the queue is closed
+
+    Each result is the zlib compressed json of the node, with every neighbor of
+    the entity, as read by GeneralFetcher.enhance_with_processes.
+
+    Args:
+        queue_path (str): the queue database
+        client_factory (Callable): builds the client used by the worker
+        mode (str): the value of the GraphBuildingModeEnum of the crawl
+        claim_size (int): number of ids claimed at once
+        poll_interval (float): seconds between two polls of an empty queue
+    """
+    queue: SQLiteWorkQueue = SQLiteWorkQueue(queue_path)
+    fetcher = GeneralFetcher(client_factory(), GraphBuildingModeEnum(mode))
+    get_entities, get_neighbors, batch_size = fetcher._mode_fetchers()
+    name: str = f"{socket.gethostname()}:{os.getpid()}"
+    while not queue.is_closed():
+        ids: List[str] = queue.claim(name, claim_size)
+        if not ids:
+            time.sleep(poll_interval)
+            continue
+        try:
+            raw_data: Dict[Hashable, BaseData] = {}
+            for batch in chunks(ids, batch_size):
+                for data in get_entities(batch):
+                    raw_data[data.data_id] = data
+            results: Dict[str, Optional[bytes]] = {_id: None for _id in ids}
+            for data_id, data in raw_data.items():
+                neighbor_ids = fetcher.neighbor_ids(data, get_neighbors)
+                node = fetcher.make_node(data, neighbor_ids)
+                payload: str = json.dumps(node_to_dict(node), separators=(",", ":"))
+                results[data_id] = zlib.compress(payload.encode("utf-8"))
+            queue.complete(name, results)
+        except Exception as error:
+            queue.fail(name, ids, repr(error))
+
 
 if __name__ == "__main__":
     import fire
@@ -129,6 +740,9 @@ if __name__ == "__main__":
         StreamingClientAPIClientBuilder,
     )
 
-    client, mode = StreamingClientAPIClientBuilder.from_env()
-    fetcher = GeneralFetcher(client=client, graSph_building_mode=mode)
+    concurrency: int = StreamingClientAPIClientBuilder.concurrency_from_env()
+    client, mode = StreamingClientAPIClientBuilder.from_env(concurrency=concurrency)
+    fetcher = GeneralFetcher(
+        client=client, graph_building_mode=mode, max_workers=concurrency
+    )
     fire.Fire(fetcher)
@@ -0,0 +1,140 @@
+import json
+import os
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from music_graph.datamodel.graph.graph import MusicGraph, node_from_dict, node_to_dict
+from music_graph.datamodel.graph.node import GraphNode
+
+
+class CrawlJournal:
+    def __init__(self, path: str, checkpoint_every: int = 1) -> None:
+        """Append-only journal of a graph crawl, to resume it after a failure
+
+        The first record holds the initial graph, with the parameters of the crawl
+        it was built for, each following record one crawl round: the nodes
+        fetched with their depth, the ids the client did not know and the number
+        of requests spent. Replaying the rounds in order rebuilds the graph, the
+        frontier and the visited set as they were, without any request. A record
+        torn by a crash is dropped when the journal is read. The initial graph is
+        written once complete, so the seeds fetched before a crash are lost.
+
+        Args:
+            path (str): the journal file, created on the first write
+            checkpoint_every (int): number of rounds buffered between two writes
+                to disk, 1 writes every round
+
+        Examples:
+            >>> import tempfile
+            >>> path = os.path.join(tempfile.mkdtemp(), "crawl.journal")
+            >>> journal = CrawlJournal(path)
+            >>> graph = MusicGraph(seed_versions={"a": None})
+            >>> journal.write_seeds(graph, crawl={"user_id": "alice"})
+            >>> journal.write_round([], missing=["b"], requests=1)
+            >>> CrawlJournal(path).read_seeds({"user_id": "alice"}).seed_versions
+            {'a': None}
+            >>> [record["missing"] for record in CrawlJournal(path).rounds()]
+            [['b']]
+            >>> CrawlJournal(path).read_seeds({"user_id": "bob"}) is None
+            True
+            >>> os.path.exists(path)
+            False
+        """
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._buffer: List[str] = []
+
+    def read_seeds(
+        self, crawl: Optional[Dict[str, Any]] = None
+    ) -> Optional[MusicGraph]:
+        """The initial graph of the crawl, None when the journal is empty
+
+        A journal written for other crawl parameters, e.g. by the crawl of another
+        user to the same output path, is removed rather than resumed.
+
+        Args:
+            crawl (Optional[Dict[str, Any]]): the json parameters of the crawl, as
+                given to write_seeds
+        """
+        records: Generator[Dict[str, Any], None, None] = self._records()
+        record: Optional[Dict[str, Any]] = next(records, None)
+        # Closes the file before it is removed
+        records.close()
+        if record is None:
+            return None
+        if record.get("crawl") != crawl:
+            logger.warning(f"Discarding {self.path}, the journal of another crawl")
+            self.remove()
+            return None
+        graph = MusicGraph(seed_versions=dict(record["seeds"]["seed_versions"]))
+        for node_dict in record["seeds"]["nodes"]:
+            graph.add_node(node_from_dict(node_dict))
+        return graph
+
+    def rounds(self) -> Iterator[Dict[str, Any]]:
+        """The crawl rounds written so far, with their nodes deserialized"""
+        records: Iterator[Dict[str, Any]] = self._records()
+        next(records, None)
+        for record in records:
+            record["nodes"] = [
+                (node_from_dict(node_dict), depth)
+                for node_dict, depth in record["nodes"]
+            ]
+            yield record
+
+    def write_seeds(
+        self, graph: MusicGraph, crawl: Optional[Dict[str, Any]] = None
+    ) -> None:
+        seeds: Dict[str, Any] = {
+            "nodes": [node_to_dict(node) for node in graph.raw_node.values()],
+            "seed_versions": list(graph.seed_versions.items()),
+        }
+        self._buffer.append(json.dumps({"seeds": seeds, "crawl": crawl}))
+        self.flush()
+
+    def write_round(
+        self, nodes: List[Tuple[GraphNode, int]], missing: List[str], requests: int
+    ) -> None:
+        record: Dict[str, Any] = {
+            "nodes": [(node_to_dict(node), depth) for node, depth in nodes],
+            "missing": missing,
+            "requests": requests,
+        }
+        self._buffer.append(json.dumps(record))
+        if len(self._buffer) >= self.checkpoint_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("".join(line + "\n" for line in self._buffer))
+            file.flush()
+            os.fsync(file.fileno())
+        self._buffer = []
+
+    def remove(self) -> None:
+        self._buffer = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _records(self) -> Generator[Dict[str, Any], None, None]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            offset: int = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record: Dict[str, Any] = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                yield record
+        if offset < os.path.getsize(self.path):
+            # Drop the torn record, so the next rounds are appended after a
+            # complete line
+            with open(self.path, "r+b") as file:
+                file.truncate(offset)
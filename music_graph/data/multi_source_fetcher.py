@@ -0,0 +1,91 @@
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Sequence, Union
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.abstract.fetcher import AbstractFetcher
+from music_graph.data.general_fetcher import GeneralFetcher, GraphBuildingModeEnum
+from music_graph.datamodel.graph.graph import MusicGraph
+
+# Put in the node queue by a source once its graph is built
+_DONE: object = object()
+
+
+class MultiSourceFetcher(AbstractFetcher):
+    def __init__(
+        self,
+        clients: Sequence[AbstractStreamingAPIClient],
+        graph_building_mode: GraphBuildingModeEnum,
+        **fetcher_kwargs: Any,
+    ) -> None:
+        """Fetcher building one MusicGraph from several streaming clients at once
+
+        Each client is driven by its own GeneralFetcher in a thread, and the nodes
+        are added to the graph as they arrive, resolving the entities shared by
+        the sources on the fly (see MusicGraph.resolve_id). The id of a shared
+        entity is the id of the first source to fetch it, the others are its
+        aliases.
+
+        Args:
+            clients (Sequence[AbstractStreamingAPIClient]): the clients of the
+                sources, e.g. a spotify and a tidal client
+            graph_building_mode (GraphBuildingModeEnum): the type of node of the graph
+            fetcher_kwargs: arguments of the GeneralFetcher of each client, e.g.
+                max_workers or crawl_budget
+        """
+        self.clients = clients
+        self.graph_building_mode = graph_building_mode
+        self.fetcher_kwargs = fetcher_kwargs
+
+    def fetch_graph(
+        self, user_id: Union[str, Sequence[str]], augment_graph: bool = True
+    ) -> MusicGraph:
+        """Build the merged graph of a user
+
+        Args:
+            user_id (Union[str, Sequence[str]]): the id of the user, or its id on
+                each source, in the order of the clients
+            augment_graph (bool): whether to crawl the neighbors of the user graph
+        """
+        user_ids: Sequence[str] = (
+            [user_id] * len(self.clients) if isinstance(user_id, str) else user_id
+        )
+        if len(user_ids) != len(self.clients):
+            raise ValueError(
+                f"Expected {len(self.clients)} user ids, got {len(user_ids)}"
+            )
+        nodes: "queue.Queue[Any]" = queue.Queue()
+        graph: MusicGraph = MusicGraph(resolve_sources=True)
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
+            futures: List[Future] = [
+                executor.submit(self._fetch_source, client, _id, augment_graph, nodes)
+                for client, _id in zip(self.clients, user_ids)
+            ]
+            pending: int = len(futures)
+            while pending:
+                node = nodes.get()
+                if node is _DONE:
+                    pending -= 1
+                else:
+                    graph.add_node(node)
+        for future in futures:
+            graph.seed_versions.update(future.result().seed_versions)
+        return graph
+
+    def _fetch_source(
+        self,
+        client: AbstractStreamingAPIClient,
+        user_id: str,
+        augment_graph: bool,
+        nodes: "queue.Queue[Any]",
+    ) -> MusicGraph:
+        fetcher = GeneralFetcher(
+            client,
+            self.graph_building_mode,
+            node_sink=nodes.put,
+            **self.fetcher_kwargs,
+        )
+        try:
+            return fetcher.fetch_graph(user_id, augment_graph=augment_graph)
+        finally:
+            nodes.put(_DONE)
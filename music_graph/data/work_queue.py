@@ -0,0 +1,188 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Status of the tasks, a task goes from pending to collected
+PENDING: int = 0
+CLAIMED: int = 1
+DONE: int = 2
+FAILED: int = 3
+COLLECTED: int = 4
+
+
+class SQLiteWorkQueue:
+    def __init__(
+        self,
+        path: str,
+        lease: float = 300.0,
+        timeout: float = 60.0,
+        journal_mode: str = "DELETE",
+    ) -> None:
+        """Work queue of entity ids shared by processes through a SQLite file
+
+        Workers claim the best prioritized pending ids, and store the result of
+        each id, which the coordinator collects. Every process opens its own
+        connection, so the file can be shared by several machines on a
+        filesystem with working locks, with the default rollback journal. The
+        coordinator resets the queue before starting a crawl, so that a file left
+        by a previous crawl can be reused.
+
+        A worker only stores the results of the ids it still holds the claim of:
+        once its lease expired and the id was claimed by another worker, or its
+        result collected, its late results are ignored.
+
+        Args:
+            path (str): the queue database file, created if missing
+            lease (float): seconds after which a claimed id whose worker did not
+                answer is given to another worker
+            timeout (float): seconds to wait for the lock of the database
+            journal_mode (str): the SQLite journal mode. "WAL" is faster, but its
+                shared memory index requires every process to run on one host
+
+        Examples:
+            >>> import os, tempfile
+            >>> queue = SQLiteWorkQueue(os.path.join(tempfile.mkdtemp(), "q.sqlite"))
+            >>> queue.put([("a", 0.5), ("b", 2.0), ("c", 1.0)])
+            >>> queue.claim("worker", 2)
+            ['b', 'c']
+            >>> queue.complete("worker", {"b": b"data", "c": None})
+            >>> queue.collect()
+            [('b', b'data', None), ('c', None, None)]
+            >>> queue.complete("worker", {"b": b"late"})
+            >>> queue.collect()
+            []
+            >>> queue.counts()
+            {'pending': 1, 'claimed': 0, 'done': 0, 'failed': 0, 'collected': 2}
+            >>> queue.close()
+            >>> queue.reset()
+            >>> queue.is_closed(), sum(queue.counts().values())
+            (False, 0)
+        """
+        self.path = path
+        self.lease = lease
+        self._connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._connection.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_tasks (
+                id TEXT PRIMARY KEY,
+                priority REAL NOT NULL,
+                status INTEGER NOT NULL,
+                worker TEXT,
+                claimed_at REAL,
+                result BLOB,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS crawl_tasks_status
+                ON crawl_tasks (status, priority);
+            CREATE TABLE IF NOT EXISTS crawl_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Taking the write lock first, so two workers never claim the same id
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._connection
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def reset(self) -> None:
+        """Remove the tasks and the closed flag of a previous crawl"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM crawl_tasks")
+            connection.execute("DELETE FROM crawl_meta")
+
+    def put(self, items: Iterable[Tuple[str, float]]) -> None:
+        """Add ids with their priority, the ids already queued are ignored"""
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO crawl_tasks (id, priority, status) "
+                f"VALUES (?, ?, {PENDING})",
+                items,
+            )
+
+    def claim(self, worker: str, size: int) -> List[str]:
+        """Claim up to size pending ids, the highest priorities first"""
+        now: float = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                f"UPDATE crawl_tasks SET status={PENDING}, worker=NULL "
+                f"WHERE status={CLAIMED} AND claimed_at < ?",
+                (now - self.lease,),
+            )
+            ids: List[str] = [
+                row[0]
+                for row in connection.execute(
+                    f"SELECT id FROM crawl_tasks WHERE status={PENDING} "
+                    "ORDER BY priority DESC, rowid LIMIT ?",
+                    (size,),
+                )
+            ]
+            connection.executemany(
+                f"UPDATE crawl_tasks SET status={CLAIMED}, worker=?, claimed_at=? "
+                "WHERE id=?",
+                [(worker, now, _id) for _id in ids],
+            )
+        return ids
+
+    def complete(self, worker: str, results: Dict[str, Optional[bytes]]) -> None:
+        """Store the results of the ids claimed by the worker, None without data"""
+        with self._transaction() as connection:
+            connection.executemany(
+                f"UPDATE crawl_tasks SET status={DONE}, result=? "
+                f"WHERE id=? AND status={CLAIMED} AND worker=?",
+                [(result, _id, worker) for _id, result in results.items()],
+            )
+
+    def fail(self, worker: str, ids: Iterable[str], error: str) -> None:
+        with self._transaction() as connection:
+            connection.executemany(
+                f"UPDATE crawl_tasks SET status={FAILED}, error=? "
+                f"WHERE id=? AND status={CLAIMED} AND worker=?",
+                [(error, _id, worker) for _id in ids],
+            )
+
+    def collect(self) -> List[Tuple[str, Optional[bytes], Optional[str]]]:
+        """The done and failed ids not collected yet, with their result or error"""
+        with self._transaction() as connection:
+            rows: List[Tuple[str, Optional[bytes], Optional[str]]] = list(
+                connection.execute(
+                    "SELECT id, result, error FROM crawl_tasks "
+                    f"WHERE status IN ({DONE}, {FAILED}) ORDER BY rowid"
+                )
+            )
+            connection.executemany(
+                f"UPDATE crawl_tasks SET status={COLLECTED}, result=NULL WHERE id=?",
+                [(row[0],) for row in rows],
+            )
+        return rows
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[int, int] = dict(
+            self._connection.execute(
+                "SELECT status, COUNT(*) FROM crawl_tasks GROUP BY status"
+            ).fetchall()
+        )
+        names: Tuple[str, ...] = ("pending", "claimed", "done", "failed", "collected")
+        return {name: counts.get(status, 0) for status, name in enumerate(names)}
+
+    def close(self) -> None:
+        """Tell the workers to stop once their current claim is done"""
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO crawl_meta VALUES ('closed', '1')"
+            )
+
+    def is_closed(self) -> bool:
+        row = self._connection.execute(
+            "SELECT value FROM crawl_meta WHERE key='closed'"
+        ).fetchone()
+        return row is not None
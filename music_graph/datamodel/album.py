@@ -32,6 +32,21 @@ class AlbumData:
             track_ids=[d["id"] for d in album_data["tracks"]["items"]],
         )
 
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the album from the output of to_dict"""
+        return cls(
+            id=data_dict["data_id"],
+            type=data_dict["type"],
+            uri=data_dict["uri"],
+            name=data_dict["name"],
+            href=data_dict["href"],
+            number_of_tracks=data_dict["number_of_tracks"],
+            artist_ids=data_dict["artist_ids"],
+            genres=data_dict["genres"],
+            track_ids=data_dict["track_ids"],
+        )
+
     def to_dict(self) -> Dict:
         return {
             "data_id": self.data_id,
@@ -1,9 +1,11 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+from music_graph.datamodel.lazy import LazyFieldsMixin
 
-@dataclass()
-class ArtistData:
+
+@dataclass(repr=False, eq=False)
+class ArtistData(LazyFieldsMixin):
     id: str
     album_ids: List[str]
     follower_num: int
@@ -47,6 +49,23 @@ class ArtistData:
             else [t["id"] for t in top_tracks["tracks"]],
         )
 
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the artist from the output of to_dict"""
+        return cls(
+            id=data_dict["data_id"],
+            popularity=data_dict["popularity"],
+            uri=data_dict["uri"],
+            name=data_dict["name"],
+            href=data_dict["href"],
+            follower_href=data_dict["follower_href"],
+            follower_num=data_dict["follower_num"],
+            album_ids=data_dict["album_ids"],
+            genres=data_dict["genres"],
+            similar_artist_ids=data_dict["similar_artist_ids"],
+            top_track_ids=data_dict["top_track_ids"],
+        )
+
     def to_dict(self) -> Dict:
         return {
             "data_id": self.data_id,
@@ -55,6 +74,7 @@ class ArtistData:
             "name": self.name,
             "href": self.href,
             "follower_num": self.follower_num,
+            "follower_href": self.follower_href,
             "album_ids": self.album_ids,
             "genres": self.genres,
             "similar_artist_ids": self.similar_artist_ids,
@@ -1,5 +1,9 @@
+import marshal
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 @dataclass()
@@ -185,32 +189,34 @@ class AudioAnalysis:
 
     @classmethod
     def from_dict(cls, data_dict: Dict):
+        """Build the analysis from the spotify payload or from the output of to_dict"""
+        track_dict: Dict = data_dict.get("track", data_dict)
         return cls(
-            num_samples=data_dict["track"]["num_samples"],
-            duration=data_dict["track"]["duration"],
-            channels=data_dict["track"].get("channels"),
-            loudness=data_dict["track"]["loudness"],
-            tempo=data_dict["track"]["tempo"],
-            tempo_confidence=data_dict["track"]["tempo_confidence"],
-            time_signature=data_dict["track"]["time_signature"],
-            time_signature_confidence=data_dict["track"]["time_signature_confidence"],
-            key=data_dict["track"]["key"],
-            key_confidence=data_dict["track"]["key_confidence"],
-            mode=data_dict["track"]["mode"],
-            mode_confidence=data_dict["track"]["mode_confidence"],
-            codestring=data_dict["track"]["codestring"],
-            code_version=data_dict["track"]["code_version"],
-            echoprintstring=data_dict["track"]["echoprintstring"],
-            echoprint_version=data_dict["track"]["echoprint_version"],
-            synchstring=data_dict["track"]["synchstring"],
-            synch_version=data_dict["track"]["synch_version"],
-            rhythmstring=data_dict["track"]["rhythmstring"],
-            rhythm_version=data_dict["track"]["rhythm_version"],
+            num_samples=track_dict["num_samples"],
+            duration=track_dict["duration"],
+            channels=track_dict.get("channels"),
+            loudness=track_dict["loudness"],
+            tempo=track_dict["tempo"],
+            tempo_confidence=track_dict["tempo_confidence"],
+            time_signature=track_dict["time_signature"],
+            time_signature_confidence=track_dict["time_signature_confidence"],
+            key=track_dict["key"],
+            key_confidence=track_dict["key_confidence"],
+            mode=track_dict["mode"],
+            mode_confidence=track_dict["mode_confidence"],
+            codestring=track_dict["codestring"],
+            code_version=track_dict["code_version"],
+            echoprintstring=track_dict["echoprintstring"],
+            echoprint_version=track_dict["echoprint_version"],
+            synchstring=track_dict["synchstring"],
+            synch_version=track_dict["synch_version"],
+            rhythmstring=track_dict["rhythmstring"],
+            rhythm_version=track_dict["rhythm_version"],
             bars=[Bar.from_dict(bar) for bar in data_dict["bars"]],
             sections=[Section.from_dict(sec) for sec in data_dict["sections"]],
             segments=[Segment.from_dict(seg) for seg in data_dict["segments"]],
             tatums=[Tatum.from_dict(tatum) for tatum in data_dict["tatums"]],
-            metadata=data_dict.get("meta", {}),
+            metadata=data_dict.get("meta", data_dict.get("metadata", {})),
         )
 
     def to_dict(self) -> Dict:
@@ -241,3 +247,176 @@ class AudioAnalysis:
             "tatums": [tat.to_dict() for tat in self.tatums],
             "metadata": self.metadata,
         }
+
+
+class CompressedAudioAnalysis:
+    """Audio analysis kept as its compressed payload until first used
+
+    The payload is decoded, to an AudioAnalysis or a ColumnarAudioAnalysis, on
+    the first access to an attribute of the analysis, and the decoded analysis
+    is kept. to_dict decodes without keeping it. Concurrent first accesses can
+    decode twice, the results being equal.
+
+    The payload is marshaled, much faster than json, so the bytes are only
+    readable by the same python version. Use to_dict, or the codec which writes
+    the payload, to persist the analysis.
+
+    Examples:
+        >>> payload = {"track": {"tempo": 120.0}, "bars": []}
+        >>> analysis = CompressedAudioAnalysis.from_dict(payload)
+        >>> analysis.is_decoded()
+        False
+        >>> analysis.payload() == payload
+        True
+        >>> CompressedAudioAnalysis(analysis.compress()).payload() == payload
+        True
+    """
+
+    __slots__ = ("columnar", "level", "_compressed", "_payload", "_decoded")
+
+    def __init__(
+        self,
+        compressed: Optional[bytes] = None,
+        columnar: bool = False,
+        payload: Optional[Dict] = None,
+        level: int = 1,
+    ) -> None:
+        """Handle of a compressed payload, or of a payload to compress
+
+        Args:
+            compressed (Optional[bytes]): the compressed payload
+            columnar (bool): whether to decode to a ColumnarAudioAnalysis
+            payload (Optional[Dict]): the payload, kept until compress is called
+                when compressed is None
+            level (int): the zlib level of the compression
+        """
+        if compressed is None and payload is None:
+            raise ValueError("Expected the compressed payload or the payload")
+        self.columnar = columnar
+        self.level = level
+        self._compressed: Optional[bytes] = compressed
+        self._payload: Optional[Dict] = None if compressed is not None else payload
+        self._decoded: Optional[Any] = None
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict, columnar: bool = False, level: int = 1):
+        """Compress a spotify payload, or the output of to_dict, in the background
+
+        The compression takes several times the parsing of the payload, so it
+        runs in a background thread, zlib releasing the gil, and the payload is
+        kept as is until then. Once MAX_PENDING_COMPRESSIONS payloads wait for
+        the thread, the payload is compressed now, so that the kept payloads
+        stay bounded when they are built faster than they are compressed.
+        """
+        analysis = cls(columnar=columnar, payload=data_dict, level=level)
+        if _PENDING_COMPRESSIONS.acquire(blocking=False):
+            _compressor().submit(_compress_pending, analysis)
+        else:
+            analysis.compress()
+        return analysis
+
+    @property
+    def compressed(self) -> bytes:
+        return self.compress()
+
+    def compress(self) -> bytes:
+        """The compressed payload, compressing it now when still pending"""
+        payload: Optional[Dict] = self._payload
+        if payload is not None:
+            # Set before the payload is dropped, for the concurrent readers
+            self._compressed = zlib.compress(marshal.dumps(payload), self.level)
+            self._payload = None
+        return self._compressed
+
+    def payload(self) -> Dict:
+        payload: Optional[Dict] = self._payload
+        if payload is not None:
+            return payload
+        return marshal.loads(zlib.decompress(self._compressed))  # nosec
+
+    def is_decoded(self) -> bool:
+        return self._decoded is not None
+
+    def decode(self):
+        """The decoded analysis, decoded once"""
+        if self._decoded is None:
+            self._decoded = parse_audio_analysis(self.payload(), self.columnar)
+        return self._decoded
+
+    def to_dict(self) -> Dict:
+        if self._decoded is not None:
+            return self._decoded.to_dict()
+        return parse_audio_analysis(self.payload(), self.columnar).to_dict()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for the attributes of the decoded analysis
+        if name.startswith("__") or name in self.__slots__:
+            raise AttributeError(name)
+        return getattr(self.decode(), name)
+
+    def __getstate__(self) -> Dict:
+        return {"compressed": self.compress(), "columnar": self.columnar}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CompressedAudioAnalysis):
+            return self.payload() == other.payload()
+        return self.decode() == other
+
+    def __repr__(self) -> str:
+        if self._payload is not None:
+            return "CompressedAudioAnalysis(pending compression)"
+        return f"CompressedAudioAnalysis({len(self._compressed)} bytes)"
+
+
+# Thread compressing the payloads of the CompressedAudioAnalysis built
+_COMPRESSOR: Optional[ThreadPoolExecutor] = None
+_COMPRESSOR_LOCK: threading.Lock = threading.Lock()
+# Number of payloads waiting for the thread, beyond which they are compressed
+# by the thread building them
+MAX_PENDING_COMPRESSIONS: int = 256
+_PENDING_COMPRESSIONS: threading.Semaphore = threading.Semaphore(
+    MAX_PENDING_COMPRESSIONS
+)
+
+
+def _compressor() -> ThreadPoolExecutor:
+    global _COMPRESSOR
+    with _COMPRESSOR_LOCK:
+        if _COMPRESSOR is None:
+            _COMPRESSOR = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="audio-analysis"
+            )
+        return _COMPRESSOR
+
+
+def _compress_pending(analysis: CompressedAudioAnalysis) -> None:
+    try:
+        analysis.compress()
+    finally:
+        _PENDING_COMPRESSIONS.release()
+
+
+def parse_audio_analysis(
+    data_dict: Dict, columnar: bool = False, compressed: bool = False
+):
+    """Analysis of a payload, in the requested representation
+
+    Args:
+        data_dict (Dict): the spotify payload, or the output of to_dict
+        columnar (bool): whether to build a ColumnarAudioAnalysis, which
+            requires numpy, rather than an AudioAnalysis
+        compressed (bool): whether to keep the payload compressed, decoding it
+            on first access, see CompressedAudioAnalysis
+    """
+    if compressed:
+        return CompressedAudioAnalysis.from_dict(data_dict, columnar=columnar)
+    if columnar:
+        from music_graph.datamodel.columnar_audio_analysis import (
+            ColumnarAudioAnalysis,
+        )
+
+        return ColumnarAudioAnalysis.from_dict(data_dict)
+    return AudioAnalysis.from_dict(data_dict)
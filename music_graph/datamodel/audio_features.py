@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Dict
 
 
 @dataclass()
@@ -17,3 +18,51 @@ class AudioFeatures:
     time_signature: int
     uri: str
     valence: float
+
+    @property
+    def data_id(self) -> str:
+        """The id of the track, the last part of its uri"""
+        return self.uri.rsplit(":", 1)[-1]
+
+    @classmethod
+    def from_spotify_dict(cls, features_data: Dict):
+        return cls.from_dict(features_data)
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the features from the spotify payload or from the output of to_dict"""
+        return cls(
+            acousticness=data_dict["acousticness"],
+            danceability=data_dict["danceability"],
+            duration_ms=data_dict["duration_ms"],
+            energy=data_dict["energy"],
+            instrumentalness=data_dict["instrumentalness"],
+            key=data_dict["key"],
+            liveness=data_dict["liveness"],
+            loudness=data_dict["loudness"],
+            mode=data_dict["mode"],
+            speechiness=data_dict["speechiness"],
+            tempo=data_dict["tempo"],
+            time_signature=data_dict["time_signature"],
+            uri=data_dict["uri"],
+            valence=data_dict["valence"],
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "data_id": self.data_id,
+            "acousticness": self.acousticness,
+            "danceability": self.danceability,
+            "duration_ms": self.duration_ms,
+            "energy": self.energy,
+            "instrumentalness": self.instrumentalness,
+            "key": self.key,
+            "liveness": self.liveness,
+            "loudness": self.loudness,
+            "mode": self.mode,
+            "speechiness": self.speechiness,
+            "tempo": self.tempo,
+            "time_signature": self.time_signature,
+            "uri": self.uri,
+            "valence": self.valence,
+        }
@@ -0,0 +1,344 @@
+import struct
+import sys
+from array import array
+from dataclasses import fields
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Type
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_analysis import (
+    AudioAnalysis,
+    Bar,
+    CompressedAudioAnalysis,
+    Section,
+    Segment,
+    Tatum,
+)
+from music_graph.datamodel.audio_features import AudioFeatures
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+from music_graph.datamodel.lazy import LazyFieldsMixin
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+try:
+    from music_graph.datamodel.columnar_audio_analysis import ColumnarAudioAnalysis
+except ImportError:  # numpy is the optional columnar extra
+    ColumnarAudioAnalysis = None
+
+MAGIC: bytes = b"MG"
+# Version of the layout and of the class codes, written in every encoded value
+SCHEMA_VERSION: int = 1
+
+# Code of each encoded class, never reuse nor renumber a code
+CODEC_CLASSES: Dict[int, Any] = {
+    1: TrackData,
+    2: ArtistData,
+    3: AlbumData,
+    4: PlaylistData,
+    5: UserInfo,
+    6: AudioAnalysis,
+    7: AudioFeatures,
+    8: GraphNode,
+    9: NeighborData,
+    10: Bar,
+    11: Section,
+    12: Segment,
+    13: Tatum,
+    14: CompressedAudioAnalysis,
+    15: ColumnarAudioAnalysis,
+}
+CLASS_CODES: Dict[Type, int] = {
+    cls: code for code, cls in CODEC_CLASSES.items() if cls is not None
+}
+
+# Tag byte preceding every value
+NONE, FALSE, TRUE, INT, FLOAT, STR, BYTES, LIST, DICT = range(9)
+STR_LIST, FLOAT_LIST, INT_LIST, OBJECT = range(9, 13)
+
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+UINT32 = struct.Struct("<I")
+# Sizes below are written on one byte, the others on five
+LONG_SIZE: int = 255
+
+_field_names: Dict[Type, Tuple[str, ...]] = {}
+
+
+def encode(value: Any) -> bytes:
+    """Encode a datamodel object, or any json-like value holding some
+
+    The objects are written as their class code followed by their field values,
+    in the order of the dataclass fields, and the lists of strings, floats or
+    ints as contiguous arrays. The lazy fields not loaded yet are written with
+    their unloaded value.
+
+    Examples:
+        >>> artist = ArtistData("a", [], 3, "", ["pop"], "", "A", 0.5, "", ["b"])
+        >>> decode(encode(artist)) == artist
+        True
+        >>> len(encode(artist)) < len(str(artist.to_dict()))
+        True
+    """
+    out = bytearray(MAGIC)
+    out.append(SCHEMA_VERSION)
+    _write(out, value)
+    return bytes(out)
+
+
+def decode(data: bytes) -> Any:
+    """Decode the output of encode, of this or of an older schema version"""
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not an encoded music_graph value")
+    version: int = data[len(MAGIC)]
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"Schema version {version} is newer than the supported {SCHEMA_VERSION}"
+        )
+    reader = _Reader(bytes(data), len(MAGIC) + 1)
+    return reader.read()
+
+
+def encode_batch(values: Iterable[Any]) -> bytes:
+    """Encode a list of objects, sharing one header and the class lookups"""
+    return encode(list(values))
+
+
+def decode_batch(data: bytes) -> List[Any]:
+    values: Any = decode(data)
+    if not isinstance(values, list):
+        raise ValueError("Not an encoded batch")
+    return values
+
+
+def _native_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _write_size(out: bytearray, size: int) -> None:
+    if size < LONG_SIZE:
+        out.append(size)
+    else:
+        out.append(LONG_SIZE)
+        out += UINT32.pack(size)
+
+
+def _write_none(out: bytearray, value: None) -> None:
+    out.append(NONE)
+
+
+def _write_bool(out: bytearray, value: bool) -> None:
+    out.append(TRUE if value else FALSE)
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    out.append(INT)
+    out += INT64.pack(value)
+
+
+def _write_float(out: bytearray, value: float) -> None:
+    out.append(FLOAT)
+    out += FLOAT64.pack(value)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    encoded: bytes = value.encode("utf-8")
+    out.append(STR)
+    _write_size(out, len(encoded))
+    out += encoded
+
+
+def _write_bytes(out: bytearray, value: bytes) -> None:
+    out.append(BYTES)
+    _write_size(out, len(value))
+    out += value
+
+
+def _write_list(out: bytearray, value: Sequence[Any]) -> None:
+    item_type: Any = type(value[0]) if value else None
+    if item_type in (str, float, int) and all(type(v) is item_type for v in value):
+        if item_type is str:
+            encoded: List[bytes] = [v.encode("utf-8") for v in value]
+            out.append(STR_LIST)
+            _write_size(out, len(encoded))
+            out += _native_bytes(array("I", map(len, encoded)))
+            out += b"".join(encoded)
+            return
+        if item_type is float:
+            out.append(FLOAT_LIST)
+            _write_size(out, len(value))
+            out += _native_bytes(array("d", value))
+            return
+        if -(2**63) <= min(value) and max(value) < 2**63:
+            out.append(INT_LIST)
+            _write_size(out, len(value))
+            out += _native_bytes(array("q", value))
+            return
+    out.append(LIST)
+    _write_size(out, len(value))
+    for item in value:
+        _write(out, item)
+
+
+def _write_dict(out: bytearray, value: Dict) -> None:
+    out.append(DICT)
+    _write_size(out, len(value))
+    for key, item in value.items():
+        _write(out, key)
+        _write(out, item)
+
+
+def _object_fields(value: Any) -> Sequence[Any]:
+    if isinstance(value, LazyFieldsMixin):
+        value = value.loaded_only()
+    if isinstance(value, CompressedAudioAnalysis):
+        # The payload rather than its marshaled bytes, only readable by the
+        # python version which wrote them
+        return value.payload(), value.columnar
+    if ColumnarAudioAnalysis is not None and isinstance(value, ColumnarAudioAnalysis):
+        return (value.to_dict(),)
+    names: Tuple[str, ...] = _field_names.get(type(value), ())
+    if not names:
+        names = _field_names[type(value)] = tuple(f.name for f in fields(value))
+    return [getattr(value, name) for name in names]
+
+
+def _write_object(out: bytearray, value: Any) -> None:
+    code: int = CLASS_CODES.get(type(value), 0)
+    if not code:
+        raise ValueError(f"No codec for {type(value).__name__} objects")
+    values: Sequence[Any] = _object_fields(value)
+    out.append(OBJECT)
+    out.append(code)
+    out.append(len(values))
+    for item in values:
+        _write(out, item)
+
+
+WRITERS: Dict[Type, Callable[[bytearray, Any], None]] = {
+    type(None): _write_none,
+    bool: _write_bool,
+    int: _write_int,
+    float: _write_float,
+    str: _write_str,
+    bytes: _write_bytes,
+    list: _write_list,
+    tuple: _write_list,
+    dict: _write_dict,
+}
+
+
+def _write(out: bytearray, value: Any) -> None:
+    WRITERS.get(type(value), _write_object)(out, value)
+
+
+def _build_object(code: int, values: List[Any]) -> Any:
+    cls: Any = CODEC_CLASSES.get(code)
+    if code == 15 and cls is None:
+        raise ImportError("Decoding a ColumnarAudioAnalysis requires numpy")
+    if cls is None:
+        raise ValueError(f"Unknown class code {code}")
+    if cls is ColumnarAudioAnalysis:
+        return cls.from_dict(values[0])
+    if cls is CompressedAudioAnalysis:
+        return cls.from_dict(values[0], columnar=values[1])
+    # The fields added by a later schema version have a default value
+    return cls(*values)
+
+
+class _Reader:
+    def __init__(self, data: bytes, position: int) -> None:
+        self.data = data
+        self.position = position
+        self.readers: Dict[int, Callable[[], Any]] = {
+            NONE: lambda: None,
+            FALSE: lambda: False,
+            TRUE: lambda: True,
+            INT: self._int,
+            FLOAT: self._float,
+            STR: self._str,
+            BYTES: self._bytes,
+            LIST: self._list,
+            DICT: self._dict,
+            STR_LIST: self._str_list,
+            FLOAT_LIST: lambda: self._array("d"),
+            INT_LIST: lambda: self._array("q"),
+            OBJECT: self._object,
+        }
+
+    def read(self) -> Any:
+        data: bytes = self.data
+        position: int = self.position
+        tag: int = data[position]
+        # Short strings and scalars, most of the values, are read inline
+        if tag == STR and data[position + 1] < LONG_SIZE:
+            end: int = position + 2 + data[position + 1]
+            self.position = end
+            return data[position + 2 : end].decode("utf-8")
+        if tag == NONE:
+            self.position = position + 1
+            return None
+        self.position = position + 1
+        return self.readers[tag]()
+
+    def _size(self) -> int:
+        size: int = self.data[self.position]
+        self.position += 1
+        if size == LONG_SIZE:
+            size = UINT32.unpack_from(self.data, self.position)[0]
+            self.position += UINT32.size
+        return size
+
+    def _take(self, size: int) -> bytes:
+        start: int = self.position
+        self.position += size
+        return self.data[start : self.position]
+
+    def _int(self) -> int:
+        self.position += INT64.size
+        return INT64.unpack_from(self.data, self.position - INT64.size)[0]
+
+    def _float(self) -> float:
+        self.position += FLOAT64.size
+        return FLOAT64.unpack_from(self.data, self.position - FLOAT64.size)[0]
+
+    def _str(self) -> str:
+        return self._take(self._size()).decode("utf-8")
+
+    def _bytes(self) -> bytes:
+        return self._take(self._size())
+
+    def _list(self) -> List[Any]:
+        return [self.read() for _ in range(self._size())]
+
+    def _dict(self) -> Dict:
+        return {self.read(): self.read() for _ in range(self._size())}
+
+    def _array(self, typecode: str) -> List[Any]:
+        values = array(typecode)
+        values.frombytes(self._take(self._size() * values.itemsize))
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values.tolist()
+
+    def _str_list(self) -> List[str]:
+        lengths: List[int] = self._array("I")
+        offsets: List[int] = [0, *accumulate(lengths)]
+        encoded: bytes = self._take(offsets[-1])
+        text: str = encoded.decode("utf-8")
+        if len(text) == len(encoded):
+            # Ascii, e.g. the ids, the byte offsets are the string offsets
+            return [text[offsets[i] : offsets[i + 1]] for i in range(len(lengths))]
+        return [
+            encoded[offsets[i] : offsets[i + 1]].decode("utf-8")
+            for i in range(len(lengths))
+        ]
+
+    def _object(self) -> Any:
+        code: int = self.data[self.position]
+        count: int = self.data[self.position + 1]
+        self.position += 2
+        return _build_object(code, [self.read() for _ in range(count)])
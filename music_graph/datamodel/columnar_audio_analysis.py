@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from music_graph.datamodel.audio_analysis import (
+    AudioAnalysis,
+    Bar,
+    Section,
+    Segment,
+    Tatum,
+)
+
+INTERVAL_DTYPE = np.dtype(
+    [("start", np.float64), ("duration", np.float64), ("confidence", np.float64)]
+)
+SECTION_DTYPE = np.dtype(
+    [
+        ("start", np.float64),
+        ("duration", np.float64),
+        ("confidence", np.float64),
+        ("loudness", np.float64),
+        ("tempo", np.float64),
+        ("tempo_confidence", np.float64),
+        ("key", np.int32),
+        ("key_confidence", np.float64),
+        ("mode", np.int32),
+        ("mode_confidence", np.float64),
+        ("time_signature", np.int32),
+        ("time_signature_confidence", np.float64),
+    ]
+)
+SEGMENT_DTYPE = np.dtype(
+    [
+        ("start", np.float64),
+        ("duration", np.float64),
+        ("confidence", np.float64),
+        ("loudness_start", np.float64),
+        ("loudness_max", np.float64),
+        ("loudness_max_time", np.float64),
+        ("loudness_end", np.float64),
+        ("pitches", np.float32, (12,)),
+        ("timbre", np.float32, (12,)),
+    ]
+)
+
+
+def records_to_array(records: Sequence[Dict], dtype: np.dtype) -> np.ndarray:
+    """Structured array of a list of dicts, filled one column at a time
+
+    Examples:
+        >>> array = records_to_array(
+        ...     [{"start": 0.0, "duration": 1.5, "confidence": 0.2}], INTERVAL_DTYPE
+        ... )
+        >>> array["duration"]
+        array([1.5])
+    """
+    array: np.ndarray = np.empty(len(records), dtype=dtype)
+    for name in dtype.names:
+        if dtype[name].shape:
+            array[name] = [record[name] for record in records]
+        else:
+            array[name] = np.fromiter(
+                (record[name] for record in records), dtype[name], len(records)
+            )
+    return array
+
+
+def array_to_records(array: np.ndarray) -> List[Dict]:
+    """List of dicts of a structured array, with python values"""
+    names: Sequence[str] = array.dtype.names
+    columns: List[List[Any]] = [array[name].tolist() for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+@dataclass(eq=False)
+class ColumnarAudioAnalysis:
+    """Audio analysis holding its bars, sections, segments and tatums as arrays
+
+    The intervals are numpy structured arrays, with the fields of Bar, Section,
+    Segment and Tatum, e.g. analysis.segments["loudness_max"] is the loudness of
+    every segment. The segment pitches and timbre are (N, 12) float32 matrices,
+    so they are rounded to float32 by from_dict. Requires numpy, the columnar
+    extra.
+
+    Examples:
+        >>> analysis = ColumnarAudioAnalysis.from_dict(
+        ...     {
+        ...         "track": {"num_samples": 1, "duration": 1.0, "loudness": -5.0,
+        ...             "tempo": 120.0, "tempo_confidence": 1.0, "time_signature": 4,
+        ...             "time_signature_confidence": 1.0, "key": 0,
+        ...             "key_confidence": 1.0, "mode": 1, "mode_confidence": 1.0},
+        ...         "bars": [], "sections": [], "tatums": [],
+        ...         "segments": [
+        ...             {"start": 0.0, "duration": 1.0, "confidence": 1.0,
+        ...              "loudness_start": -9.0, "loudness_max": -3.0,
+        ...              "loudness_max_time": 0.5, "loudness_end": -9.0,
+        ...              "pitches": [0.5] * 12, "timbre": [1.0] * 12},
+        ...         ],
+        ...     }
+        ... )
+        >>> analysis.segments["pitches"].shape, analysis.segments["pitches"].dtype
+        ((1, 12), dtype('float32'))
+        >>> analysis.to_audio_analysis().segments[0].loudness_max
+        -3.0
+    """
+
+    num_samples: int
+    duration: float
+    channels: Optional[int]
+    loudness: float
+    tempo: float
+    tempo_confidence: float
+    time_signature: int
+    time_signature_confidence: float
+    key: int
+    key_confidence: float
+    mode: int
+    mode_confidence: float
+    codestring: Optional[str] = None
+    code_version: Optional[int] = None
+    echoprintstring: Optional[str] = None
+    echoprint_version: Optional[int] = None
+    synchstring: Optional[str] = None
+    synch_version: Optional[int] = None
+    rhythmstring: Optional[str] = None
+    rhythm_version: Optional[int] = None
+    bars: np.ndarray = field(default_factory=lambda: np.empty(0, INTERVAL_DTYPE))
+    sections: np.ndarray = field(default_factory=lambda: np.empty(0, SECTION_DTYPE))
+    segments: np.ndarray = field(default_factory=lambda: np.empty(0, SEGMENT_DTYPE))
+    tatums: np.ndarray = field(default_factory=lambda: np.empty(0, INTERVAL_DTYPE))
+    metadata: Dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the analysis from the spotify payload or from the output of to_dict"""
+        track_dict: Dict = data_dict.get("track", data_dict)
+        return cls(
+            num_samples=track_dict["num_samples"],
+            duration=track_dict["duration"],
+            channels=track_dict.get("channels"),
+            loudness=track_dict["loudness"],
+            tempo=track_dict["tempo"],
+            tempo_confidence=track_dict["tempo_confidence"],
+            time_signature=track_dict["time_signature"],
+            time_signature_confidence=track_dict["time_signature_confidence"],
+            key=track_dict["key"],
+            key_confidence=track_dict["key_confidence"],
+            mode=track_dict["mode"],
+            mode_confidence=track_dict["mode_confidence"],
+            codestring=track_dict.get("codestring"),
+            code_version=track_dict.get("code_version"),
+            echoprintstring=track_dict.get("echoprintstring"),
+            echoprint_version=track_dict.get("echoprint_version"),
+            synchstring=track_dict.get("synchstring"),
+            synch_version=track_dict.get("synch_version"),
+            rhythmstring=track_dict.get("rhythmstring"),
+            rhythm_version=track_dict.get("rhythm_version"),
+            bars=records_to_array(data_dict["bars"], INTERVAL_DTYPE),
+            sections=records_to_array(data_dict["sections"], SECTION_DTYPE),
+            segments=records_to_array(data_dict["segments"], SEGMENT_DTYPE),
+            tatums=records_to_array(data_dict["tatums"], INTERVAL_DTYPE),
+            metadata=data_dict.get("meta", data_dict.get("metadata", {})),
+        )
+
+    @classmethod
+    def from_audio_analysis(cls, analysis: AudioAnalysis):
+        return cls.from_dict(analysis.to_dict())
+
+    def to_dict(self) -> Dict:
+        """Same output as AudioAnalysis.to_dict"""
+        data_dict: Dict = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name not in ("bars", "sections", "segments", "tatums")
+        }
+        data_dict.update(
+            bars=array_to_records(self.bars),
+            sections=array_to_records(self.sections),
+            segments=array_to_records(self.segments),
+            tatums=array_to_records(self.tatums),
+        )
+        return data_dict
+
+    def to_audio_analysis(self) -> AudioAnalysis:
+        """The analysis with one object per interval"""
+        data_dict: Dict = self.to_dict()
+        return AudioAnalysis(
+            **{
+                **data_dict,
+                "bars": [Bar(**bar) for bar in data_dict["bars"]],
+                "sections": [Section(**section) for section in data_dict["sections"]],
+                "segments": [Segment(**segment) for segment in data_dict["segments"]],
+                "tatums": [Tatum(**tatum) for tatum in data_dict["tatums"]],
+            }
+        )
@@ -0,0 +1,304 @@
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, Optional, Tuple, Type
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_analysis import AudioAnalysis
+from music_graph.datamodel.base_data import BaseData
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+from music_graph.datamodel.lazy import LazyFieldsMixin
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+
+def intern_id(entity_id: Optional[str]) -> Optional[str]:
+    """The interned id, so that every reference to an entity shares one string
+
+    Examples:
+        >>> a, b = "".join(["artist", "0"]), "".join(["artist", "0"])
+        >>> a is b, intern_id(a) is intern_id(b)
+        (False, True)
+    """
+    return None if entity_id is None else sys.intern(entity_id)
+
+
+def _is_id_field(name: str) -> bool:
+    return name == "id" or name.endswith("_id") or name.endswith("_ids")
+
+
+def _compact_value(name: str, value: Any) -> Any:
+    if isinstance(value, list):
+        if _is_id_field(name):
+            return tuple(intern_id(v) for v in value)
+        return tuple(value)
+    if isinstance(value, dict):
+        return {intern_id(k): v for k, v in value.items()}
+    if isinstance(value, str) and _is_id_field(name):
+        return intern_id(value)
+    return value
+
+
+def _expand_value(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class CompactData:
+    """Slotted, read-only by convention, copy of a datamodel object
+
+    The compact classes have the fields of their data_class, with the lists as
+    tuples and the ids interned. Their objects have no __dict__, and the ids
+    shared by many objects, e.g. the similar artists, are stored once. The lazy
+    fields not loaded yet are compacted with their unloaded value.
+    """
+
+    __slots__ = ()
+    data_class: ClassVar[Type]
+
+    @classmethod
+    def from_data(cls, data: Any):
+        if isinstance(data, LazyFieldsMixin):
+            data = data.loaded_only()
+        values: Dict[str, Any] = {
+            f.name: _compact_value(f.name, getattr(data, f.name)) for f in fields(cls)
+        }
+        return cls(**values)
+
+    def to_data(self) -> Any:
+        """The datamodel object, with lists"""
+        return self.data_class(
+            **{f.name: _expand_value(getattr(self, f.name)) for f in fields(self)}
+        )
+
+    @property
+    def data_id(self) -> str:
+        return getattr(self, "id")
+
+    def to_dict(self) -> Dict:
+        return self.to_data().to_dict()
+
+
+@dataclass()
+class CompactArtistData(CompactData):
+    __slots__ = (
+        "id",
+        "album_ids",
+        "follower_num",
+        "follower_href",
+        "genres",
+        "href",
+        "name",
+        "popularity",
+        "uri",
+        "similar_artist_ids",
+        "top_track_ids",
+    )
+    data_class: ClassVar[Type] = ArtistData
+
+    id: str
+    album_ids: Tuple[str, ...]
+    follower_num: int
+    follower_href: str
+    genres: Tuple[str, ...]
+    href: str
+    name: str
+    popularity: float
+    uri: str
+    similar_artist_ids: Tuple[str, ...]
+    top_track_ids: Tuple[str, ...]
+
+
+@dataclass()
+class CompactTrackData(CompactData):
+    __slots__ = (
+        "id",
+        "album_id",
+        "artist_ids",
+        "duration",
+        "api_href",
+        "linked_track_ids",
+        "uri",
+        "track_number",
+        "name",
+        "popularity",
+        "preview_url",
+        "track_playlist_ids",
+        "audio_analysis",
+    )
+    data_class: ClassVar[Type] = TrackData
+
+    id: str
+    album_id: str
+    artist_ids: Tuple[str, ...]
+    duration: int
+    api_href: str
+    linked_track_ids: Tuple[str, ...]
+    uri: str
+    track_number: int
+    name: str
+    popularity: Optional[float]
+    preview_url: Optional[str]
+    track_playlist_ids: Tuple[str, ...]
+    audio_analysis: Optional[AudioAnalysis]
+
+
+@dataclass()
+class CompactAlbumData(CompactData):
+    __slots__ = (
+        "id",
+        "type",
+        "artist_ids",
+        "genres",
+        "href",
+        "name",
+        "uri",
+        "number_of_tracks",
+        "track_ids",
+    )
+    data_class: ClassVar[Type] = AlbumData
+
+    id: str
+    type: str
+    artist_ids: Tuple[str, ...]
+    genres: Tuple[str, ...]
+    href: str
+    name: str
+    uri: str
+    number_of_tracks: int
+    track_ids: Tuple[str, ...]
+
+
+@dataclass()
+class CompactPlaylistData(CompactData):
+    __slots__ = (
+        "id",
+        "follower_number",
+        "name",
+        "uri",
+        "description",
+        "duration",
+        "track_ids",
+        "snapshot_id",
+    )
+    data_class: ClassVar[Type] = PlaylistData
+
+    id: str
+    follower_number: int
+    name: str
+    uri: str
+    description: str
+    duration: float
+    track_ids: Tuple[str, ...]
+    snapshot_id: Optional[str]
+
+
+@dataclass()
+class CompactUserInfo(CompactData):
+    __slots__ = (
+        "id",
+        "display_name",
+        "href",
+        "uri",
+        "playlist_ids",
+        "artist_ids",
+        "top_track_ids",
+        "saved_track_ids",
+        "saved_album_ids",
+        "playlist_snapshots",
+    )
+    data_class: ClassVar[Type] = UserInfo
+
+    id: str
+    display_name: str
+    href: str
+    uri: str
+    playlist_ids: Tuple[str, ...]
+    artist_ids: Tuple[str, ...]
+    top_track_ids: Tuple[str, ...]
+    saved_track_ids: Tuple[str, ...]
+    saved_album_ids: Tuple[str, ...]
+    playlist_snapshots: Dict[str, str]
+
+
+# Compact class of each datamodel class
+COMPACT_CLASSES: Dict[Type, Type[CompactData]] = {
+    compact_class.data_class: compact_class
+    for compact_class in (
+        CompactAlbumData,
+        CompactArtistData,
+        CompactPlaylistData,
+        CompactTrackData,
+        CompactUserInfo,
+    )
+}
+
+
+@dataclass()
+class CompactNeighborData:
+    __slots__ = ("id", "edge_weight", "edge_cap")
+
+    id: str
+    edge_weight: Optional[float]
+    edge_cap: Optional[float]
+
+
+@dataclass()
+class CompactGraphNode:
+    __slots__ = ("id", "object", "neighbor_ids", "value")
+
+    id: str
+    object: Optional[BaseData]
+    neighbor_ids: Tuple[CompactNeighborData, ...]
+    value: Optional[float]
+
+    def to_node_dict(self, add_object_data: bool = False) -> Dict:
+        base_data: Dict = {"id": self.id, "value": self.value}
+        if add_object_data:
+            base_data.update(self.object.to_dict())
+        return base_data
+
+    def to_node(self) -> GraphNode:
+        data: Any = self.object
+        return GraphNode(
+            id=self.id,
+            object=data.to_data() if isinstance(data, CompactData) else data,
+            neighbor_ids=[
+                NeighborData(n.id, n.edge_weight, n.edge_cap) for n in self.neighbor_ids
+            ],
+            value=self.value,
+        )
+
+
+def compact_data(data: Any) -> Any:
+    """Compact copy of a datamodel object, the object itself if it has none"""
+    compact_class: Optional[Type[CompactData]] = COMPACT_CLASSES.get(type(data))
+    return data if compact_class is None else compact_class.from_data(data)
+
+
+def compact_node(node: Any) -> CompactGraphNode:
+    """Compact copy of a graph node, its object and its neighbors
+
+    Examples:
+        >>> artist = ArtistData("a", [], 0, "", [], "", "a", 0.0, "", ["b"])
+        >>> node = compact_node(GraphNode("a", artist, [NeighborData("b", 1.0)]))
+        >>> node.object.similar_artist_ids, hasattr(node, "__dict__")
+        (('b',), False)
+        >>> node.to_node() == GraphNode("a", artist, [NeighborData("b", 1.0)])
+        True
+    """
+    if isinstance(node, CompactGraphNode):
+        return node
+    return CompactGraphNode(
+        id=intern_id(node.id),
+        object=compact_data(node.object),
+        neighbor_ids=tuple(
+            CompactNeighborData(intern_id(n.id), n.edge_weight, n.edge_cap)
+            for n in node.neighbor_ids
+        ),
+        value=node.value,
+    )
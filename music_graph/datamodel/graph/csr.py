@@ -0,0 +1,292 @@
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import networkx as nx
+
+from music_graph.datamodel import codec
+from music_graph.datamodel.compact import CompactGraphNode
+from music_graph.datamodel.graph.id_registry import IdRegistry
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+
+MAGIC: bytes = b"MGCSR\x00"
+FORMAT_VERSION: int = 1
+
+# Sections of the file, in order, with the typecode of their array, "" for bytes
+SECTIONS: Tuple[Tuple[str, str], ...] = (
+    # Neighbors of node i: neighbors[offsets[i] : offsets[i + 1]], both ways
+    ("offsets", "q"),
+    ("neighbors", "i"),
+    # Attributes of each neighbor entry, nan for None
+    ("weights", "d"),
+    ("caps", "d"),
+    # Utf-8 id of node i: id_blob[id_offsets[i] : id_offsets[i + 1]]
+    ("id_offsets", "q"),
+    ("id_blob", ""),
+    # Node indices sorted by id, for the binary search of an id
+    ("sorted_ids", "i"),
+    # Codec encoded GraphNode of node i, empty when it was not fetched
+    ("payload_offsets", "q"),
+    ("payload_blob", ""),
+    # Indices of the fetched nodes, in the order they were added
+    ("fetched", "i"),
+    ("platform_codes", "b"),
+    ("kind_codes", "b"),
+    # Json of the seed versions, aliases and registry code names
+    ("metadata", ""),
+)
+# Magic, format version, then the offset and size in bytes of each section
+HEADER = struct.Struct(f"<6sH{2 * len(SECTIONS)}Q")
+ALIGNMENT: int = 8
+
+
+def _bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _optional(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def write_csr(
+    path: str,
+    graph: nx.Graph,
+    ids: IdRegistry,
+    nodes: Dict[Hashable, Any],
+    metadata: Dict[str, Any],
+) -> None:
+    """Write a graph as CSR adjacency arrays, an id table and node payloads
+
+    The nodes are numbered by their index in ids, which must hold every graph
+    node and every key of nodes. The ids are written as strings.
+
+    Args:
+        path (str): the file to write
+        graph (nx.Graph): the adjacency, with the weight and cap of the edges
+        ids (IdRegistry): the index of the nodes
+        nodes (Dict[Hashable, Any]): the fetched GraphNode of each node id
+        metadata (Dict[str, Any]): json serializable content, read back as is
+    """
+    n_nodes: int = len(ids)
+    rows: List[List[Tuple[int, float, float]]] = [[] for _ in range(n_nodes)]
+    index: Dict[Hashable, int] = ids.index
+    for node_id, adjacency in graph.adjacency():
+        row: List[Tuple[int, float, float]] = rows[index[node_id]]
+        for neighbor_id, attributes in adjacency.items():
+            row.append(
+                (
+                    index[neighbor_id],
+                    _optional(attributes.get("weight")),
+                    _optional(attributes.get("cap")),
+                )
+            )
+    offsets = array("q", [0])
+    neighbors = array("i")
+    weights = array("d")
+    caps = array("d")
+    for row in rows:
+        row.sort()
+        neighbors.extend(entry[0] for entry in row)
+        weights.extend(entry[1] for entry in row)
+        caps.extend(entry[2] for entry in row)
+        offsets.append(len(neighbors))
+
+    encoded_ids: List[bytes] = [str(node_id).encode("utf-8") for node_id in ids.ids]
+    id_offsets = array("q", [0])
+    payload_offsets = array("q", [0])
+    payloads: List[bytes] = []
+    for position, node_id in enumerate(ids.ids):
+        id_offsets.append(id_offsets[-1] + len(encoded_ids[position]))
+        node: Any = nodes.get(node_id)
+        if isinstance(node, CompactGraphNode):
+            node = node.to_node()
+        payloads.append(b"" if node is None else codec.encode(node))
+        payload_offsets.append(payload_offsets[-1] + len(payloads[-1]))
+    sorted_ids = array("i", sorted(range(n_nodes), key=encoded_ids.__getitem__))
+
+    content: Dict[str, bytes] = {
+        "offsets": _bytes(offsets),
+        "neighbors": _bytes(neighbors),
+        "weights": _bytes(weights),
+        "caps": _bytes(caps),
+        "id_offsets": _bytes(id_offsets),
+        "id_blob": b"".join(encoded_ids),
+        "sorted_ids": _bytes(sorted_ids),
+        "payload_offsets": _bytes(payload_offsets),
+        "payload_blob": b"".join(payloads),
+        "fetched": _bytes(array("i", [index[node_id] for node_id in nodes])),
+        "platform_codes": ids.platform_codes.tobytes(),
+        "kind_codes": ids.kind_codes.tobytes(),
+        "metadata": json.dumps(
+            {**metadata, "platforms": ids.platforms, "kinds": ids.kinds}
+        ).encode("utf-8"),
+    }
+    locations: List[int] = []
+    with open(path, "wb") as file:
+        file.write(bytes(HEADER.size))
+        for name, _ in SECTIONS:
+            # Aligned, so that the arrays can be cast from the mapped file
+            file.write(bytes(-file.tell() % ALIGNMENT))
+            locations.extend((file.tell(), len(content[name])))
+            file.write(content[name])
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, *locations))
+
+
+def is_csr_file(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class MappedGraph:
+    """Graph written by write_csr, served from the memory-mapped file
+
+    Opening reads the header only. The neighbor arrays are views of the mapped
+    pages, ids are found by binary search, and a node payload is decoded when
+    the node is requested, so a large graph is queried without being loaded,
+    and the processes mapping the same file share its pages.
+
+    Examples:
+        >>> from music_graph.datamodel.graph.graph import MusicGraph
+        >>> import os, tempfile
+        >>> graph = MusicGraph()
+        >>> graph.add_node(GraphNode("a", None, [NeighborData("b", 0.5)]))
+        >>> path = os.path.join(tempfile.mkdtemp(), "graph.csr")
+        >>> graph.write(path)
+        >>> with MappedGraph(path) as mapped:
+        ...     mapped.neighbors("b"), mapped.node("b"), mapped.node("a").id
+        ([NeighborData(id='a', edge_weight=0.5, edge_cap=None)], None, 'a')
+    """
+
+    def __init__(self, path: str) -> None:
+        if sys.byteorder != "little":
+            raise NotImplementedError("Mapping a graph requires a little endian host")
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *locations = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a graph written by write_csr")
+        # Every view of the map, released before closing it
+        self._views: List[memoryview] = [memoryview(self._map)]
+        self._sections: Dict[str, Any] = {}
+        for position, (name, typecode) in enumerate(SECTIONS):
+            start, size = locations[2 * position : 2 * position + 2]
+            view: memoryview = self._views[0][start : start + size]
+            self._sections[name] = view.cast(typecode) if typecode else view
+            self._views.extend((view, self._sections[name]))
+        self._metadata: Optional[Dict[str, Any]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._sections["sorted_ids"])
+
+    def __contains__(self, node_id: Hashable) -> bool:
+        return self.index_of(node_id) is not None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            self._metadata = json.loads(bytes(self._sections["metadata"]))
+        return self._metadata
+
+    def _encoded_id(self, position: int) -> bytes:
+        id_offsets: memoryview = self._sections["id_offsets"]
+        start, end = id_offsets[position], id_offsets[position + 1]
+        return bytes(self._sections["id_blob"][start:end])
+
+    def id_of(self, position: int) -> str:
+        return self._encoded_id(position).decode("utf-8")
+
+    def index_of(self, node_id: Hashable) -> Optional[int]:
+        """Index of a node id, by binary search of the sorted ids"""
+        encoded: bytes = str(node_id).encode("utf-8")
+        sorted_ids: memoryview = self._sections["sorted_ids"]
+        low, high = 0, len(sorted_ids)
+        while low < high:
+            middle: int = (low + high) // 2
+            if self._encoded_id(sorted_ids[middle]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(sorted_ids) and self._encoded_id(sorted_ids[low]) == encoded:
+            return sorted_ids[low]
+        return None
+
+    def _row(self, node_id: Hashable) -> Tuple[int, int]:
+        position: Optional[int] = self.index_of(node_id)
+        if position is None:
+            raise KeyError(node_id)
+        offsets: memoryview = self._sections["offsets"]
+        return offsets[position], offsets[position + 1]
+
+    def neighbor_indices(self, node_id: Hashable) -> memoryview:
+        """Indices of the neighbors of a node, a view of the mapped file"""
+        start, end = self._row(node_id)
+        return self._sections["neighbors"][start:end]
+
+    def degree(self, node_id: Hashable) -> int:
+        start, end = self._row(node_id)
+        return end - start
+
+    def neighbors(self, node_id: Hashable) -> List[NeighborData]:
+        """Neighbors of a node, with the weight and cap of their edge"""
+        start, end = self._row(node_id)
+        neighbors, weights, caps = (
+            self._sections[name] for name in ("neighbors", "weights", "caps")
+        )
+        return [
+            NeighborData(
+                self.id_of(neighbors[k]),
+                None if math.isnan(weights[k]) else weights[k],
+                None if math.isnan(caps[k]) else caps[k],
+            )
+            for k in range(start, end)
+        ]
+
+    def _payload(self, position: int) -> Optional[GraphNode]:
+        payload_offsets: memoryview = self._sections["payload_offsets"]
+        start, end = payload_offsets[position], payload_offsets[position + 1]
+        if start == end:
+            return None
+        return codec.decode(bytes(self._sections["payload_blob"][start:end]))
+
+    def node(self, node_id: Hashable) -> Optional[GraphNode]:
+        """The fetched node of an id, decoded from its payload, None if not fetched"""
+        position: Optional[int] = self.index_of(node_id)
+        return None if position is None else self._payload(position)
+
+    def nodes(self) -> Iterator[GraphNode]:
+        """The fetched nodes, in the order they were added to the graph"""
+        for position in self._sections["fetched"]:
+            yield self._payload(position)
+
+    def registry(self) -> IdRegistry:
+        """The ids registry the graph was written with"""
+        return IdRegistry.from_dict(
+            {
+                "ids": [self.id_of(position) for position in range(len(self))],
+                "platforms": self.metadata["platforms"],
+                "kinds": self.metadata["kinds"],
+                "platform_codes": self._sections["platform_codes"].tolist(),
+                "kind_codes": self._sections["kind_codes"].tolist(),
+            }
+        )
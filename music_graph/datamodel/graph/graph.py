@@ -1,37 +1,352 @@
+import re
+import unicodedata
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, Hashable, List, Tuple
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 import networkx as nx
 
-from music_graph.datamodel.graph.node import GraphNode
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.compact import CompactData, CompactGraphNode, compact_node
+from music_graph.datamodel.graph.csr import MappedGraph, is_csr_file, write_csr
+from music_graph.datamodel.graph.id_registry import IdRegistry, entity_source
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+from music_graph.datamodel.lazy import LazyFieldsMixin
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+
+# Types of the node objects, by the class name stored in the written graphs
+NODE_DATA_TYPES: Dict[str, Type] = {
+    data_type.__name__: data_type
+    for data_type in (AlbumData, ArtistData, PlaylistData, TrackData)
+}
 
 
 @dataclass()
 class MusicGraph:
-    graph: nx.Graph = nx.Graph()
+    graph: nx.Graph = field(default_factory=nx.Graph)
     node_aliases: Dict[Hashable, List[Hashable]] = field(default_factory=dict)
     raw_node: Dict[Hashable, GraphNode] = field(default_factory=dict)
+    # Graph node id of the ids resolved to a node of another source
+    canonical_ids: Dict[Hashable, Hashable] = field(default_factory=dict)
+    # Id of the first node of each platform seen with a resolution_key
+    resolution_keys: Dict[str, Dict[str, Hashable]] = field(default_factory=dict)
+    # Version of each seed entity the graph was built from, e.g. a playlist
+    # snapshot id, None when the source has no versioning
+    seed_versions: Dict[Hashable, Optional[str]] = field(default_factory=dict)
+    # Whether raw_node keeps slotted copies of the nodes, with interned ids, for
+    # large graphs, see music_graph.datamodel.compact
+    compact: bool = False
+    # Dense int32 index of the graph node ids, written with the graph
+    ids: IdRegistry = field(default_factory=IdRegistry)
+    # Whether the nodes of different platforms are resolved to one graph node,
+    # see MusicGraph.resolve_id, for the graphs built from several sources
+    resolve_sources: bool = False
 
     def add_node(self, node: GraphNode):
-        node_id: str = self.resolve_id(node)
-        data_tuple: Tuple = (node_id, node.to_node_dict())
-        self.graph.add_node(data_tuple)
+        """Add a fetched node and its edges, under the id it resolves to
+
+        A node resolved to the node of another source adds its edges to it, the
+        node attributes stay the ones of the first node seen. raw_node keeps every
+        fetched node under its own id.
+        """
+        node_id: Hashable = (
+            self.resolve_id(node)
+            if self.resolve_sources
+            else self.canonical_ids.get(node.id, node.id)
+        )
+        if self.compact:
+            node = compact_node(node)
+        if node_id == node.id or not self.graph.nodes.get(node_id):
+            self.graph.add_node(node_id, **node.to_node_dict())
+        source: Tuple[str, str] = entity_source(node.object)
+        self.ids.register(node_id, *source)
+        # The fetched id too, when resolved to another one, for its payload
+        self.ids.register(node.id, *source)
+        self.raw_node[node.id] = node
+        for neighbor in node.neighbor_ids:
+            neighbor_id: Hashable = self.canonical_ids.get(neighbor.id, neighbor.id)
+            if neighbor_id == node_id and neighbor.id != node.id:
+                continue
+            self.ids.register(neighbor_id)
+            self.graph.add_edge(
+                node_id, neighbor_id, weight=neighbor.edge_weight, cap=neighbor.edge_cap
+            )
+
+    def remove_node(self, node_id: Hashable) -> None:
+        """Remove a fetched node and the edges only it declared
+
+        The edges also declared by a neighbor are kept, as is the node itself when
+        it is still a neighbor of another node, so that removing then adding a
+        node again gives the same graph as building it once.
+
+        Examples:
+            >>> graph = MusicGraph()
+            >>> graph.add_node(GraphNode("a", None, [NeighborData("b")]))
+            >>> graph.add_node(GraphNode("c", None, [NeighborData("a")]))
+            >>> graph.remove_node("a")
+            >>> sorted(graph.graph.nodes), list(graph.graph.edges)
+            (['a', 'c'], [('a', 'c')])
+            >>> graph.remove_node("c")
+            >>> list(graph.graph.nodes)
+            []
+        """
+        node: Optional[GraphNode] = self.raw_node.pop(node_id, None)
+        if node is None:
+            return
+        for neighbor in node.neighbor_ids:
+            other: Optional[GraphNode] = self.raw_node.get(neighbor.id)
+            if other is not None and any(n.id == node_id for n in other.neighbor_ids):
+                continue
+            if self.graph.has_edge(node_id, neighbor.id):
+                self.graph.remove_edge(node_id, neighbor.id)
+            if neighbor.id not in self.raw_node and neighbor.id in self.graph:
+                if self.graph.degree(neighbor.id) == 0:
+                    self.graph.remove_node(neighbor.id)
+        if self.graph.degree(node_id) == 0:
+            self.graph.remove_node(node_id)
+        else:
+            # Still the neighbor of another node, without its fetched data
+            self.graph.nodes[node_id].clear()
+
+    def remove_unreachable(self, seed_ids: Iterable[Hashable]) -> List[Hashable]:
+        """Remove the fetched nodes connected to none of the seeds
+
+        Returns:
+            List[Hashable]: the ids of the removed nodes
 
-    def resolve_id(self, node: GraphNode) -> str:
-        # TODO: do the resolving process to avoid duplicates between sources
-        return node.id
+        Examples:
+            >>> graph = MusicGraph()
+            >>> graph.add_node(GraphNode("a", None, [NeighborData("b")]))
+            >>> graph.add_node(GraphNode("b", None, [NeighborData("a")]))
+            >>> graph.add_node(GraphNode("c", None, [NeighborData("d")]))
+            >>> graph.remove_unreachable(["a"]), sorted(graph.graph.nodes)
+            (['c'], ['a', 'b'])
+        """
+        reachable: Set[Hashable] = set()
+        for seed_id in seed_ids:
+            seed_id = self.canonical_ids.get(seed_id, seed_id)
+            if seed_id in self.graph and seed_id not in reachable:
+                reachable |= nx.node_connected_component(self.graph, seed_id)
+        removed: List[Hashable] = [
+            node_id
+            for node_id in self.raw_node
+            if self.canonical_ids.get(node_id, node_id) not in reachable
+        ]
+        for node_id in removed:
+            self.remove_node(node_id)
+        return removed
+
+    def resolve_id(self, node: GraphNode) -> Hashable:
+        """Graph node id of a node, the first node seen with the same resolution_key
+
+        A node is only resolved to a node of another platform, given by
+        entity_source: two entities of one source are never merged, even with the
+        same name, and the nodes of an unknown platform are not resolved. The ids
+        resolved to another node are recorded as its aliases, and when one of them
+        was already in the graph as a neighbor, its edges are moved to the node it
+        resolves to.
+        """
+        fallback: Hashable = self.canonical_ids.get(node.id, node.id)
+        platform: str = entity_source(node.object)[0]
+        key: Optional[str] = resolution_key(node.object, self.canonical_ids)
+        if key is None or not platform:
+            return fallback
+        platform_ids: Dict[str, Hashable] = self.resolution_keys.setdefault(key, {})
+        if platform_ids.setdefault(platform, node.id) != node.id:
+            # Another entity of the same source has the same key
+            return fallback
+        canonical_id: Hashable = next(iter(platform_ids.values()))
+        if canonical_id != node.id and node.id not in self.canonical_ids:
+            self.canonical_ids[node.id] = canonical_id
+            self.node_aliases.setdefault(canonical_id, []).append(node.id)
+            if node.id in self.graph:
+                self._merge_graph_node(node.id, canonical_id)
+        return canonical_id
+
+    def _merge_graph_node(self, alias_id: Hashable, node_id: Hashable) -> None:
+        for neighbor_id, attributes in list(self.graph[alias_id].items()):
+            if neighbor_id not in (alias_id, node_id):
+                self.graph.add_edge(node_id, neighbor_id, **attributes)
+        if not self.graph.nodes.get(node_id):
+            self.graph.add_node(node_id, **self.graph.nodes[alias_id])
+        self.graph.remove_node(alias_id)
+
+    def edge_indices(self) -> Tuple[array, array]:
+        """Int32 arrays of the ends of the edges, as indices of the ids registry
+
+        Examples:
+            >>> graph = MusicGraph()
+            >>> graph.add_node(GraphNode("a", None, [NeighborData("b")]))
+            >>> graph.add_node(GraphNode("c", None, [NeighborData("a")]))
+            >>> [array.tolist() for array in graph.edge_indices()]
+            [[0, 0], [1, 2]]
+        """
+        sources: array = array("i")
+        targets: array = array("i")
+        index: Dict[Hashable, int] = self.ids.index
+        for source, target in self.graph.edges:
+            sources.append(index[source])
+            targets.append(index[target])
+        return sources, targets
 
     def write(self, path: str) -> None:
-        # TODO: do the serialization and writing to a file here
-        ...
+        """Write the graph in the memory-mapped CSR format, see MappedGraph
+
+        The file holds the adjacency of the graph nodes as CSR arrays, numbered by
+        their index in ids, the id table and the fetched nodes encoded by
+        music_graph.datamodel.codec, with the aliases and seed versions. The lazy
+        node objects are written with their loaded fields only, so that writing a
+        graph does not trigger api calls.
+        """
+        # The aliases are written for the readers of the file, MusicGraph.read
+        # resolves the nodes again
+        write_csr(
+            path,
+            self.graph,
+            self.ids,
+            self.raw_node,
+            {
+                "node_aliases": list(self.node_aliases.items()),
+                "seed_versions": list(self.seed_versions.items()),
+                "resolve_sources": self.resolve_sources,
+            },
+        )
 
     @staticmethod
-    def read(path: str):
-        # TODO: do the reading and deserialization here
-        return None
+    def read(path: str, compact: bool = False):
+        """Read a graph written by MusicGraph.write, see MusicGraph.compact
+
+        The ids keep the indices they were written with. To query a large graph
+        without loading it, map it with MappedGraph instead.
+
+        Raises:
+            ValueError: if the file was not written by MusicGraph.write
+        """
+        if not is_csr_file(path):
+            raise ValueError(f"{path} is not a graph written by MusicGraph.write")
+        with MappedGraph(path) as mapped:
+            graph = MusicGraph(
+                seed_versions=dict(mapped.metadata["seed_versions"]),
+                compact=compact,
+                ids=mapped.registry(),
+                resolve_sources=mapped.metadata.get("resolve_sources", False),
+            )
+            for node in mapped.nodes():
+                graph.add_node(node)
+        return graph
 
     @staticmethod
     def merge(graphs: List):
-        # TODO: do the merging of multiple graphs
-        # Implies resolving artists which have different ids because different platforms
-        ...
+        """Merge graphs, of different sources, resolving their nodes
+
+        Examples:
+            >>> spotify, tidal = "spotify:artist:", "https://tidal.com/artist/"
+            >>> a = ArtistData("1", [], 0, "", [], "", "Beyoncé", 0.0, spotify + "1")
+            >>> b = ArtistData("x", [], 0, "", [], "", "beyonce", 0.0, tidal + "x")
+            >>> c = ArtistData("3", [], 0, "", [], "", "Beyonce", 0.0, spotify + "3")
+            >>> left, right = MusicGraph(), MusicGraph()
+            >>> left.add_node(GraphNode("1", a, [NeighborData("2")]))
+            >>> left.add_node(GraphNode("3", c, []))
+            >>> right.add_node(GraphNode("x", b, [NeighborData("y")]))
+            >>> merged = MusicGraph.merge([left, right])
+            >>> sorted(merged.graph.edges), merged.node_aliases
+            ([('1', '2'), ('1', 'y')], {'1': ['x']})
+            >>> sorted(merged.graph.nodes)
+            ['1', '2', '3', 'y']
+        """
+        merged: MusicGraph = MusicGraph(resolve_sources=True)
+        for graph in graphs:
+            for node in graph.raw_node.values():
+                merged.add_node(node)
+            merged.seed_versions.update(graph.seed_versions)
+        return merged
+
+
+def resolution_key(
+    data: Any, canonical_ids: Optional[Mapping[Hashable, Hashable]] = None
+) -> Optional[str]:
+    """Key of an entity shared by its versions on every source, None if unknown
+
+    Artists are matched on their normalized name, albums on their name, number
+    of tracks and primary artist, and tracks on their name, duration in seconds
+    and primary artist. The artist ids differ between sources, so an album or a
+    track only matches its version of another source once their primary artists
+    were resolved to one another.
+
+    Args:
+        data (Any): the node object
+        canonical_ids (Optional[Mapping[Hashable, Hashable]]): the id each
+            resolved artist id resolves to, see MusicGraph.canonical_ids
+
+    Examples:
+        >>> resolution_key(ArtistData("1", [], 0, "", [], "", "Beyoncé", 0.0, ""))
+        'artist:beyonce'
+        >>> album = AlbumData("2", "album", ["x"], [], "", "Lemonade", "", 12)
+        >>> resolution_key(album, {"x": "1"})
+        'album:lemonade:12:1'
+    """
+    data_type: Type = data.data_class if isinstance(data, CompactData) else type(data)
+    if issubclass(data_type, ArtistData):
+        kind, detail = "artist", ""
+    elif issubclass(data_type, AlbumData):
+        kind, detail = "album", f":{data.number_of_tracks}"
+    elif issubclass(data_type, TrackData):
+        # The spotify durations are in milliseconds, the tidal ones in seconds
+        is_spotify: bool = data.uri.startswith("spotify:")
+        seconds: float = data.duration / 1000 if is_spotify else data.duration
+        kind, detail = "track", f":{round(seconds)}"
+    else:
+        return None
+    if kind != "artist":
+        if not data.artist_ids:
+            return None
+        artist_id: Hashable = data.artist_ids[0]
+        detail += f":{(canonical_ids or {}).get(artist_id, artist_id)}"
+    name: str = unicodedata.normalize("NFKD", data.name or "")
+    name = re.sub(r"[^a-z0-9]+", " ", name.encode("ascii", "ignore").decode().lower())
+    if not name.strip():
+        return None
+    return f"{kind}:{name.strip()}{detail}"
+
+
+def node_to_dict(node: GraphNode) -> Dict[str, Any]:
+    """Json serializable form of a node, with its object type"""
+    if isinstance(node, CompactGraphNode):
+        node = node.to_node()
+    data: Any = node.object
+    if isinstance(data, LazyFieldsMixin):
+        data = data.loaded_only()
+    return {
+        "id": node.id,
+        "value": node.value,
+        "type": None if data is None else type(data).__name__,
+        "object": None if data is None else data.to_dict(),
+        "neighbors": [[n.id, n.edge_weight, n.edge_cap] for n in node.neighbor_ids],
+    }
+
+
+def node_from_dict(node_dict: Dict[str, Any]) -> GraphNode:
+    data_type: Optional[str] = node_dict["type"]
+    return GraphNode(
+        id=node_dict["id"],
+        object=(
+            None
+            if data_type is None
+            else NODE_DATA_TYPES[data_type].from_dict(node_dict["object"])
+        ),
+        neighbor_ids=[NeighborData(*neighbor) for neighbor in node_dict["neighbors"]],
+        value=node_dict["value"],
+    )
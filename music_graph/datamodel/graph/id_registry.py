@@ -0,0 +1,139 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Type
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.compact import CompactData
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+# Largest index of an int32 array
+MAX_INDEX: int = 2**31 - 1
+
+# Entity kind of each datamodel class
+ENTITY_KINDS: Dict[Type, str] = {
+    AlbumData: "album",
+    ArtistData: "artist",
+    PlaylistData: "playlist",
+    TrackData: "track",
+    UserInfo: "user",
+}
+
+
+def entity_source(data: Any) -> Tuple[str, str]:
+    """Platform and kind of a node object, empty when unknown
+
+    Examples:
+        >>> uri = "spotify:artist:1"
+        >>> entity_source(ArtistData("1", [], 0, "", [], "", "a", 0.0, uri))
+        ('spotify', 'artist')
+        >>> entity_source(None)
+        ('', '')
+    """
+    data_type: Type = data.data_class if isinstance(data, CompactData) else type(data)
+    kind: str = ENTITY_KINDS.get(data_type, "")
+    uri: str = getattr(data, "uri", None) or ""
+    if uri.startswith("spotify:"):
+        return "spotify", kind
+    if "tidal.com" in uri:
+        return "tidal", kind
+    return "", kind
+
+
+@dataclass()
+class IdRegistry:
+    """Dense int32 index of the entities of a graph, and the way back
+
+    The entities are the string ids the graph is keyed by, each with its
+    platform and kind, stored as small codes. Indices are assigned in
+    registration order and never reused, so the numeric tables built from a
+    registry, e.g. the edge arrays of MusicGraph.edge_indices, stay valid as
+    the graph grows. An id first seen as a neighbor gets its platform and kind
+    once its own node is registered.
+
+    Examples:
+        >>> registry = IdRegistry()
+        >>> registry.register("b"), registry.register("a", "spotify", "artist")
+        (0, 1)
+        >>> registry.register("b", "spotify", "artist"), registry.id_of(1)
+        (0, 'a')
+        >>> registry.indices(["a", "b"]).tolist(), registry.source_of(0)
+        ([1, 0], ('spotify', 'artist'))
+    """
+
+    ids: List[Hashable] = field(default_factory=list)
+    index: Dict[Hashable, int] = field(default_factory=dict)
+    # Code of the platform and of the kind of each index, in platforms and kinds
+    platform_codes: array = field(default_factory=lambda: array("b"))
+    kind_codes: array = field(default_factory=lambda: array("b"))
+    platforms: List[str] = field(default_factory=lambda: [""])
+    kinds: List[str] = field(default_factory=lambda: [""])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, entity_id: Hashable) -> bool:
+        return entity_id in self.index
+
+    def _code(self, names: List[str], name: str) -> int:
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def register(self, entity_id: Hashable, platform: str = "", kind: str = "") -> int:
+        """Index of an entity, assigned on its first registration"""
+        position: Optional[int] = self.index.get(entity_id)
+        if position is None:
+            position = len(self.ids)
+            if position > MAX_INDEX:
+                raise OverflowError("The registry is full, int32 indices")
+            self.ids.append(entity_id)
+            self.index[entity_id] = position
+            self.platform_codes.append(self._code(self.platforms, platform))
+            self.kind_codes.append(self._code(self.kinds, kind))
+            return position
+        if platform and not self.platform_codes[position]:
+            self.platform_codes[position] = self._code(self.platforms, platform)
+        if kind and not self.kind_codes[position]:
+            self.kind_codes[position] = self._code(self.kinds, kind)
+        return position
+
+    def lookup(self, entity_id: Hashable) -> Optional[int]:
+        return self.index.get(entity_id)
+
+    def indices(self, entity_ids: Iterable[Hashable]) -> array:
+        """Int32 array of the indices of registered entities"""
+        return array("i", [self.index[entity_id] for entity_id in entity_ids])
+
+    def id_of(self, position: int) -> Hashable:
+        return self.ids[position]
+
+    def source_of(self, position: int) -> Tuple[str, str]:
+        """Platform and kind of an index, empty when unknown"""
+        return (
+            self.platforms[self.platform_codes[position]],
+            self.kinds[self.kind_codes[position]],
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "ids": list(self.ids),
+            "platforms": list(self.platforms),
+            "kinds": list(self.kinds),
+            "platform_codes": self.platform_codes.tolist(),
+            "kind_codes": self.kind_codes.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        ids: List[Hashable] = list(data_dict["ids"])
+        return cls(
+            ids=ids,
+            index={entity_id: i for i, entity_id in enumerate(ids)},
+            platform_codes=array("b", data_dict["platform_codes"]),
+            kind_codes=array("b", data_dict["kind_codes"]),
+            platforms=list(data_dict["platforms"]),
+            kinds=list(data_dict["kinds"]),
+        )
@@ -0,0 +1,137 @@
+import threading
+from dataclasses import fields, replace
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class LazyFieldsMixin:
+    """Mixin for dataclasses whose fields can be loaded on first access
+
+    A deferred field is removed from the instance, so that python falls back on
+    __getattr__, which runs the loader once and stores its value. The deferred
+    fields must not have a class attribute, i.e. no plain default value.
+
+    The dataclasses are declared with repr=False and eq=False, so that repr and
+    == are the ones of the mixin, which do not load the pending fields: repr
+    skips them, and == compares a pending field by its loader and unloaded
+    value, so that a pending field never equals a loaded one. Pickling and
+    copying keep the unloaded value of the pending fields, like loaded_only,
+    the loaders are not carried over.
+
+    Examples:
+        >>> from dataclasses import dataclass, field
+        >>> from typing import List
+        >>> @dataclass(repr=False, eq=False)
+        ... class Data(LazyFieldsMixin):
+        ...     id: str
+        ...     ids: List[str] = field(default_factory=list)
+        >>> data = Data("a")
+        >>> data.defer("ids", lambda: ["b", "c"], unloaded=[])
+        >>> data.is_loaded("ids")
+        False
+        >>> data, data == Data("a", ["d"])
+        (Data(id='a'), False)
+        >>> data.loaded_only()
+        Data(id='a', ids=[])
+        >>> data.ids
+        ['b', 'c']
+        >>> data.is_loaded("ids")
+        True
+    """
+
+    def defer(self, name: str, loader: Callable[[], Any], unloaded: Any = None) -> None:
+        """Load the field with loader on its first access
+
+        Args:
+            name (str): the field name
+            loader (Callable): returns the field value, typically an api call
+            unloaded (Any): the value used by loaded_only while not loaded
+        """
+        pending: Dict[str, Tuple[Callable[[], Any], Any]] = self.__dict__.setdefault(
+            "_pending_fields", {}
+        )
+        self.__dict__.setdefault("_pending_lock", threading.Lock())
+        pending[name] = (loader, unloaded)
+        self.__dict__.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        return name not in self.__dict__.get("_pending_fields", {})
+
+    def pending_fields(self) -> List[str]:
+        return list(self.__dict__.get("_pending_fields", {}))
+
+    def loaded_only(self):
+        """Copy of the object with the unloaded value for the pending fields"""
+        pending = self.__dict__.get("_pending_fields", {})
+        return replace(self, **{name: p[1] for name, p in list(pending.items())})
+
+    def _loaded_values(self) -> Dict[str, Any]:
+        # The field values of the dataclass, without the pending ones
+        return {
+            f.name: self.__dict__[f.name]
+            for f in fields(self)
+            if f.name in self.__dict__
+        }
+
+    def __repr__(self) -> str:
+        shown = {f.name for f in fields(self) if f.repr}
+        values = ", ".join(
+            f"{name}={value!r}"
+            for name, value in self._loaded_values().items()
+            if name in shown
+        )
+        return f"{type(self).__qualname__}({values})"
+
+    def __eq__(self, other: Any) -> bool:
+        """Equal when of the same class with the same fields, without loading any
+
+        The pending fields are compared by their loader and unloaded value.
+        """
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._eq_state() == other._eq_state()
+
+    def _eq_state(self) -> Dict[str, Any]:
+        # The loaded values, and the loader and unloaded value of pending fields
+        state: Dict[str, Any] = self._loaded_values()
+        pending = self.__dict__.get("_pending_fields", {})
+        for name, (loader, unloaded) in list(pending.items()):
+            state[name] = (_PendingField, _loader_key(loader), unloaded)
+        return state
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = dict(self.__dict__)
+        state.pop("_pending_lock", None)
+        for name, (_, unloaded) in state.pop("_pending_fields", {}).items():
+            state[name] = unloaded
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called when the attribute is missing, i.e. for pending fields
+        pending = self.__dict__.get("_pending_fields")
+        if name in self.__dict__:
+            # Loaded by another thread in the meantime
+            return self.__dict__[name]
+        if not pending or name not in pending:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        with self.__dict__["_pending_lock"]:
+            if name in pending:
+                self.__dict__[name] = pending[name][0]()
+                del pending[name]
+        return self.__dict__[name]
+
+
+class _PendingField:
+    """Marker of the pending fields in LazyFieldsMixin._eq_state"""
+
+
+def _loader_key(loader: Callable[[], Any]) -> Any:
+    # functools.partial compares by identity, its parts compare by value
+    if isinstance(loader, partial):
+        return loader.func, loader.args, sorted(loader.keywords.items())
+    return loader
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 @dataclass()
@@ -11,6 +11,8 @@ class PlaylistData:
     description: str
     duration: float
     track_ids: List[str] = field(default_factory=list)
+    # Version of the playlist content, changes with every modification on spotify
+    snapshot_id: Optional[str] = None
 
     @property
     def data_id(self) -> str:
@@ -26,6 +28,21 @@ class PlaylistData:
             description="",  # There is no description data for spotify
             duration=-1.0,  # There is no duration data for spotify
             track_ids=[t["track"]["id"] for t in playlist_data["tracks"]["items"]],
+            snapshot_id=playlist_data.get("snapshot_id"),
+        )
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the playlist from the output of to_dict"""
+        return cls(
+            id=data_dict["data_id"],
+            follower_number=data_dict["follower_number"],
+            uri=data_dict["uri"],
+            name=data_dict["name"],
+            description=data_dict["description"],
+            duration=data_dict["duration"],
+            track_ids=data_dict["track_ids"],
+            snapshot_id=data_dict.get("snapshot_id"),
         )
 
     def to_dict(self) -> Dict:
@@ -37,4 +54,5 @@ class PlaylistData:
             "track_ids": self.track_ids,
             "description": self.description,
             "duration": self.duration,
+            "snapshot_id": self.snapshot_id,
         }
@@ -1,11 +1,12 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
-from music_graph.datamodel.audio_analysis import AudioAnalysis
+from music_graph.datamodel.audio_analysis import AudioAnalysis, parse_audio_analysis
+from music_graph.datamodel.lazy import LazyFieldsMixin
 
 
-@dataclass()
-class TrackData:
+@dataclass(repr=False, eq=False)
+class TrackData(LazyFieldsMixin):
     id: str
     album_id: str
     artist_ids: List[str]
@@ -18,7 +19,8 @@ class TrackData:
     popularity: Optional[float] = None
     preview_url: Optional[str] = None
     track_playlist_ids: List[str] = field(default_factory=list)
-    audio_analysis: Optional[AudioAnalysis] = None
+    # default_factory rather than default, so that the field can be deferred
+    audio_analysis: Optional[AudioAnalysis] = field(default_factory=lambda: None)
 
     @property
     def data_id(self) -> str:
@@ -26,8 +28,24 @@ class TrackData:
 
     @classmethod
     def from_spotify_dict(
-        cls, track_id: str, track_data: Dict, audio_analysis: Optional[Dict] = None
+        cls,
+        track_id: str,
+        track_data: Dict,
+        audio_analysis: Optional[Dict] = None,
+        columnar_analysis: bool = False,
+        compressed_analysis: bool = False,
     ):
+        """Build the track from the spotify payloads
+
+        Args:
+            track_id (str): the id of the track
+            track_data (Dict): the track payload
+            audio_analysis (Optional[Dict]): the audio analysis payload
+            columnar_analysis (bool): whether to parse the audio analysis as a
+                ColumnarAudioAnalysis, which requires numpy
+            compressed_analysis (bool): whether to keep the audio analysis payload
+                compressed until its first use, see CompressedAudioAnalysis
+        """
         return cls(
             id=track_id,
             album_id=track_data["album"]["id"],
@@ -43,6 +61,30 @@ class TrackData:
             track_playlist_ids=[],
             audio_analysis=audio_analysis
             if audio_analysis is None
+            else parse_audio_analysis(
+                audio_analysis, columnar_analysis, compressed_analysis
+            ),
+        )
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the track from the output of to_dict"""
+        audio_analysis: Optional[Dict] = data_dict["audio_analysis"]
+        return cls(
+            id=data_dict["data_id"],
+            album_id=data_dict["album_id"],
+            artist_ids=data_dict["artist_ids"],
+            duration=data_dict["duration"],
+            api_href=data_dict["api_href"],
+            linked_track_ids=data_dict["linked_track_ids"],
+            uri=data_dict["uri"],
+            track_number=data_dict["track_number"],
+            name=data_dict["name"],
+            popularity=data_dict["popularity"],
+            preview_url=data_dict["preview_url"],
+            track_playlist_ids=data_dict["track_playlist_ids"],
+            audio_analysis=audio_analysis
+            if audio_analysis is None
             else AudioAnalysis.from_dict(audio_analysis),
         )
 
@@ -1,5 +1,14 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Id of an item of the spotify user library pages, by UserInfo field
+SPOTIFY_LIBRARY_ITEM_IDS: Dict[str, Callable[[Dict], str]] = {
+    "playlist_ids": lambda item: item["id"],
+    "artist_ids": lambda item: item["id"],
+    "top_track_ids": lambda item: item["id"],
+    "saved_track_ids": lambda item: item["track"]["id"],
+    "saved_album_ids": lambda item: item["album"]["id"],
+}
 
 
 @dataclass()
@@ -13,6 +22,12 @@ class UserInfo:
     top_track_ids: List[str]
     saved_track_ids: List[str]
     saved_album_ids: List[str]
+    # Snapshot id of the playlists, when known, to detect their modifications
+    playlist_snapshots: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def data_id(self) -> str:
+        return self.id
 
     @classmethod
     def from_spotify_dict(
@@ -24,24 +39,111 @@ class UserInfo:
         saved_tracks: Optional[Dict] = None,
         saved_albums: Optional[Dict] = None,
     ):
+        """Build the user info from single spotify pages, see from_spotify_pages"""
+        pages: Dict[str, Optional[Dict]] = {
+            "playlist_ids": playlist_data,
+            "artist_ids": None if artists_data is None else artists_data["artists"],
+            "top_track_ids": top_tracks,
+            "saved_track_ids": saved_tracks,
+            "saved_album_ids": saved_albums,
+        }
+        return cls.from_spotify_pages(
+            user_data,
+            {name: [page] for name, page in pages.items() if page is not None},
+        )
+
+    @classmethod
+    def from_spotify_pages(
+        cls, user_data: Dict, library_pages: Optional[Dict[str, Iterable[Dict]]] = None
+    ):
+        """Build the user info from every page of the spotify user libraries
+
+        The pages are consumed one at a time, so only the ids are kept in memory.
+
+        Args:
+            user_data (Dict): the spotify user
+            library_pages (Optional[Dict[str, Iterable[Dict]]]): the paging objects
+                of each library, by UserInfo field, e.g. "saved_track_ids"
+
+        Returns:
+            UserInfo: the user info, with empty lists for the missing libraries
+
+        Examples:
+            >>> user_data = {"id": "u", "display_name": "U", "href": "", "uri": ""}
+            >>> pages = [{"items": [{"track": {"id": "a"}}]}, {"items": []}]
+            >>> UserInfo.from_spotify_pages(
+            ...     user_data, {"saved_track_ids": iter(pages)}
+            ... ).saved_track_ids
+            ['a']
+        """
+        library_pages = dict(library_pages or {})
+        playlist_snapshots: Dict[str, str] = {}
+
+        def playlist_pages(pages: Iterable[Dict]) -> Iterator[Dict]:
+            for page in pages:
+                for item in page["items"]:
+                    if item.get("snapshot_id"):
+                        playlist_snapshots[item["id"]] = item["snapshot_id"]
+                yield page
+
+        library_pages["playlist_ids"] = playlist_pages(
+            library_pages.get("playlist_ids", ())
+        )
+        libraries: Dict[str, Any] = {
+            name: list(cls.ids_from_spotify_pages(name, library_pages.get(name, ())))
+            for name in SPOTIFY_LIBRARY_ITEM_IDS
+        }
         return cls(
             id=user_data["id"],
             display_name=user_data["display_name"],
             href=user_data["href"],
             uri=user_data["uri"],
-            playlist_ids=[]
-            if playlist_data is None
-            else [p["id"] for p in playlist_data["items"]],
-            artist_ids=[]
-            if artists_data is None
-            else [a["id"] for a in artists_data["artists"]["items"]],
-            top_track_ids=[]
-            if top_tracks is None
-            else [t["id"] for t in top_tracks["items"]],
-            saved_track_ids=[]
-            if saved_tracks is None
-            else [t["track"]["id"] for t in saved_tracks["items"]],
-            saved_album_ids=[]
-            if saved_albums is None
-            else [a["album"]["id"] for a in saved_albums["items"]],
+            playlist_snapshots=playlist_snapshots,
+            **libraries,
+        )
+
+    @staticmethod
+    def ids_from_spotify_pages(library: str, pages: Iterable[Dict]) -> Iterator[str]:
+        """Stream the ids of a spotify user library, page by page
+
+        Args:
+            library (str): the UserInfo field of the library, e.g. "artist_ids"
+            pages (Iterable[Dict]): the paging objects of the library
+
+        Returns:
+            Iterator[str]: the ids, in the order of the pages
+        """
+        item_id: Callable[[Dict], str] = SPOTIFY_LIBRARY_ITEM_IDS[library]
+        for page in pages:
+            for item in page["items"]:
+                yield item_id(item)
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict):
+        """Build the user info from the output of to_dict"""
+        return cls(
+            id=data_dict["data_id"],
+            display_name=data_dict["display_name"],
+            href=data_dict["href"],
+            uri=data_dict["uri"],
+            playlist_ids=data_dict["playlist_ids"],
+            artist_ids=data_dict["artist_ids"],
+            top_track_ids=data_dict["top_track_ids"],
+            saved_track_ids=data_dict["saved_track_ids"],
+            saved_album_ids=data_dict["saved_album_ids"],
+            playlist_snapshots=data_dict.get("playlist_snapshots", {}),
         )
+
+    def to_dict(self) -> Dict:
+        return {
+            "data_id": self.data_id,
+            "display_name": self.display_name,
+            "href": self.href,
+            "uri": self.uri,
+            "playlist_ids": self.playlist_ids,
+            "artist_ids": self.artist_ids,
+            "top_track_ids": self.top_track_ids,
+            "saved_track_ids": self.saved_track_ids,
+            "saved_album_ids": self.saved_album_ids,
+            "playlist_snapshots": self.playlist_snapshots,
+        }
@@ -0,0 +1,90 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, List, Optional, TypeVar
+
+from music_graph.abstract.async_client import AbstractAsyncStreamingAPIClient
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.rate_limiter import RateLimitScheduler
+
+T = TypeVar("T")
+
+
+class ExecutorAsyncStreamingAPIClient(AbstractAsyncStreamingAPIClient):
+    def __init__(
+        self,
+        client: Optional[AbstractStreamingAPIClient] = None,
+        max_concurrency: int = 100,
+        executor: Optional[Executor] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        """Async client running blocking calls in an executor
+
+        Every blocking call goes through a semaphore, so at most max_concurrency
+        requests are in flight whatever the number of awaiting tasks.
+
+        Args:
+            client (Optional[AbstractStreamingAPIClient]): the sync client to adapt,
+                subclasses running raw API calls themselves can leave it empty
+            max_concurrency (int): maximum number of blocking calls in flight
+            executor (Optional[Executor]): executor running the calls, defaults to
+                the event loop default executor
+            scheduler (Optional[RateLimitScheduler]): rate limit scheduler, to share
+                a request budget with other clients, threads and tasks. The endpoint
+                budget used is the one named after the blocking function.
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.scheduler = scheduler
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so that it is bound to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run_in_executor(self, func: Callable[..., T], *args, **kwargs) -> T:
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(func, *args, **kwargs)
+            )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.scheduler is None:
+            return await self._run_in_executor(func, *args, **kwargs)
+        return await self.scheduler.acall(
+            func.__name__, self._run_in_executor, func, *args, **kwargs
+        )
+
+    async def get_track(self, track_id: str) -> TrackData:
+        return await self.run(self.client.get_track, track_id=track_id)
+
+    async def get_album(self, album_id: str) -> AlbumData:
+        return await self.run(self.client.get_album, album_id=album_id)
+
+    async def get_artist(self, artist_id: str) -> ArtistData:
+        return await self.run(self.client.get_artist, artist_id=artist_id)
+
+    async def get_playlist(self, playlist_id: str) -> PlaylistData:
+        return await self.run(self.client.get_playlist, playlist_id=playlist_id)
+
+    async def get_user_info(self, user_id: str) -> UserInfo:
+        return await self.run(self.client.get_user_info, user_id=user_id)
+
+    async def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        return await self.run(self.client.get_artist_neighbors, artist_id)
+
+    async def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        return await self.run(self.client.get_playlist_neighbors, playlist_id)
+
+    async def get_track_neighbors(self, track_id: str) -> List[str]:
+        return await self.run(self.client.get_track_neighbors, track_id)
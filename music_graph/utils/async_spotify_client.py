@@ -0,0 +1,118 @@
+import asyncio
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple, Union
+
+import spotipy
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.async_executor_client import ExecutorAsyncStreamingAPIClient
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.spotify_client import (
+    LIBRARY_ENDPOINTS,
+    SpotifyStreamingAPIClient,
+)
+
+
+class AsyncSpotifyStreamingAPIClient(ExecutorAsyncStreamingAPIClient):
+    """Async spotify client
+
+    spotipy is blocking, so the raw calls run in the executor, but the
+    independent calls needed for one entity are awaited together.
+    """
+
+    def __init__(
+        self,
+        spotify_client: spotipy.Spotify,
+        max_concurrency: int = 100,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        super().__init__(max_concurrency=max_concurrency, scheduler=scheduler)
+        self.spotify_client = spotify_client
+        # Paginates the user libraries, each page taking a token of the scheduler
+        self.sync_client = SpotifyStreamingAPIClient(spotify_client, scheduler)
+
+    async def get_track(self, track_id: str) -> TrackData:
+        track_data, audio_analysis = await asyncio.gather(
+            self.run(self.spotify_client.track, track_id=track_id),
+            self.run(self.spotify_client.audio_analysis, track_id=track_id),
+        )
+        return TrackData.from_spotify_dict(
+            track_id=track_id, track_data=track_data, audio_analysis=audio_analysis,
+        )
+
+    async def get_album(self, album_id: str) -> AlbumData:
+        album_data: Dict = await self.run(self.spotify_client.album, album_id=album_id)
+        return AlbumData.from_spotify_dict(album_id, album_data)
+
+    async def get_artist(self, artist_id: str) -> ArtistData:
+        artist_data, album_data, top_tracks, similar_artists = await asyncio.gather(
+            self.run(self.spotify_client.artist, artist_id=artist_id),
+            self.run(self.spotify_client.artist_albums, artist_id=artist_id),
+            self.run(self.spotify_client.artist_top_tracks, artist_id=artist_id),
+            self.run(self.spotify_client.artist_related_artists, artist_id=artist_id),
+        )
+        return ArtistData.from_spotify_dict(
+            artist_id=artist_id,
+            artist_data=artist_data,
+            top_tracks=top_tracks,
+            similar_artists=similar_artists,
+            albums=album_data,
+        )
+
+    async def get_playlist(self, playlist_id: str) -> PlaylistData:
+        playlist_data: Dict = await self.run(
+            self.spotify_client.playlist, playlist_id=playlist_id
+        )
+        return PlaylistData.from_spotify_dict(playlist_data)
+
+    async def get_user_info(
+        self, user_id: str, is_current_user: bool = False
+    ) -> UserInfo:
+        if not is_current_user:
+            user_data: Dict = await self.run(self.spotify_client.user, user=user_id)
+            return UserInfo.from_spotify_dict(user_data)
+        # The pagination is sequential per library, the libraries are concurrent
+        user_data, *libraries = await asyncio.gather(
+            self.run(self.spotify_client.user, user=user_id),
+            *(
+                self._run_in_executor(self._library_ids, name)
+                for name in LIBRARY_ENDPOINTS
+            ),
+        )
+        return replace(
+            UserInfo.from_spotify_dict(user_data),
+            **dict(zip(LIBRARY_ENDPOINTS, libraries)),
+        )
+
+    def _library_ids(self, library: str) -> List[str]:
+        return list(self.sync_client.iter_library_ids(library))
+
+    async def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        similar_artists: Dict = await self.run(
+            self.spotify_client.artist_related_artists, artist_id=artist_id
+        )
+        return [a["id"] for a in similar_artists["artists"]]
+
+    async def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        raise NotImplementedError(
+            "Spotify does not allow getting similar playlists from playlists"
+        )
+
+    async def get_track_neighbors(self, track_id: str) -> List[str]:
+        similar_track_data: Dict = await self.run(
+            self.spotify_client.recommendations, seed_tracks=[track_id]
+        )
+        return [t["id"] for t in similar_track_data["tracks"]]
+
+    @classmethod
+    def from_env(
+        cls, scope: Optional[Union[str, Tuple]] = None, max_concurrency: int = 100
+    ):
+        sync_client = SpotifyStreamingAPIClient.from_env(
+            scope=scope, concurrency=max_concurrency
+        )
+        return cls(sync_client.spotify_client, max_concurrency=max_concurrency)
@@ -0,0 +1,139 @@
+import asyncio
+from typing import List, Optional
+
+import requests
+import tidalapi as tidal
+from loguru import logger
+
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.async_executor_client import ExecutorAsyncStreamingAPIClient
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.converter.tidal_converter import TidalAPIConverter
+from music_graph.utils.tidal_client import TidalStreamingAPIClient
+
+
+class AsyncTidalStreamingAPIClient(ExecutorAsyncStreamingAPIClient):
+    """Async tidal client
+
+    tidalapi is blocking, so the raw calls run in the executor, but the
+    independent calls needed for one entity are awaited together.
+    """
+
+    def __init__(
+        self,
+        tidal_session: tidal.Session,
+        max_concurrency: int = 100,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        super().__init__(max_concurrency=max_concurrency, scheduler=scheduler)
+        self.tidal_session = tidal_session
+        self.converter = TidalAPIConverter()
+
+    async def get_track(self, track_id: str) -> TrackData:
+        track_data, similar_tracks = await asyncio.gather(
+            self.run(self.tidal_session.get_track, track_id=track_id),
+            self.run(self.tidal_session.get_track_radio, track_id=track_id),
+        )
+        return self.converter.track_converter(
+            track_raw=track_data, similar_tracks=similar_tracks
+        )
+
+    async def get_album(self, album_id: str) -> AlbumData:
+        album_data, album_tracks = await asyncio.gather(
+            self.run(self.tidal_session.get_album, album_id=album_id),
+            self.run(self.tidal_session.get_album_tracks, album_id=album_id),
+        )
+        return self.converter.album_converter(
+            album_raw=album_data, album_tracks=album_tracks
+        )
+
+    async def _get_similar_artists(
+        self, artist_id: str
+    ) -> Optional[List[tidal.models.Artist]]:
+        try:
+            return await self.run(
+                self.tidal_session.get_artist_similar, artist_id=artist_id
+            )
+        except requests.exceptions.HTTPError:
+            return None
+
+    async def get_artist(self, artist_id: str) -> ArtistData:
+        (
+            artist_data,
+            albums,
+            ep_singles,
+            other_albums,
+            similar_artists,
+            top_tracks,
+        ) = await asyncio.gather(
+            self.run(self.tidal_session.get_artist, artist_id=artist_id),
+            self.run(self.tidal_session.get_artist_albums, artist_id=artist_id),
+            self.run(
+                self.tidal_session.get_artist_albums_ep_singles, artist_id=artist_id
+            ),
+            self.run(self.tidal_session.get_artist_albums_other, artist_id=artist_id),
+            self._get_similar_artists(artist_id),
+            self.run(self.tidal_session.get_artist_top_tracks, artist_id=artist_id),
+        )
+        return self.converter.artist_converter(
+            artist_raw=artist_data,
+            albums=albums + ep_singles + other_albums,
+            similar_artists=similar_artists,
+            top_tracks=top_tracks,
+        )
+
+    async def get_playlist(self, playlist_id: str) -> PlaylistData:
+        playlist_data, playlist_tracks = await asyncio.gather(
+            self.run(self.tidal_session.get_playlist, playlist_id=playlist_id),
+            self.run(self.tidal_session.get_playlist_tracks, playlist_id=playlist_id),
+        )
+        return self.converter.playlist_converter(
+            playlist_raw=playlist_data, playlist_tracks=playlist_tracks,
+        )
+
+    async def get_user_info(self, user_id: Optional[str] = None) -> UserInfo:
+        if user_id is None:
+            logger.warning(
+                "When using Tidal, you can only get the user from the current session"
+            )
+            user_data: tidal.User = self.tidal_session.user
+        else:
+            logger.warning(
+                "When using Tidal, you can only get the user from the current session, this will crash until it's fixed in tidalapi lib"
+            )
+            user_data = await self.run(self.tidal_session.get_user, user_id=user_id)
+        playlists, artists, albums, tracks = await asyncio.gather(
+            self.run(user_data.playlists),
+            self.run(user_data.favorites.artists),
+            self.run(user_data.favorites.albums),
+            self.run(user_data.favorites.tracks),
+        )
+        return self.converter.user_converter(
+            user_data=user_data,
+            playlists=playlists,
+            favorite_artists=artists,
+            favorite_albums=albums,
+            favorite_tracks=tracks,
+        )
+
+    async def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        similar_artists = await self._get_similar_artists(artist_id)
+        return [] if similar_artists is None else [str(a.id) for a in similar_artists]
+
+    async def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        raise NotImplementedError("Tidal does not provide similar playlists")
+
+    async def get_track_neighbors(self, track_id: str) -> List[str]:
+        similar_tracks: List[tidal.models.Track] = await self.run(
+            self.tidal_session.get_track_radio, track_id=track_id
+        )
+        return [str(t.id) for t in similar_tracks]
+
+    @classmethod
+    def from_env(cls, max_concurrency: int = 100):
+        sync_client = TidalStreamingAPIClient.from_env(concurrency=max_concurrency)
+        return cls(sync_client.tidal_session, max_concurrency=max_concurrency)
@@ -0,0 +1,337 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Collection, Dict, List, Optional, Type
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_features import AudioFeatures
+from music_graph.datamodel.lazy import LazyFieldsMixin
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+HOUR: float = 3600.0
+DAY: float = 24 * HOUR
+
+# Time to live of the cached responses, in seconds, per client method
+DEFAULT_TTLS: Dict[str, float] = {
+    "get_track": 30 * DAY,
+    "get_tracks": 30 * DAY,
+    "get_album": 30 * DAY,
+    "get_albums": 30 * DAY,
+    "get_artist": 7 * DAY,
+    "get_artists": 7 * DAY,
+    "get_playlist": DAY,
+    "get_user_info": HOUR,
+    "get_artist_neighbors": 7 * DAY,
+    "get_playlist_neighbors": DAY,
+    "get_track_neighbors": 7 * DAY,
+}
+
+
+@dataclass()
+class CacheStats:
+    hits: Dict[str, int] = field(default_factory=dict)
+    misses: Dict[str, int] = field(default_factory=dict)
+    evictions: int = 0
+
+    @property
+    def hit_count(self) -> int:
+        return sum(self.hits.values())
+
+    @property
+    def miss_count(self) -> int:
+        return sum(self.misses.values())
+
+    @property
+    def hit_rate(self) -> float:
+        total: int = self.hit_count + self.miss_count
+        return self.hit_count / total if total else 0.0
+
+
+def _encode(value: Any) -> bytes:
+    pending: List[str] = []
+    if isinstance(value, LazyFieldsMixin):
+        # Store what is loaded, the pending fields are deferred again when read
+        pending = value.pending_fields()
+        value = value.loaded_only()
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    payload: str = json.dumps([value, pending], separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def _key(data_id: str, include: Optional[Collection[str]]) -> str:
+    return data_id if include is None else f"{data_id}|{','.join(sorted(include))}"
+
+
+class CachingStreamingAPIClient(AbstractStreamingAPIClient):
+    def __init__(
+        self,
+        client: AbstractStreamingAPIClient,
+        path: str = "music_graph_cache.sqlite",
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1_000_000,
+        access_resolution: float = 60.0,
+    ) -> None:
+        """Client decorator caching the responses of another client in sqlite
+
+        The datamodel objects are stored as compressed to_dict json, and restored
+        with their from_dict. Fields not loaded yet are not stored, they are loaded
+        from the wrapped client on first access. When the cache holds more than
+        max_entries entries, the least recently used ones are evicted. The access
+        time of an entry is only written when the stored one is access_resolution
+        seconds old, so that the hits of a busy entry are mostly read-only.
+
+        Args:
+            client (AbstractStreamingAPIClient): the client to cache
+            path (str): path of the sqlite file, ":memory:" for a volatile cache
+            ttls (Optional[Dict[str, float]]): time to live in seconds per method,
+                overriding DEFAULT_TTLS
+            max_entries (int): maximum number of cached responses
+            access_resolution (float): precision in seconds of the access times
+                ordering the evictions, 0 writes the access time on every hit
+
+        Examples:
+            >>> from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+            >>> client = CachingStreamingAPIClient(
+            ...     SpotifyStreamingAPIClient.from_env(), path=":memory:"
+            ... )
+            >>> _id: str = "36QJpDe2go2KgaRleHCDTp"
+            >>> client.get_artist(_id) == client.get_artist(_id)
+            True
+            >>> client.stats.hit_count, client.stats.miss_count
+            (1, 1)
+        """
+        self.client = client
+        self.path = path
+        self.ttls: Dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.access_resolution = access_resolution
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS response_cache (
+                method TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (method, key)
+            );
+            CREATE INDEX IF NOT EXISTS response_cache_lru
+                ON response_cache (accessed_at);
+            """
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes missing on the decorator itself
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def ids_per_call(self, method: str) -> int:
+        return self.client.ids_per_call(method)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM response_cache"
+            ).fetchone()[0]
+
+    def _read(self, method: str, key: str) -> Optional[bytes]:
+        now: float = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at, accessed_at FROM response_cache "
+                "WHERE method=? AND key=?",
+                (method, key),
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttls.get(method, DAY):
+                if now - row[2] >= self.access_resolution:
+                    self._connection.execute(
+                        "UPDATE response_cache SET accessed_at=? "
+                        "WHERE method=? AND key=?",
+                        (now, method, key),
+                    )
+                self.stats.hits[method] = self.stats.hits.get(method, 0) + 1
+                return row[0]
+            self.stats.misses[method] = self.stats.misses.get(method, 0) + 1
+            return None
+
+    def _write(self, method: str, key: str, value: Any) -> None:
+        blob: bytes = _encode(value)
+        now: float = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+                (method, key, blob, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count: int = self._connection.execute(
+            "SELECT COUNT(*) FROM response_cache"
+        ).fetchone()[0]
+        excess: int = count - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM response_cache WHERE rowid IN ("
+                "SELECT rowid FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.stats.evictions += excess
+
+    def _decode(self, blob: bytes, data_type: Optional[Type]) -> Any:
+        value, pending = json.loads(zlib.decompress(blob).decode("utf-8"))
+        if data_type is None:
+            return value
+        data = data_type.from_dict(value)
+        for name in pending:
+            data.defer(
+                name,
+                partial(self._load_field, data_type, data.data_id, name),
+                unloaded=getattr(data, name),
+            )
+        return data
+
+    def _load_field(self, data_type: Type, data_id: str, name: str) -> Any:
+        if data_type is TrackData:
+            return getattr(self.client.get_track(data_id, include=()), name)
+        return getattr(self.client.get_artist(data_id, include=()), name)
+
+    def _cached(
+        self,
+        method: str,
+        key: str,
+        compute: Callable[[], Any],
+        data_type: Optional[Type] = None,
+    ) -> Any:
+        blob: Optional[bytes] = self._read(method, key)
+        if blob is not None:
+            return self._decode(blob, data_type)
+        value = compute()
+        self._write(method, key, value)
+        return value
+
+    def _cached_batch(
+        self,
+        method: str,
+        keys: List[str],
+        compute: Callable[[List[str]], List],
+        data_type: Type,
+    ) -> List:
+        found: Dict[str, Any] = {}
+        for key in keys:
+            blob: Optional[bytes] = self._read(method, key)
+            if blob is not None:
+                found[key] = self._decode(blob, data_type)
+        missing: List[str] = [k for k in keys if k not in found]
+        if missing:
+            for value in compute(missing):
+                self._write(method, value.data_id, value)
+                found[value.data_id] = value
+        return [found[k] for k in keys if k in found]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM response_cache")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def get_track(
+        self, track_id: str, include: Optional[Collection[str]] = None
+    ) -> TrackData:
+        return self._cached(
+            "get_track",
+            _key(track_id, include),
+            lambda: self.client.get_track(track_id, include=include),
+            TrackData,
+        )
+
+    def get_album(self, album_id: str) -> AlbumData:
+        return self._cached(
+            "get_album", album_id, lambda: self.client.get_album(album_id), AlbumData
+        )
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        return self._cached(
+            "get_artist",
+            _key(artist_id, include),
+            lambda: self.client.get_artist(artist_id, include=include),
+            ArtistData,
+        )
+
+    def get_playlist(self, playlist_id: str) -> PlaylistData:
+        return self._cached(
+            "get_playlist",
+            playlist_id,
+            lambda: self.client.get_playlist(playlist_id),
+            PlaylistData,
+        )
+
+    def get_user_info(self, user_id: str, **kwargs) -> UserInfo:
+        key: str = json.dumps([user_id, kwargs], sort_keys=True)
+        return self._cached(
+            "get_user_info",
+            key,
+            lambda: self.client.get_user_info(user_id, **kwargs),
+            UserInfo,
+        )
+
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        return self._cached_batch(
+            "get_tracks", track_ids, self.client.get_tracks, TrackData
+        )
+
+    def get_albums(self, album_ids: List[str]) -> List[AlbumData]:
+        return self._cached_batch(
+            "get_albums", album_ids, self.client.get_albums, AlbumData
+        )
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        return self._cached_batch(
+            "get_artists", artist_ids, self.client.get_artists, ArtistData
+        )
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        return self._cached_batch(
+            "get_audio_features",
+            track_ids,
+            self.client.get_audio_features,
+            AudioFeatures,
+        )
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        return self._cached(
+            "get_artist_neighbors",
+            artist_id,
+            lambda: self.client.get_artist_neighbors(artist_id),
+        )
+
+    def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        return self._cached(
+            "get_playlist_neighbors",
+            playlist_id,
+            lambda: self.client.get_playlist_neighbors(playlist_id),
+        )
+
+    def get_track_neighbors(self, track_id: str) -> List[str]:
+        return self._cached(
+            "get_track_neighbors",
+            track_id,
+            lambda: self.client.get_track_neighbors(track_id),
+        )
@@ -0,0 +1,141 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split items in consecutive chunks of at most size elements
+
+    The items are consumed lazily, so generators are streamed chunk by chunk.
+
+    Examples:
+        >>> list(chunks([1, 2, 3, 4, 5], 2))
+        [[1, 2], [3, 4], [5]]
+    """
+    iterator: Iterator[T] = iter(items)
+    chunk: List[T] = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def prefetched_pages(
+    first_page: Optional[T], next_page: Callable[[T], Optional[T]]
+) -> Iterator[T]:
+    """Iterate over paginated results, fetching the next page in the background
+
+    The next page is requested as soon as the current one is yielded, so the
+    request overlaps with the consumption of the current page. At most two pages
+    are held at once.
+
+    Args:
+        first_page (Optional[T]): the first page, None when there is no result
+        next_page (Callable): returns the page following the given one, or None
+
+    Returns:
+        Iterator: the pages, in order
+
+    Examples:
+        >>> list(prefetched_pages(0, lambda page: page + 1 if page < 3 else None))
+        [0, 1, 2, 3]
+    """
+    if first_page is None:
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page: Optional[T] = first_page
+        while page is not None:
+            future: Future = executor.submit(next_page, page)
+            try:
+                yield page
+            except GeneratorExit:
+                future.cancel()
+                raise
+            page = future.result()
+
+
+def bounded_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[R]:
+    """Apply func to every item with a thread pool, yielding results in input order
+
+    Args:
+        func (Callable): the function to apply, typically a client call
+        items (Iterable): the inputs, consumed lazily
+        max_workers (int): number of worker threads, 1 means sequential
+        max_in_flight (Optional[int]): maximum number of submitted but not yet
+            consumed calls, defaults to twice the number of workers
+
+    Returns:
+        Iterator: the results, in the same order as the inputs
+
+    Examples:
+        >>> list(bounded_map(lambda x: x * 2, range(5), max_workers=3))
+        [0, 2, 4, 6, 8]
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    if max_in_flight is None:
+        max_in_flight = 2 * max_workers
+    max_in_flight = max(max_in_flight, 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: Deque[Future] = deque()
+        try:
+            for item in items:
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(func, item))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def gather(calls: Sequence[Callable[[], R]], executor: Optional[Executor]) -> List[R]:
+    """Run independent calls concurrently, returning their results in order
+
+    The first call runs in the calling thread and the others in the executor.
+    A call still queued when its result is needed is cancelled and run in the
+    calling thread instead, so nested gathers on a busy executor cannot deadlock.
+
+    Args:
+        calls (Sequence[Callable]): the calls, without arguments
+        executor (Optional[Executor]): the executor, None runs them sequentially
+
+    Returns:
+        List: the results, in the same order as the calls
+
+    Examples:
+        >>> with ThreadPoolExecutor(max_workers=1) as executor:
+        ...     gather([lambda: 1, lambda: 2, lambda: 3], executor)
+        [1, 2, 3]
+    """
+    if executor is None or len(calls) <= 1:
+        return [call() for call in calls]
+    futures: List[Future] = [executor.submit(call) for call in calls[1:]]
+    try:
+        results: List[R] = [calls[0]()]
+        for call, future in zip(calls[1:], futures):
+            results.append(call() if future.cancel() else future.result())
+        return results
+    finally:
+        for future in futures:
+            future.cancel()
@@ -90,15 +90,31 @@ class TidalAPIConverter:
             duration=playlist_raw.duration,
         )
 
-    def user_converter(self, user_data: tidal.User) -> UserInfo:
+    def user_converter(
+        self,
+        user_data: tidal.User,
+        playlists: Optional[List[tidal.models.Playlist]] = None,
+        favorite_artists: Optional[List[tidal.models.Artist]] = None,
+        favorite_albums: Optional[List[tidal.models.Album]] = None,
+        favorite_tracks: Optional[List[tidal.models.Track]] = None,
+    ) -> UserInfo:
+        # The lists not given are fetched from the user, one call each
+        if playlists is None:
+            playlists = user_data.playlists()
+        if favorite_artists is None:
+            favorite_artists = user_data.favorites.artists()
+        if favorite_albums is None:
+            favorite_albums = user_data.favorites.albums()
+        if favorite_tracks is None:
+            favorite_tracks = user_data.favorites.tracks()
         return UserInfo(
             id=str(user_data.id),
             display_name=user_data.id,
             href="",  # No uri for profiles on tidal
             uri="",  # No uri for profiles on tidal
-            playlist_ids=[str(p.id) for p in user_data.playlists()],
-            artist_ids=[str(a.id) for a in user_data.favorites.artists()],
-            saved_album_ids=[str(a.id) for a in user_data.favorites.albums()],
-            saved_track_ids=[str(t.id) for t in user_data.favorites.tracks()],
+            playlist_ids=[str(p.id) for p in playlists],
+            artist_ids=[str(a.id) for a in favorite_artists],
+            saved_album_ids=[str(a.id) for a in favorite_albums],
+            saved_track_ids=[str(t.id) for t in favorite_tracks],
             top_track_ids=[],  # No top track per user on tidal
         )
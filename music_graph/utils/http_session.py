@@ -0,0 +1,108 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of hosts whose connection pool is kept, e.g. the api and the accounts
+# hosts of spotify
+POOLED_HOSTS: int = 4
+
+
+@dataclass()
+class ConnectionStats:
+    """Requests sent by a session and connections opened for them
+
+    Examples:
+        >>> ConnectionStats(requests=100, connections=8).reuse_rate
+        0.92
+    """
+
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of the requests sent over an already open connection"""
+        if self.requests == 0:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.requests)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    def __init__(self, pool_size: int = 10, max_retries: Any = 0) -> None:
+        """Http adapter keeping pool_size keep-alive connections per host
+
+        The default requests adapter keeps 10 connections, so above 10 threads
+        the extra connections are discarded once used ("Connection pool is
+        full"), and the next requests pay a new tcp and tls handshake.
+
+        Args:
+            pool_size (int): number of kept connections per host, at least the
+                number of threads issuing requests
+            max_retries: the retries of the adapter, an int or a urllib3 Retry
+        """
+        super().__init__(
+            pool_connections=POOLED_HOSTS,
+            pool_maxsize=pool_size,
+            max_retries=max_retries,
+        )
+        self._requests: int = 0
+        self._lock = threading.Lock()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        with self._lock:
+            self._requests += 1
+        return super().send(request, **kwargs)
+
+    def stats(self) -> ConnectionStats:
+        pools = self.poolmanager.pools
+        connections: int = sum(pools[key].num_connections for key in pools.keys())
+        return ConnectionStats(requests=self._requests, connections=connections)
+
+
+def pooled_session(
+    pool_size: int, session: Optional[requests.Session] = None
+) -> requests.Session:
+    """Mount a PooledHTTPAdapter on a session, keeping the retries of its adapter
+
+    Args:
+        pool_size (int): number of kept connections per host
+        session (Optional[requests.Session]): the session to pool, a new one if None
+
+    Returns:
+        requests.Session: the pooled session
+
+    Examples:
+        >>> session = pooled_session(32)
+        >>> adapter = session.get_adapter("https://api.spotify.com")
+        >>> adapter.poolmanager.connection_pool_kw["maxsize"]
+        32
+    """
+    session = session if session is not None else requests.Session()
+    retries: Any = session.get_adapter("https://").max_retries
+    adapter = PooledHTTPAdapter(pool_size=pool_size, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def connection_stats(session: requests.Session) -> ConnectionStats:
+    """Connection reuse of the pooled adapters of a session, zero if it has none"""
+    adapters: List[PooledHTTPAdapter] = list(
+        {
+            id(adapter): adapter
+            for adapter in session.adapters.values()
+            if isinstance(adapter, PooledHTTPAdapter)
+        }.values()
+    )
+    return ConnectionStats(
+        requests=sum(adapter.stats().requests for adapter in adapters),
+        connections=sum(adapter.stats().connections for adapter in adapters),
+    )
@@ -0,0 +1,237 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Dict, Hashable, List, Optional, Tuple
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_features import AudioFeatures
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+
+
+@dataclass()
+class CoalescingStats:
+    """Counters of a cache, per id except upstream_calls, one per client call"""
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    upstream_calls: int = 0
+
+    @property
+    def saved_calls(self) -> int:
+        """Number of upstream calls avoided, by the cache or by coalescing"""
+        return self.hits + self.coalesced
+
+
+class InMemoryCachingStreamingAPIClient(AbstractStreamingAPIClient):
+    def __init__(
+        self, client: AbstractStreamingAPIClient, max_entries: int = 100_000
+    ) -> None:
+        """Client decorator with an in-process LRU cache and single-flight calls
+
+        Concurrent calls for the same method and id share one upstream call: the
+        first caller runs it, the others wait for its result. The returned objects
+        are shared between callers and should not be mutated.
+
+        Args:
+            client (AbstractStreamingAPIClient): the client to cache
+            max_entries (int): maximum number of cached responses
+
+        Examples:
+            >>> from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+            >>> client = InMemoryCachingStreamingAPIClient(
+            ...     SpotifyStreamingAPIClient.from_env()
+            ... )
+            >>> _id: str = "36QJpDe2go2KgaRleHCDTp"
+            >>> client.get_artist(_id) is client.get_artist(_id)
+            True
+            >>> client.stats.saved_calls
+            1
+        """
+        self.client = client
+        self.max_entries = max_entries
+        self.stats = CoalescingStats()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, Hashable], Future] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes missing on the decorator itself
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def ids_per_call(self, method: str) -> int:
+        return self.client.ids_per_call(method)
+
+    def _cached(self, method: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        cache_key: Tuple[str, Hashable] = (method, key)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                self.stats.hits += 1
+                return self._cache[cache_key]
+            future = self._in_flight.get(cache_key)
+            is_leader: bool = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[cache_key] = future
+                self.stats.misses += 1
+                self.stats.upstream_calls += 1
+            else:
+                self.stats.coalesced += 1
+        if not is_leader:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[cache_key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            self._cache[cache_key] = value
+            del self._in_flight[cache_key]
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.stats.evictions += 1
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get_track(
+        self, track_id: str, include: Optional[Collection[str]] = None
+    ) -> TrackData:
+        return self._cached(
+            "get_track",
+            (track_id, None if include is None else frozenset(include)),
+            lambda: self.client.get_track(track_id, include=include),
+        )
+
+    def get_album(self, album_id: str) -> AlbumData:
+        return self._cached(
+            "get_album", album_id, lambda: self.client.get_album(album_id)
+        )
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        return self._cached(
+            "get_artist",
+            (artist_id, None if include is None else frozenset(include)),
+            lambda: self.client.get_artist(artist_id, include=include),
+        )
+
+    def get_playlist(self, playlist_id: str) -> PlaylistData:
+        return self._cached(
+            "get_playlist", playlist_id, lambda: self.client.get_playlist(playlist_id)
+        )
+
+    def get_user_info(self, user_id: str, **kwargs) -> UserInfo:
+        return self._cached(
+            "get_user_info",
+            (user_id, tuple(sorted(kwargs.items()))),
+            lambda: self.client.get_user_info(user_id, **kwargs),
+        )
+
+    def _cached_batch(
+        self, method: str, keys: List[str], compute: Callable[[List[str]], List]
+    ) -> List:
+        """Serve a batch from the cache, fetching the missing ids in one call
+
+        The ids already in flight, in another batch, are waited for instead of
+        being fetched again. The ids unknown to the client are not cached.
+        """
+        found: Dict[str, Any] = {}
+        # The futures of the ids fetched by this batch, and of the ones awaited
+        owned: Dict[str, Future] = {}
+        awaited: Dict[str, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cache_key: Tuple[str, Hashable] = (method, key)
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    found[key] = self._cache[cache_key]
+                    self.stats.hits += 1
+                elif cache_key in self._in_flight:
+                    awaited[key] = self._in_flight[cache_key]
+                    self.stats.coalesced += 1
+                else:
+                    owned[key] = self._in_flight[cache_key] = Future()
+                    self.stats.misses += 1
+            if owned:
+                self.stats.upstream_calls += 1
+        if owned:
+            try:
+                values: List = compute(list(owned))
+            except BaseException as error:
+                with self._lock:
+                    for key in owned:
+                        del self._in_flight[(method, key)]
+                for future in owned.values():
+                    future.set_exception(error)
+                raise
+            with self._lock:
+                for value in values:
+                    self._cache[(method, value.data_id)] = value
+                    found[value.data_id] = value
+                for key in owned:
+                    del self._in_flight[(method, key)]
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                    self.stats.evictions += 1
+            for key, future in owned.items():
+                future.set_result(found.get(key))
+        # Owned ids are resolved first, so two batches never wait on each other
+        for key, future in awaited.items():
+            value: Any = future.result()
+            if value is not None:
+                found[key] = value
+        return [found[k] for k in keys if k in found]
+
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        return self._cached_batch("get_tracks", track_ids, self.client.get_tracks)
+
+    def get_albums(self, album_ids: List[str]) -> List[AlbumData]:
+        return self._cached_batch("get_albums", album_ids, self.client.get_albums)
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        return self._cached_batch("get_artists", artist_ids, self.client.get_artists)
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        return self._cached_batch(
+            "get_audio_features", track_ids, self.client.get_audio_features
+        )
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        return self._cached(
+            "get_artist_neighbors",
+            artist_id,
+            lambda: self.client.get_artist_neighbors(artist_id),
+        )
+
+    def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        return self._cached(
+            "get_playlist_neighbors",
+            playlist_id,
+            lambda: self.client.get_playlist_neighbors(playlist_id),
+        )
+
+    def get_track_neighbors(self, track_id: str) -> List[str]:
+        return self._cached(
+            "get_track_neighbors",
+            track_id,
+            lambda: self.client.get_track_neighbors(track_id),
+        )
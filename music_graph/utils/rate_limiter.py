@@ -0,0 +1,266 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+GLOBAL_BUDGET: str = "global"
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Token bucket where callers reserve a token and wait for it if needed
+
+        Tokens can go negative: each reservation returns the time to wait before
+        its token is available, so waiting happens outside of any lock and works
+        the same for threads and asyncio tasks.
+
+        Args:
+            rate (float): tokens added per second
+            capacity (float): maximum number of tokens, i.e. the allowed burst
+            clock (Callable): monotonic clock, in seconds
+
+        Examples:
+            >>> now = [0.0]
+            >>> bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0])
+            >>> [bucket.reserve() for _ in range(4)]
+            [0.0, 0.0, 0.5, 1.0]
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated_at = clock()
+
+    def _refill(self) -> None:
+        now: float = self.clock()
+        refilled: float = (now - self.updated_at) * self.rate
+        self.tokens = min(self.capacity, self.tokens + refilled)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+@dataclass()
+class RateLimitStats:
+    throughput: float
+    queue_depth: int
+    rate_limited: int
+    retried: int
+    rates: Dict[str, float] = field(default_factory=dict)
+
+
+def retry_after_from_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Tell whether an error is a 429 and return its Retry-After, in seconds
+
+    Handles spotipy.SpotifyException (http_status, headers) and
+    requests.HTTPError (response.status_code, response.headers), used by tidalapi.
+
+    Examples:
+        >>> class SpotifyError(Exception):
+        ...     http_status = 429
+        ...     headers = {"Retry-After": "3"}
+        >>> retry_after_from_error(SpotifyError())
+        (True, 3.0)
+        >>> retry_after_from_error(ValueError())
+        (False, None)
+    """
+    response = getattr(error, "response", None)
+    status: Optional[int] = getattr(error, "http_status", None)
+    headers: Optional[Dict] = getattr(error, "headers", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+        headers = getattr(response, "headers", None)
+    if status != 429:
+        return False, None
+    headers = headers or {}
+    retry_after = headers.get("Retry-After", headers.get("retry-after"))
+    try:
+        return True, None if retry_after is None else float(retry_after)
+    except ValueError:
+        # Retry-After can also be an http date, fallback on the backoff
+        return True, None
+
+
+class RateLimitScheduler:
+    def __init__(
+        self,
+        rate: float = 10.0,
+        capacity: Optional[float] = None,
+        endpoint_budgets: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        min_rate: float = 0.1,
+        rate_increase: float = 0.1,
+        rate_decrease: float = 0.5,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        """Request budget shared by every thread and task using the same instance
+
+        Every call takes a token from the global bucket and from its endpoint
+        bucket when one is configured. On a 429 the scheduler pauses every call for
+        the Retry-After duration (or an exponential backoff with full jitter when
+        missing), halves the rates and retries; rates then grow back additively
+        with each success, up to their configured value.
+
+        Args:
+            rate (float): global requests per second
+            capacity (Optional[float]): global burst size, defaults to rate
+            endpoint_budgets (Optional[Dict[str, Tuple[float, float]]]): additional
+                (rate, capacity) per endpoint, e.g. {"audio_analysis": (1.0, 2.0)}.
+                Endpoints are named after the raw client method.
+            max_retries (int): retries of a rate limited call before raising
+            base_backoff (float): backoff of the first retry without Retry-After
+            max_backoff (float): maximum backoff without Retry-After
+            min_rate (float): lower bound of the adaptive rates
+            rate_increase (float): requests per second added after each success
+            rate_decrease (float): rate multiplier applied after each 429
+            window (float): time window of the throughput measure, in seconds
+            clock (Callable): monotonic clock, in seconds
+            sleep (Callable): blocking sleep used by the sync calls
+
+        Examples:
+            >>> scheduler = RateLimitScheduler(rate=100.0)
+            >>> scheduler.call("artist", lambda artist_id: artist_id, "x")
+            'x'
+            >>> scheduler.stats().queue_depth
+            0
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.rate_decrease = rate_decrease
+        self.window = window
+        self.buckets: Dict[str, TokenBucket] = {
+            GLOBAL_BUDGET: TokenBucket(rate, capacity or rate, clock=clock)
+        }
+        for endpoint, (endpoint_rate, endpoint_capacity) in (
+            endpoint_budgets or {}
+        ).items():
+            self.buckets[endpoint] = TokenBucket(
+                endpoint_rate, endpoint_capacity, clock=clock
+            )
+        self.paused_until: float = clock()
+        self.queue_depth: int = 0
+        self.rate_limited: int = 0
+        self.retried: int = 0
+        self._completed: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _buckets(self, endpoint: str) -> Tuple[TokenBucket, ...]:
+        if endpoint in self.buckets:
+            return self.buckets[GLOBAL_BUDGET], self.buckets[endpoint]
+        return (self.buckets[GLOBAL_BUDGET],)
+
+    def reserve(self, endpoint: str) -> float:
+        """Reserve a request slot and return the time to wait before using it"""
+        with self._lock:
+            delays = [bucket.reserve() for bucket in self._buckets(endpoint)]
+            self.queue_depth += 1
+            return max(max(delays), self.paused_until - self.clock(), 0.0)
+
+    def _started(self) -> None:
+        with self._lock:
+            self.queue_depth -= 1
+
+    def on_success(self, endpoint: str) -> None:
+        with self._lock:
+            now: float = self.clock()
+            self._completed.append(now)
+            while self._completed and self._completed[0] < now - self.window:
+                self._completed.popleft()
+            for bucket in self._buckets(endpoint):
+                bucket.rate = min(bucket.max_rate, bucket.rate + self.rate_increase)
+
+    def on_error(
+        self, endpoint: str, error: BaseException, attempt: int
+    ) -> Optional[float]:
+        """Register a failed call, return the retry delay or None to raise it"""
+        is_rate_limited, retry_after = retry_after_from_error(error)
+        if not is_rate_limited or attempt >= self.max_retries:
+            return None
+        if retry_after is None:
+            retry_after = random.uniform(  # nosec
+                0, min(self.max_backoff, self.base_backoff * 2 ** attempt)
+            )
+        with self._lock:
+            self.rate_limited += 1
+            self.retried += 1
+            for bucket in self._buckets(endpoint):
+                bucket.rate = max(self.min_rate, bucket.rate * self.rate_decrease)
+            self.paused_until = max(self.paused_until, self.clock() + retry_after)
+        return retry_after
+
+    def call(self, endpoint: str, func: Callable[..., T], *args, **kwargs) -> T:
+        attempt: int = 0
+        while True:
+            delay: float = self.reserve(endpoint)
+            try:
+                if delay > 0:
+                    self.sleep(delay)
+            finally:
+                self._started()
+            try:
+                result: T = func(*args, **kwargs)
+            except Exception as error:
+                if self.on_error(endpoint, error, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            self.on_success(endpoint)
+            return result
+
+    async def acall(
+        self, endpoint: str, func: Callable[..., Awaitable[T]], *args, **kwargs
+    ) -> T:
+        attempt: int = 0
+        while True:
+            delay: float = self.reserve(endpoint)
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            finally:
+                self._started()
+            try:
+                result: T = await func(*args, **kwargs)
+            except Exception as error:
+                if self.on_error(endpoint, error, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            self.on_success(endpoint)
+            return result
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second over the last window"""
+        with self._lock:
+            now: float = self.clock()
+            completed: int = sum(1 for t in self._completed if t >= now - self.window)
+        return completed / self.window
+
+    def stats(self) -> RateLimitStats:
+        return RateLimitStats(
+            throughput=self.throughput,
+            queue_depth=self.queue_depth,
+            rate_limited=self.rate_limited,
+            retried=self.retried,
+            rates={name: bucket.rate for name, bucket in self.buckets.items()},
+        )
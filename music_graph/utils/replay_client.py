@@ -0,0 +1,304 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+import spotipy
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.album import AlbumData
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_features import AudioFeatures
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+from music_graph.utils.tidal_client import TidalStreamingAPIClient
+from music_graph.utils.tidal_session import PooledTidalSession
+
+# Query parameters identifying a response, the others (limit, market...) are ignored
+IDENTITY_PARAMS = ("ids", "seed_tracks", "filter", "type", "after", "offset")
+
+
+def request_key(url: str, params: Optional[Dict] = None) -> str:
+    """Key of a recorded response, the api path and its identity parameters
+
+    Examples:
+        >>> request_key("https://api.spotify.com/v1/artists/?ids=b,a", {"limit": 2})
+        'artists?ids=b,a'
+        >>> request_key("artists/1/albums", {"filter": "COMPILATIONS", "offset": 0})
+        'artists/1/albums?filter=COMPILATIONS'
+    """
+    split = urlsplit(url)
+    path: str = split.path.split("/v1/", 1)[-1].strip("/")
+    query: Dict[str, Any] = dict(parse_qsl(split.query))
+    query.update({k: v for k, v in (params or {}).items() if v is not None})
+    identity: List[str] = [
+        f"{name}={query[name]}"
+        for name in IDENTITY_PARAMS
+        if name in query and not (name == "offset" and str(query[name]) == "0")
+    ]
+    return path if not identity else f"{path}?{'&'.join(identity)}"
+
+
+def load_payloads(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_payloads(payloads: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(payloads, file)
+
+
+def _response(
+    request: requests.PreparedRequest, status: int, payload: Any, headers: Dict
+) -> requests.Response:
+    response = requests.Response()
+    response.request = request
+    response.url = request.url
+    response.status_code = status
+    response.reason = "OK" if status < 400 else "Replayed error"
+    response.headers.update({"Content-Type": "application/json", **headers})
+    response.encoding = "utf-8"
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+class RecordingHTTPSession(requests.Session):
+    """Http session storing the successful json responses by request_key
+
+    Pass it to spotipy.Spotify(requests_session=...) or as the http session of a
+    PooledTidalSession, then save_payloads(session.payloads, path).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.payloads: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, **kwargs) -> requests.Response:
+        response: requests.Response = super().request(
+            method, url, params=params, **kwargs
+        )
+        if response.ok and response.content:
+            with self._lock:
+                self.payloads[request_key(url, params)] = response.json()
+        return response
+
+
+@dataclass()
+class ReplayStats:
+    requests: int = 0
+    injected_errors: int = 0
+    missing: int = 0
+
+
+class ReplayHTTPSession(requests.Session):
+    def __init__(
+        self,
+        payloads: Dict[str, Any],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rates: Optional[Dict[int, float]] = None,
+        retry_after: float = 0.0,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        """Http session answering from recorded payloads instead of the network
+
+        A request missing from the payloads gets a 404, except multi-id requests
+        which are assembled from the single entity payloads, e.g. "artists?ids=a,b"
+        from "artists/a" and "artists/b".
+
+        Args:
+            payloads (Dict[str, Any]): json responses by request_key
+            latency (float): delay of each response, in seconds
+            jitter (float): additional uniform random delay, in seconds
+            error_rates (Optional[Dict[int, float]]): probability of answering each
+                http status instead of the payload, e.g. {429: 0.01, 500: 0.001}
+            retry_after (float): Retry-After header of the injected 429
+            seed (Optional[int]): seed of the jitter and error draws
+            sleep (Callable): blocking sleep used for the latency
+        """
+        super().__init__()
+        self.payloads = payloads
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates: Dict[int, float] = error_rates or {}
+        self.retry_after = retry_after
+        self.sleep = sleep
+        self.stats = ReplayStats()
+        self._random = random.Random(seed)  # nosec
+        self._lock = threading.Lock()
+
+    def _draw(self) -> Tuple[float, Optional[int]]:
+        with self._lock:
+            self.stats.requests += 1
+            delay: float = self.latency + self._random.uniform(0, self.jitter)
+            draw: float = self._random.random()
+            for status, rate in self.error_rates.items():
+                if draw < rate:
+                    self.stats.injected_errors += 1
+                    return delay, status
+                draw -= rate
+        return delay, None
+
+    def _payload(self, key: str) -> Any:
+        if key in self.payloads:
+            return self.payloads[key]
+        path, _, query = key.partition("?")
+        ids: Optional[str] = dict(parse_qsl(query)).get("ids")
+        if ids is None:
+            return None
+        # Unknown ids are null in the spotify multi-id responses, whose key is the
+        # path with underscores, e.g. "audio_features"
+        return {
+            path.replace("-", "_"): [
+                self.payloads.get(f"{path}/{_id}") for _id in ids.split(",")
+            ]
+        }
+
+    def request(self, method, url, params=None, **kwargs) -> requests.Response:
+        request = requests.Request(method, url, params=params).prepare()
+        delay, status = self._draw()
+        if delay > 0:
+            self.sleep(delay)
+        if status is not None:
+            headers = {"Retry-After": str(self.retry_after)} if status == 429 else {}
+            message: str = f"Replayed error {status}"
+            error: Dict = {"error": {"status": status, "message": message}}
+            return _response(
+                request, status, {**error, "userMessage": message}, headers
+            )
+        key: str = request_key(url, params)
+        payload: Any = self._payload(key)
+        if payload is None:
+            with self._lock:
+                self.stats.missing += 1
+            message = f"No replayed payload for {key}"
+            error = {"error": {"status": 404, "message": message}}
+            return _response(request, 404, {**error, "userMessage": message}, {})
+        return _response(request, 200, payload, {})
+
+
+class ReplayStreamingAPIClient(AbstractStreamingAPIClient):
+    def __init__(
+        self,
+        payloads: Dict[str, Any],
+        source: str = "spotify",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rates: Optional[Dict[int, float]] = None,
+        retry_after: float = 0.0,
+        seed: Optional[int] = None,
+        max_workers: int = 6,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        """Offline client serving recorded or synthetic payloads
+
+        The payloads go through the real spotipy or tidalapi client and the usual
+        from_spotify_dict or TidalAPIConverter paths, only the http layer is
+        replayed. Injected errors are real http errors, so they raise
+        spotipy.SpotifyException or requests.HTTPError like the live apis.
+
+        Args:
+            payloads (Dict[str, Any]): json responses by request_key, recorded with
+                a RecordingHTTPSession or built by synthetic_payloads
+            source (str): "spotify" or "tidal"
+            latency (float): delay of each http response, in seconds
+            jitter (float): additional uniform random delay, in seconds
+            error_rates (Optional[Dict[int, float]]): probability of answering each
+                http status instead of the payload
+            retry_after (float): Retry-After header of the injected 429
+            seed (Optional[int]): seed of the jitter and error draws
+            max_workers (int): threads of the tidal client sub-requests
+            scheduler (Optional[RateLimitScheduler]): rate limit scheduler of the
+                client, which retries the injected 429
+
+        Examples:
+            >>> from music_graph.utils.synthetic_payloads import synthetic_payloads
+            >>> client = ReplayStreamingAPIClient(synthetic_payloads("spotify", 3))
+            >>> client.get_artist("artist0").similar_artist_ids
+            ['artist1', 'artist2']
+            >>> payloads = synthetic_payloads("tidal", 3)
+            >>> client = ReplayStreamingAPIClient(payloads, source="tidal")
+            >>> client.get_artist_neighbors("artist0")
+            ['artist1', 'artist2']
+        """
+        self.http = ReplayHTTPSession(
+            payloads,
+            latency=latency,
+            jitter=jitter,
+            error_rates=error_rates,
+            retry_after=retry_after,
+            seed=seed,
+        )
+        self.source = source
+        if source == "spotify":
+            spotify = spotipy.Spotify(requests_session=self.http)
+            self.client: AbstractStreamingAPIClient = SpotifyStreamingAPIClient(
+                spotify, scheduler=scheduler
+            )
+        elif source == "tidal":
+            tidal_session = PooledTidalSession()
+            tidal_session.http = self.http
+            self.client = TidalStreamingAPIClient(
+                tidal_session, scheduler=scheduler, max_workers=max_workers
+            )
+        else:
+            raise ValueError(f"Unknown source {source}, use spotify or tidal")
+
+    @property
+    def stats(self) -> ReplayStats:
+        return self.http.stats
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes missing on the replay client itself
+        if name in ("client", "http"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def ids_per_call(self, method: str) -> int:
+        return self.client.ids_per_call(method)
+
+    def get_track(self, track_id: str, include=None) -> TrackData:
+        return self.client.get_track(track_id, include=include)
+
+    def get_album(self, album_id: str) -> AlbumData:
+        return self.client.get_album(album_id)
+
+    def get_artist(self, artist_id: str, include=None) -> ArtistData:
+        return self.client.get_artist(artist_id, include=include)
+
+    def get_playlist(self, playlist_id: str) -> PlaylistData:
+        return self.client.get_playlist(playlist_id)
+
+    def get_user_info(self, user_id: str, **kwargs) -> UserInfo:
+        return self.client.get_user_info(user_id, **kwargs)
+
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        return self.client.get_tracks(track_ids)
+
+    def get_albums(self, album_ids: List[str]) -> List[AlbumData]:
+        return self.client.get_albums(album_ids)
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        return self.client.get_artists(artist_ids)
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        return self.client.get_audio_features(track_ids)
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        return self.client.get_artist_neighbors(artist_id)
+
+    def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        return self.client.get_playlist_neighbors(playlist_id)
+
+    def get_track_neighbors(self, track_id: str) -> List[str]:
+        return self.client.get_track_neighbors(track_id)
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Tuple, Union
+from functools import partial
+from typing import Callable, Collection, Dict, Iterator, List, Optional, Tuple, Union
 
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
@@ -6,20 +7,76 @@ from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
 from music_graph.abstract.client import AbstractStreamingAPIClient
 from music_graph.datamodel.album import AlbumData
 from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_analysis import parse_audio_analysis
+from music_graph.datamodel.audio_features import AudioFeatures
 from music_graph.datamodel.playlist import PlaylistData
 from music_graph.datamodel.track import TrackData
 from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.concurrency import chunks, prefetched_pages
+from music_graph.utils.http_session import (
+    ConnectionStats,
+    connection_stats,
+    pooled_session,
+)
+from music_graph.utils.rate_limiter import RateLimitScheduler
+
+# Maximum number of ids accepted by the spotify multi-id endpoints
+MAX_TRACKS_PER_CALL: int = 50
+MAX_ARTISTS_PER_CALL: int = 50
+MAX_ALBUMS_PER_CALL: int = 20
+MAX_AUDIO_FEATURES_PER_CALL: int = 100
+
+# Largest page size of the user library endpoints
+LIBRARY_PAGE_SIZE: int = 50
+
+# Spotipy method and key of the paging object in its response, by UserInfo field
+LIBRARY_ENDPOINTS: Dict[str, Tuple[str, Optional[str]]] = {
+    "playlist_ids": ("current_user_playlists", None),
+    "artist_ids": ("current_user_followed_artists", "artists"),
+    "top_track_ids": ("current_user_top_tracks", None),
+    "saved_track_ids": ("current_user_saved_tracks", None),
+    "saved_album_ids": ("current_user_saved_albums", None),
+}
+
+# Sub-resources needing their own call, which can be left out with include
+TRACK_SUB_RESOURCES: Tuple[str, ...] = ("audio_analysis",)
+ARTIST_SUB_RESOURCES: Tuple[str, ...] = ("albums", "top_tracks", "similar_artists")
 
 
 class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
-    def __init__(self, spotify_client: spotipy.Spotify) -> None:
+    def __init__(
+        self,
+        spotify_client: spotipy.Spotify,
+        scheduler: Optional[RateLimitScheduler] = None,
+        columnar_analysis: bool = False,
+        compressed_analysis: bool = False,
+    ) -> None:
+        """Spotify client
+
+        Args:
+            spotify_client (spotipy.Spotify): the spotipy client
+            scheduler (Optional[RateLimitScheduler]): rate limit scheduler, to share
+                a request budget between clients, threads and tasks
+            columnar_analysis (bool): whether the track audio analyses are
+                ColumnarAudioAnalysis, which requires numpy
+            compressed_analysis (bool): whether the track audio analyses are kept
+                compressed until their first use, see CompressedAudioAnalysis
+        """
         self.spotify_client = spotify_client
+        self.scheduler = scheduler
+        self.columnar_analysis = columnar_analysis
+        self.compressed_analysis = compressed_analysis
 
-    def get_track(self, track_id: str) -> TrackData:
+    def get_track(
+        self, track_id: str, include: Optional[Collection[str]] = None
+    ) -> TrackData:
         """Get track data in the TrackData format from spotify client
 
         Args:
             track_id (str): the id of a track
+            include (Optional[Collection[str]]): sub-resources to load now among
+                TRACK_SUB_RESOURCES, default to all. The others are loaded on
+                first access.
 
         Returns:
             TrackData: The track data
@@ -32,12 +89,40 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             True
             >>> track_data.id
             '6rqhFgbbKwnb9MLmUQDhG6'
+            >>> track_data = client.get_track(_id, include=())
+            >>> track_data.is_loaded("audio_analysis")
+            False
         """
-        track_data: Dict = self.spotify_client.track(track_id=track_id)
-        audio_analysis: Dict = self.spotify_client.audio_analysis(track_id=track_id)
-        return TrackData.from_spotify_dict(
-            track_id=track_id, track_data=track_data, audio_analysis=audio_analysis,
+        track_data: Dict = self._request(self.spotify_client.track, track_id=track_id)
+        return self._build_track(track_id, track_data, include)
+
+    def _build_track(
+        self, track_id: str, track_data: Dict, include: Optional[Collection[str]]
+    ) -> TrackData:
+        include = TRACK_SUB_RESOURCES if include is None else include
+        audio_analysis: Optional[Dict] = None
+        if "audio_analysis" in include:
+            audio_analysis = self._get_audio_analysis(track_id)
+        track = TrackData.from_spotify_dict(
+            track_id=track_id,
+            track_data=track_data,
+            audio_analysis=audio_analysis,
+            columnar_analysis=self.columnar_analysis,
+            compressed_analysis=self.compressed_analysis,
         )
+        if "audio_analysis" not in include:
+            track.defer(
+                "audio_analysis",
+                lambda: parse_audio_analysis(
+                    self._get_audio_analysis(track_id),
+                    self.columnar_analysis,
+                    self.compressed_analysis,
+                ),
+            )
+        return track
+
+    def _get_audio_analysis(self, track_id: str) -> Dict:
+        return self._request(self.spotify_client.audio_analysis, track_id=track_id)
 
     def get_album(self, album_id: str) -> AlbumData:
         """Get album data in the AlbumData format from spotify client
@@ -57,14 +142,19 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             >>> album_data.id
             '3a0UOgDWw2pTajw85QPMiz'
         """
-        album_data: Dict = self.spotify_client.album(album_id=album_id)
+        album_data: Dict = self._request(self.spotify_client.album, album_id=album_id)
         return AlbumData.from_spotify_dict(album_id, album_data)
 
-    def get_artist(self, artist_id: str) -> ArtistData:
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
         """Get artist data in the AlbumData format from spotify client
 
         Args:
             artist_id (str): the id of an artist
+            include (Optional[Collection[str]]): sub-resources to load now among
+                ARTIST_SUB_RESOURCES, default to all. The others are loaded on
+                first access.
 
         Returns:
             ArtistData: The artist data
@@ -77,20 +167,159 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             True
             >>> artist_data.id
             '36QJpDe2go2KgaRleHCDTp'
+            >>> artist_data = client.get_artist(_id, include=("similar_artists",))
+            >>> artist_data.is_loaded("album_ids")
+            False
         """
-        artist_data: Dict = self.spotify_client.artist(artist_id=artist_id)
-        album_data: Dict = self.spotify_client.artist_albums(artist_id=artist_id)
-        top_tracks: Dict = self.spotify_client.artist_top_tracks(artist_id=artist_id)
-        similar_artists: Dict = self.spotify_client.artist_related_artists(
-            artist_id=artist_id
+        artist_data: Dict = self._request(
+            self.spotify_client.artist, artist_id=artist_id
+        )
+        return self._build_artist(artist_id, artist_data, include)
+
+    def _build_artist(
+        self, artist_id: str, artist_data: Dict, include: Optional[Collection[str]]
+    ) -> ArtistData:
+        include = ARTIST_SUB_RESOURCES if include is None else include
+        # sub-resource: (ArtistData field, raw spotify call)
+        sub_resources: Dict[str, Tuple[str, Callable[..., Dict]]] = {
+            "albums": ("album_ids", self.spotify_client.artist_albums),
+            "top_tracks": ("top_track_ids", self.spotify_client.artist_top_tracks),
+            "similar_artists": (
+                "similar_artist_ids",
+                self.spotify_client.artist_related_artists,
+            ),
+        }
+        loaded: Dict[str, Dict] = {
+            name: self._request(call, artist_id=artist_id)
+            for name, (_, call) in sub_resources.items()
+            if name in include
+        }
+        artist = ArtistData.from_spotify_dict(
+            artist_id=artist_id, artist_data=artist_data, **loaded
         )
-        return ArtistData.from_spotify_dict(
-            artist_id=artist_id,
-            artist_data=artist_data,
-            top_tracks=top_tracks,
-            similar_artists=similar_artists,
-            albums=album_data,
+        for name, (field_name, call) in sub_resources.items():
+            if name not in include:
+                artist.defer(
+                    field_name,
+                    partial(
+                        self._load_artist_field, artist_data, name, field_name, call
+                    ),
+                    unloaded=[],
+                )
+        return artist
+
+    def _load_artist_field(
+        self, artist_data: Dict, name: str, field_name: str, call: Callable[..., Dict]
+    ) -> List[str]:
+        artist_id: str = artist_data["id"]
+        sub_resource: Dict = self._request(call, artist_id=artist_id)
+        artist = ArtistData.from_spotify_dict(
+            artist_id=artist_id, artist_data=artist_data, **{name: sub_resource}
         )
+        return getattr(artist, field_name)
+
+    def ids_per_call(self, method: str) -> int:
+        return {
+            "get_tracks": MAX_TRACKS_PER_CALL,
+            "get_albums": MAX_ALBUMS_PER_CALL,
+            "get_artists": MAX_ARTISTS_PER_CALL,
+            "get_audio_features": MAX_AUDIO_FEATURES_PER_CALL,
+        }.get(method, 1)
+
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        """Get several tracks with the multi-id endpoint, 50 ids per call
+
+        The audio analysis has no multi-id endpoint, it is loaded on first access.
+
+        Args:
+            track_ids (List[str]): the ids of the tracks
+
+        Returns:
+            List[TrackData]: The track data, unknown ids are skipped
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env()
+            >>> data: List[TrackData] = client.get_tracks(["6rqhFgbbKwnb9MLmUQDhG6"])
+            >>> [d.id for d in data]
+            ['6rqhFgbbKwnb9MLmUQDhG6']
+        """
+        return [
+            self._build_track(t["id"], t, include=())
+            for chunk in chunks(track_ids, MAX_TRACKS_PER_CALL)
+            for t in self._request(self.spotify_client.tracks, chunk)["tracks"]
+            if t is not None
+        ]
+
+    def get_albums(self, album_ids: List[str]) -> List[AlbumData]:
+        """Get several albums with the multi-id endpoint, 20 ids per call
+
+        Args:
+            album_ids (List[str]): the ids of the albums
+
+        Returns:
+            List[AlbumData]: The album data, unknown ids are skipped
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env()
+            >>> data: List[AlbumData] = client.get_albums(["3a0UOgDWw2pTajw85QPMiz"])
+            >>> [d.id for d in data]
+            ['3a0UOgDWw2pTajw85QPMiz']
+        """
+        return [
+            AlbumData.from_spotify_dict(a["id"], a)
+            for chunk in chunks(album_ids, MAX_ALBUMS_PER_CALL)
+            for a in self._request(self.spotify_client.albums, chunk)["albums"]
+            if a is not None
+        ]
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        """Get several artists with the multi-id endpoint, 50 ids per call
+
+        Albums, top tracks and similar artists have no multi-id endpoint, they are
+        loaded on first access.
+
+        Args:
+            artist_ids (List[str]): the ids of the artists
+
+        Returns:
+            List[ArtistData]: The artist data, unknown ids are skipped
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env()
+            >>> data: List[ArtistData] = client.get_artists(["36QJpDe2go2KgaRleHCDTp"])
+            >>> [d.id for d in data]
+            ['36QJpDe2go2KgaRleHCDTp']
+        """
+        return [
+            self._build_artist(a["id"], a, include=())
+            for chunk in chunks(artist_ids, MAX_ARTISTS_PER_CALL)
+            for a in self._request(self.spotify_client.artists, chunk)["artists"]
+            if a is not None
+        ]
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        """Get the audio features of several tracks, 100 ids per call
+
+        Much cheaper than the audio analysis, which has one call per track.
+
+        Args:
+            track_ids (List[str]): the ids of the tracks
+
+        Returns:
+            List[AudioFeatures]: The audio features, unknown ids are skipped
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env()
+            >>> features = client.get_audio_features(["6rqhFgbbKwnb9MLmUQDhG6"])
+            >>> [f.data_id for f in features]
+            ['6rqhFgbbKwnb9MLmUQDhG6']
+        """
+        return [
+            AudioFeatures.from_spotify_dict(f)
+            for chunk in chunks(track_ids, MAX_AUDIO_FEATURES_PER_CALL)
+            for f in self._request(self.spotify_client.audio_features, chunk)
+            if f is not None
+        ]
 
     def get_playlist(self, playlist_id: str) -> PlaylistData:
         """Get playlist data in the PlaylistData format from spotify client
@@ -110,9 +339,34 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             >>> playlist_data.id
             '37i9dQZEVXcSOuWCN1KpTh'
         """
-        playlist_data: Dict = self.spotify_client.playlist(playlist_id=playlist_id)
+        playlist_data: Dict = self._request(
+            self.spotify_client.playlist, playlist_id=playlist_id
+        )
         return PlaylistData.from_spotify_dict(playlist_data)
 
+    def get_playlist_snapshot_id(self, playlist_id: str) -> str:
+        """Get the current snapshot id of a playlist, without its tracks
+
+        The snapshot id changes with every modification of the playlist, so an
+        unchanged snapshot id means the playlist does not need to be fetched again.
+
+        Args:
+            playlist_id (str): the id of a playlist
+
+        Returns:
+            str: The snapshot id of the playlist
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env()
+            >>> _id: str = "37i9dQZEVXcSOuWCN1KpTh"
+            >>> isinstance(client.get_playlist_snapshot_id(_id), str)
+            True
+        """
+        playlist_data: Dict = self._request(
+            self.spotify_client.playlist, playlist_id=playlist_id, fields="snapshot_id"
+        )
+        return playlist_data["snapshot_id"]
+
     def get_user_info(self, user_id: str, is_current_user: bool = False) -> UserInfo:
         """Get playlist data in the PlaylistData format from spotify client
 
@@ -139,30 +393,76 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             >>> user_info.id
             '21b3bhuunakbsyzphqnu4rpty'
         """
-        user_data: Dict = self.spotify_client.user(user=user_id)
+        user_data: Dict = self._request(self.spotify_client.user, user=user_id)
         if is_current_user:
-            artists_data: Optional[
-                Dict
-            ] = self.spotify_client.current_user_followed_artists()
-            playlist_data: Optional[Dict] = self.spotify_client.current_user_playlists()
-            top_tracks: Optional[Dict] = self.spotify_client.current_user_top_tracks()
-            saved_tracks: Optional[
-                Dict
-            ] = self.spotify_client.current_user_saved_tracks()
-            saved_albums: Optional[
-                Dict
-            ] = self.spotify_client.current_user_saved_albums()
-            return UserInfo.from_spotify_dict(
+            return UserInfo.from_spotify_pages(
                 user_data,
-                artists_data=artists_data,
-                playlist_data=playlist_data,
-                top_tracks=top_tracks,
-                saved_tracks=saved_tracks,
-                saved_albums=saved_albums,
+                {name: self.iter_library_pages(name) for name in LIBRARY_ENDPOINTS},
             )
         else:
             return UserInfo.from_spotify_dict(user_data)
 
+    def iter_pages(
+        self, page: Optional[Dict], key: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Iterate over every page of a paginated response
+
+        The next page is requested while the current one is consumed.
+
+        Args:
+            page (Optional[Dict]): the first response
+            key (Optional[str]): key of the paging object when the response wraps
+                it, e.g. "artists" for the followed artists
+
+        Returns:
+            Iterator[Dict]: the paging objects
+        """
+
+        def unwrap(response: Optional[Dict]) -> Optional[Dict]:
+            return response if response is None or key is None else response[key]
+
+        def next_page(current: Dict) -> Optional[Dict]:
+            return unwrap(self._request(self.spotify_client.next, current))
+
+        return prefetched_pages(unwrap(page), next_page)
+
+    def iter_library_pages(self, library: str) -> Iterator[Dict]:
+        """Iterate over the pages of a library of the current user
+
+        Nothing is requested before the first page is consumed.
+
+        Args:
+            library (str): the UserInfo field of the library, among
+                LIBRARY_ENDPOINTS, e.g. "saved_track_ids"
+
+        Returns:
+            Iterator[Dict]: the paging objects
+        """
+        method_name, key = LIBRARY_ENDPOINTS[library]
+        first_page: Optional[Dict] = self._request(
+            getattr(self.spotify_client, method_name), limit=LIBRARY_PAGE_SIZE
+        )
+        yield from self.iter_pages(first_page, key=key)
+
+    def iter_library_ids(self, library: str) -> Iterator[str]:
+        """Stream the ids of a library of the current user, e.g. to a graph builder
+
+        Args:
+            library (str): the UserInfo field of the library, e.g. "saved_track_ids"
+
+        Returns:
+            Iterator[str]: the ids
+
+        Examples:
+            >>> client = SpotifyStreamingAPIClient.from_env(scope="user-library-read")
+            >>> track_ids = client.iter_library_ids("saved_track_ids")
+            >>> isinstance(next(track_ids), str)
+            True
+        """
+        return UserInfo.ids_from_spotify_pages(
+            library, self.iter_library_pages(library)
+        )
+
     def get_artist_neighbors(self, artist_id: str) -> List[str]:
         """Get similar artists
 
@@ -181,8 +481,8 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             >>> ids
             ['568ZhdwyaiCyOGJRtNYhWf', '776Uo845nYHJpNaStv1Ds4', '22WZ7M8sxp5THdruNY3gXt', '74oJ4qxwOZvX6oSsu1DGnw', '4MVyzYMgTwdP7Z49wAZHx0', '67ea9eGLXYMsO2eYQRui3w', '0qEcf3SFlpRcb3lK3f2GZI', '2AM4ilv6UzW0uMRuqKtDgN', '00tVTdpEhQQw1bqdu8RCx2', '5M52tdBnJaKSvOpJGz8mfZ', '1OwarW4LEHnoep20ixRA0y', '1WRM9i067hd2ujxxi8FI3m', '5krkohEVJYw0qoB5VWwxaC', '6biWAmrHyiMkX49LkycGqQ', '2e53aHBQdCMKWqHDuyJsjC', '6QtGlUje9TIkLrgPZrESuk', '21ysNsPzHdqYN2fQ75ZswG', '22bE4uQ6baNwSHPVcDxLCe', '4wQ3PyMz3WwJGI5uEqHUVR', '2lxX1ivRYp26soIavdG9bX']
         """
-        similar_artists: Dict = self.spotify_client.artist_related_artists(
-            artist_id=artist_id
+        similar_artists: Dict = self._request(
+            self.spotify_client.artist_related_artists, artist_id=artist_id
         )
         return [a["id"] for a in similar_artists["artists"]]
 
@@ -209,16 +509,30 @@ class SpotifyStreamingAPIClient(AbstractStreamingAPIClient):
             >>> for _id in ids:
             ...     assert(isinstance(_id, str))
             """
-        similar_track_data: Dict = self.spotify_client.recommendations(
-            seed_tracks=[track_id]
+        similar_track_data: Dict = self._request(
+            self.spotify_client.recommendations, seed_tracks=[track_id]
         )
         return [t["id"] for t in similar_track_data["tracks"]]
 
+    def connection_stats(self) -> ConnectionStats:
+        """Reuse of the http connections of the spotipy client"""
+        return connection_stats(self.spotify_client._session)
+
     @classmethod
-    def from_env(cls, scope: Optional[Union[str, Tuple]] = None):
+    def from_env(cls, scope: Optional[Union[str, Tuple]] = None, concurrency: int = 10):
+        """Spotify client authenticated from the SPOTIPY_* environment variables
+
+        Args:
+            scope (Optional[Union[str, Tuple]]): the user authorization scope, the
+                client credentials flow is used when None
+            concurrency (int): number of threads sharing the client, its http
+                session keeps as many keep-alive connections
+        """
         if scope is not None:
             spotify = spotipy.Spotify(auth_manager=SpotifyOAuth(scope=scope))
         else:
             spotify = spotipy.Spotify(auth_manager=SpotifyClientCredentials())
+        # spotipy does not expose its session, built with its retry policy
+        pooled_session(concurrency, spotify._session)
         spotify.current_user()
         return cls(spotify)
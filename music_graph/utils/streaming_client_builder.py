@@ -1,5 +1,5 @@
-from typing import Tuple
-
+import os
+from typing import Optional, Tuple
 
 from music_graph.abstract.client import AbstractStreamingAPIClient
 from music_graph.data.general_fetcher import GraphBuildingModeEnum
@@ -7,6 +7,43 @@ from music_graph.data.general_fetcher import GraphBuildingModeEnum
 
 class StreamingClientAPIClientBuilder:
     @staticmethod
-    def from_env() -> Tuple[AbstractStreamingAPIClient, GraphBuildingModeEnum]:
-        # TODO: do from env loading
-        ...
+    def concurrency_from_env() -> int:
+        """Number of threads fetching the graph, MUSIC_GRAPH_CONCURRENCY or 1"""
+        return int(os.getenv("MUSIC_GRAPH_CONCURRENCY", "1"))
+
+    @staticmethod
+    def from_env(
+        concurrency: Optional[int] = None,
+    ) -> Tuple[AbstractStreamingAPIClient, GraphBuildingModeEnum]:
+        """Client and graph building mode configured by the environment
+
+        STREAMING_PLATFORM is "spotify" (default) or "tidal", GRAPH_BUILDING_MODE
+        one of GraphBuildingModeEnum values, "artist" by default. The client
+        authentication variables are read by the from_env of each client.
+
+        Args:
+            concurrency (Optional[int]): number of threads sharing the client, its
+                http session is pooled for them, defaults to concurrency_from_env
+
+        Returns:
+            Tuple[AbstractStreamingAPIClient, GraphBuildingModeEnum]: the client
+                and the graph building mode
+        """
+        if concurrency is None:
+            concurrency = StreamingClientAPIClientBuilder.concurrency_from_env()
+        mode = GraphBuildingModeEnum(os.getenv("GRAPH_BUILDING_MODE", "artist"))
+        platform: str = os.getenv("STREAMING_PLATFORM", "spotify")
+        # spotipy and tidalapi are separate extras, only the one used is imported
+        if platform == "spotify":
+            from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+
+            client: AbstractStreamingAPIClient = SpotifyStreamingAPIClient.from_env(
+                concurrency=concurrency
+            )
+        elif platform == "tidal":
+            from music_graph.utils.tidal_client import TidalStreamingAPIClient
+
+            client = TidalStreamingAPIClient.from_env(concurrency=concurrency)
+        else:
+            raise ValueError(f"Unknown platform {platform}, use spotify or tidal")
+        return client, mode
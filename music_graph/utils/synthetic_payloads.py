@@ -0,0 +1,349 @@
+import random
+from typing import Any, Dict, List
+
+# Base of the spotify pagination urls, replayed through request_key
+SPOTIFY_API: str = "https://api.spotify.com/v1/"
+PAGE_SIZE: int = 50
+
+
+def synthetic_payloads(
+    source: str = "spotify",
+    n_artists: int = 100,
+    similar_per_artist: int = 2,
+    tracks_per_artist: int = 5,
+    segments_per_track: int = 10,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Build the api responses of a synthetic catalog, for a ReplayStreamingAPIClient
+
+    Artist "artist{i}" is similar to the next similar_per_artist artists, and has
+    an album "album{i}" with the tracks "track{i}x{j}". The tracks similar to
+    "track{i}x{j}" are the j-th tracks of the similar artists, and "playlist{i}"
+    holds the tracks of artist i. The user "user" follows every artist and saved
+    every track.
+
+    Args:
+        source (str): "spotify" or "tidal"
+        n_artists (int): number of artists
+        similar_per_artist (int): number of similar artists of each artist
+        tracks_per_artist (int): number of tracks of each artist
+        segments_per_track (int): size of the spotify audio analysis of each track
+        seed (int): seed of the random popularities, audio analyses and features
+
+    Returns:
+        Dict[str, Any]: the json responses by request_key
+
+    Examples:
+        >>> payloads = synthetic_payloads("spotify", n_artists=3)
+        >>> payloads["artists/artist0/related-artists"]["artists"][0]["id"]
+        'artist1'
+    """
+    catalog = _Catalog(
+        n_artists, similar_per_artist, tracks_per_artist, segments_per_track, seed
+    )
+    if source == "spotify":
+        return catalog.spotify_payloads()
+    if source == "tidal":
+        return catalog.tidal_payloads()
+    raise ValueError(f"Unknown source {source}, use spotify or tidal")
+
+
+def _artist_id(i: int) -> str:
+    # Spotify ids are base 62, without separators
+    return f"artist{i}"
+
+
+def _album_id(i: int) -> str:
+    return f"album{i}"
+
+
+def _playlist_id(i: int) -> str:
+    return f"playlist{i}"
+
+
+def _track_id(i: int, j: int) -> str:
+    return f"track{i}x{j}"
+
+
+class _Catalog:
+    def __init__(
+        self,
+        n_artists: int,
+        similar_per_artist: int,
+        tracks_per_artist: int,
+        segments_per_track: int,
+        seed: int,
+    ) -> None:
+        self.n_artists = n_artists
+        self.similar_per_artist = min(similar_per_artist, n_artists - 1)
+        self.tracks_per_artist = tracks_per_artist
+        self.segments_per_track = segments_per_track
+        self.random = random.Random(seed)  # nosec
+        # Own generator, so that the features leave the other payloads unchanged
+        self.features_random = random.Random(f"features{seed}")  # nosec
+
+    def artist_ids(self) -> List[str]:
+        return [_artist_id(i) for i in range(self.n_artists)]
+
+    def similar(self, i: int) -> List[int]:
+        return [(i + k) % self.n_artists for k in range(1, self.similar_per_artist + 1)]
+
+    def track_ids(self, i: int) -> List[str]:
+        return [_track_id(i, j) for j in range(self.tracks_per_artist)]
+
+    def spotify_payloads(self) -> Dict[str, Any]:
+        payloads: Dict[str, Any] = {}
+        for i, artist_id in enumerate(self.artist_ids()):
+            artist: Dict = self._spotify_artist(artist_id)
+            tracks: List[Dict] = [
+                self._spotify_track(i, track_id) for track_id in self.track_ids(i)
+            ]
+            payloads[f"artists/{artist_id}"] = artist
+            payloads[f"artists/{artist_id}/albums"] = {
+                "items": [{"id": _album_id(i)}],
+                "next": None,
+            }
+            payloads[f"artists/{artist_id}/top-tracks"] = {"tracks": tracks}
+            payloads[f"artists/{artist_id}/related-artists"] = {
+                "artists": [
+                    self._spotify_artist(_artist_id(k)) for k in self.similar(i)
+                ]
+            }
+            payloads[f"albums/{_album_id(i)}"] = self._spotify_album(i, tracks)
+            payloads[f"playlists/{_playlist_id(i)}"] = self._spotify_playlist(i, tracks)
+            for j, track in enumerate(tracks):
+                payloads[f"tracks/{track['id']}"] = track
+                payloads[f"audio-analysis/{track['id']}"] = self._audio_analysis()
+                payloads[f"audio-features/{track['id']}"] = self._audio_features(track)
+                payloads[f"recommendations?seed_tracks={track['id']}"] = {
+                    "tracks": [{"id": _track_id(k, j)} for k in self.similar(i)]
+                }
+        payloads["users/user"] = self._spotify_user()
+        payloads.update(self._spotify_library())
+        return payloads
+
+    def _spotify_artist(self, artist_id: str) -> Dict:
+        return {
+            "id": artist_id,
+            "name": artist_id,
+            "popularity": self.random.randint(0, 100),
+            "uri": f"spotify:artist:{artist_id}",
+            "href": f"{SPOTIFY_API}artists/{artist_id}",
+            "followers": {"href": None, "total": self.random.randint(0, 10**6)},
+            "genres": ["synthetic"],
+        }
+
+    def _spotify_track(self, i: int, track_id: str) -> Dict:
+        return {
+            "id": track_id,
+            "name": track_id,
+            "album": {"id": _album_id(i)},
+            "artists": [{"id": _artist_id(i)}],
+            "duration_ms": self.random.randint(120_000, 300_000),
+            "href": f"{SPOTIFY_API}tracks/{track_id}",
+            "uri": f"spotify:track:{track_id}",
+            "track_number": int(track_id.rsplit("x", 1)[1]) + 1,
+            "popularity": self.random.randint(0, 100),
+            "preview_url": None,
+        }
+
+    def _spotify_album(self, i: int, tracks: List[Dict]) -> Dict:
+        return {
+            "id": _album_id(i),
+            "type": "album",
+            "name": _album_id(i),
+            "uri": f"spotify:album:{_album_id(i)}",
+            "href": f"{SPOTIFY_API}albums/{_album_id(i)}",
+            "total_tracks": len(tracks),
+            "artists": [{"id": _artist_id(i)}],
+            "genres": ["synthetic"],
+            "tracks": {"items": [{"id": t["id"]} for t in tracks]},
+        }
+
+    def _spotify_playlist(self, i: int, tracks: List[Dict]) -> Dict:
+        return {
+            "id": _playlist_id(i),
+            "name": _playlist_id(i),
+            "uri": f"spotify:playlist:{_playlist_id(i)}",
+            "snapshot_id": f"{_playlist_id(i)}v1",
+            "followers": {"total": self.random.randint(0, 1000)},
+            "tracks": {"items": [{"track": {"id": t["id"]}} for t in tracks]},
+        }
+
+    def _spotify_user(self) -> Dict:
+        return {
+            "id": "user",
+            "display_name": "user",
+            "href": f"{SPOTIFY_API}users/user",
+            "uri": "spotify:user:user",
+        }
+
+    def _spotify_library(self) -> Dict[str, Any]:
+        track_ids: List[str] = [
+            t for i in range(self.n_artists) for t in self.track_ids(i)
+        ]
+        payloads: Dict[str, Any] = {
+            "me/following?type=artist": {
+                "artists": {
+                    "items": [{"id": a} for a in self.artist_ids()],
+                    "next": None,
+                }
+            },
+            "me/playlists": {"items": [], "next": None},
+            "me/top/tracks": {"items": [], "next": None},
+            "me/albums": {"items": [], "next": None},
+        }
+        for offset in range(0, max(len(track_ids), 1), PAGE_SIZE):
+            next_offset: int = offset + PAGE_SIZE
+            key: str = "me/tracks" if offset == 0 else f"me/tracks?offset={offset}"
+            payloads[key] = {
+                "items": [{"track": {"id": t}} for t in track_ids[offset:next_offset]],
+                "next": (
+                    f"{SPOTIFY_API}me/tracks?offset={next_offset}&limit={PAGE_SIZE}"
+                    if next_offset < len(track_ids)
+                    else None
+                ),
+            }
+        return payloads
+
+    def _audio_features(self, track: Dict) -> Dict:
+        uniform = self.features_random.random
+        return {
+            "acousticness": uniform(),
+            "danceability": uniform(),
+            "duration_ms": track["duration_ms"],
+            "energy": uniform(),
+            "instrumentalness": uniform(),
+            "key": self.features_random.randint(0, 11),
+            "liveness": uniform(),
+            "loudness": -20 * uniform(),
+            "mode": self.features_random.randint(0, 1),
+            "speechiness": uniform(),
+            "tempo": 60 + 120 * uniform(),
+            "time_signature": 4,
+            "uri": track["uri"],
+            "valence": uniform(),
+        }
+
+    def _audio_analysis(self) -> Dict:
+        uniform = self.random.random
+        interval: Dict = {"start": 0.0, "duration": 1.0, "confidence": 0.5}
+        return {
+            "meta": {"analyzer_version": "synthetic"},
+            "track": {
+                "num_samples": 100,
+                "duration": float(self.segments_per_track),
+                "channels": 1,
+                "loudness": -10 * uniform(),
+                "tempo": 60 + 120 * uniform(),
+                "tempo_confidence": uniform(),
+                "time_signature": 4,
+                "time_signature_confidence": uniform(),
+                "key": self.random.randint(0, 11),
+                "key_confidence": uniform(),
+                "mode": self.random.randint(0, 1),
+                "mode_confidence": uniform(),
+                "codestring": "",
+                "code_version": 3.15,
+                "echoprintstring": "",
+                "echoprint_version": 4.12,
+                "synchstring": "",
+                "synch_version": 1.0,
+                "rhythmstring": "",
+                "rhythm_version": 1.0,
+            },
+            "bars": [interval],
+            "tatums": [interval],
+            "sections": [
+                {
+                    **interval,
+                    "loudness": -10.0,
+                    "tempo": 120.0,
+                    "tempo_confidence": 0.5,
+                    "key": 0,
+                    "key_confidence": 0.5,
+                    "mode": 1,
+                    "mode_confidence": 0.5,
+                    "time_signature": 4,
+                    "time_signature_confidence": 0.5,
+                }
+            ],
+            "segments": [
+                {
+                    "start": float(k),
+                    "duration": 1.0,
+                    "confidence": uniform(),
+                    "loudness_start": -20 * uniform(),
+                    "loudness_max": -10 * uniform(),
+                    "loudness_max_time": uniform(),
+                    "loudness_end": -20 * uniform(),
+                    "pitches": [uniform() for _ in range(12)],
+                    "timbre": [100 * uniform() - 50 for _ in range(12)],
+                }
+                for k in range(self.segments_per_track)
+            ],
+        }
+
+    def tidal_payloads(self) -> Dict[str, Any]:
+        payloads: Dict[str, Any] = {}
+        for i, artist_id in enumerate(self.artist_ids()):
+            artist: Dict = self._tidal_artist(artist_id)
+            album: Dict = {
+                "id": _album_id(i),
+                "title": _album_id(i),
+                "numberOfTracks": self.tracks_per_artist,
+                "artist": artist,
+                "artists": [artist],
+            }
+            tracks: List[Dict] = [
+                self._tidal_track(track_id, artist, album)
+                for track_id in self.track_ids(i)
+            ]
+            payloads[f"artists/{artist_id}"] = artist
+            payloads[f"artists/{artist_id}/albums"] = {"items": [album]}
+            for album_filter in ("EPSANDSINGLES", "COMPILATIONS"):
+                payloads[f"artists/{artist_id}/albums?filter={album_filter}"] = {
+                    "items": []
+                }
+            payloads[f"artists/{artist_id}/toptracks"] = {"items": tracks}
+            payloads[f"artists/{artist_id}/similar"] = {
+                "items": [self._tidal_artist(_artist_id(k)) for k in self.similar(i)]
+            }
+            payloads[f"albums/{_album_id(i)}"] = album
+            payloads[f"albums/{_album_id(i)}/tracks"] = {"items": tracks}
+            payloads[f"playlists/{_playlist_id(i)}"] = {
+                "uuid": _playlist_id(i),
+                "title": _playlist_id(i),
+                "description": "",
+                "numberOfTracks": len(tracks),
+                "duration": sum(t["duration"] for t in tracks),
+                "publicPlaylist": True,
+            }
+            payloads[f"playlists/{_playlist_id(i)}/tracks"] = {"items": tracks}
+            for j, track in enumerate(tracks):
+                payloads[f"tracks/{track['id']}"] = track
+                similar_tracks: List[Dict] = []
+                for k in self.similar(i):
+                    similar_artist: Dict = self._tidal_artist(_artist_id(k))
+                    similar_tracks.append(
+                        self._tidal_track(_track_id(k, j), similar_artist, album)
+                    )
+                payloads[f"tracks/{track['id']}/radio"] = {"items": similar_tracks}
+        return payloads
+
+    def _tidal_artist(self, artist_id: str) -> Dict:
+        return {"id": artist_id, "name": artist_id, "type": "ARTIST"}
+
+    def _tidal_track(self, track_id: str, artist: Dict, album: Dict) -> Dict:
+        return {
+            "id": track_id,
+            "title": track_id,
+            "duration": self.random.randint(120, 300),
+            "trackNumber": int(track_id.rsplit("x", 1)[1]) + 1,
+            "volumeNumber": 1,
+            "popularity": self.random.randint(0, 100),
+            "artist": artist,
+            "artists": [artist],
+            "album": {"id": album["id"], "title": album["title"]},
+            "streamReady": True,
+        }
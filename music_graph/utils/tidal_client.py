@@ -1,5 +1,7 @@
 import os
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
 
 import requests
 import tidalapi as tidal
@@ -8,22 +10,80 @@ from loguru import logger
 from music_graph.abstract.client import AbstractStreamingAPIClient
 from music_graph.datamodel.album import AlbumData
 from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.audio_features import AudioFeatures
 from music_graph.datamodel.playlist import PlaylistData
 from music_graph.datamodel.track import TrackData
 from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.concurrency import gather
 from music_graph.utils.converter.tidal_converter import TidalAPIConverter
+from music_graph.utils.http_session import ConnectionStats, connection_stats
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.tidal_session import PooledTidalSession
+
+# Sub-resources needing their own calls, which can be left out with include
+TRACK_SUB_RESOURCES: Tuple[str, ...] = ("similar_tracks",)
+ARTIST_SUB_RESOURCES: Tuple[str, ...] = ("albums", "similar_artists", "top_tracks")
+ARTIST_FIELDS: Dict[str, str] = {
+    "albums": "album_ids",
+    "similar_artists": "similar_artist_ids",
+    "top_tracks": "top_track_ids",
+}
 
 
 class TidalStreamingAPIClient(AbstractStreamingAPIClient):
-    def __init__(self, tidal_session: tidal.Session) -> None:
+    def __init__(
+        self,
+        tidal_session: tidal.Session,
+        scheduler: Optional[RateLimitScheduler] = None,
+        max_workers: int = 6,
+    ) -> None:
+        """Tidal client
+
+        The independent calls needed for one entity, e.g. the six calls of
+        get_artist, are issued concurrently, so an entity costs about one round
+        trip. Use a PooledTidalSession to reuse the connections between them.
+
+        Args:
+            tidal_session (tidal.Session): the tidalapi session
+            scheduler (Optional[RateLimitScheduler]): rate limit scheduler, to share
+                a request budget between clients, threads and tasks
+            max_workers (int): threads issuing the sub-requests, shared by every
+                call of the client, 1 makes them sequential. They are stopped by
+                close, or on leaving the client used as a context manager.
+        """
         self.tidal_session = tidal_session
+        self.scheduler = scheduler
         self.converter = TidalAPIConverter()
+        self.executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tidal")
+            if max_workers > 1
+            else None
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the threads issuing the sub-requests, once their calls are done"""
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _gather(self, *calls: Callable[[], Any]) -> List[Any]:
+        return gather(calls, self.executor)
 
-    def get_track(self, track_id: str) -> TrackData:
+    def get_track(
+        self, track_id: str, include: Optional[Collection[str]] = None
+    ) -> TrackData:
         """Get track data in the TrackData format from tidal client
 
         Args:
             track_id (str): the id of a track
+            include (Optional[Collection[str]]): sub-resources to load now among
+                TRACK_SUB_RESOURCES, default to all. The others are loaded on
+                first access.
 
         Returns:
             TrackData: The track data
@@ -37,13 +97,29 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
             >>> data.id
             '113558924'
         """
-        track_data: tidal.models.Track = self.tidal_session.get_track(track_id=track_id)
-        similar_tracks: List[tidal.models.Track] = self.tidal_session.get_track_radio(
-            track_id=track_id
-        )
-        return self.converter.track_converter(
-            track_raw=track_data, similar_tracks=similar_tracks
+        include = TRACK_SUB_RESOURCES if include is None else include
+        track_data: tidal.models.Track
+        if "similar_tracks" in include:
+            track_data, similar_tracks = self._gather(
+                partial(self._request, self.tidal_session.get_track, track_id=track_id),
+                partial(self._get_track_radio, track_id),
+            )
+            return self.converter.track_converter(
+                track_raw=track_data, similar_tracks=similar_tracks
+            )
+        track_data = self._request(self.tidal_session.get_track, track_id=track_id)
+        track: TrackData = self.converter.track_converter(track_raw=track_data)
+        track.defer(
+            "track_playlist_ids",
+            lambda: self.converter.track_converter(
+                track_raw=track_data, similar_tracks=self._get_track_radio(track_id)
+            ).track_playlist_ids,
+            unloaded=[],
         )
+        return track
+
+    def _get_track_radio(self, track_id: str) -> List[tidal.models.Track]:
+        return self._request(self.tidal_session.get_track_radio, track_id=track_id)
 
     def get_album(self, album_id: str) -> AlbumData:
         """Get album data in the AlbumData format from tidal client
@@ -63,19 +139,26 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
             >>> data.id
             '87642140'
         """
-        album_data: tidal.models.Album = self.tidal_session.get_album(album_id=album_id)
-        album_tracks: List[tidal.models.Track] = self.tidal_session.get_album_tracks(
-            album_id=album_id
+        album_data, album_tracks = self._gather(
+            partial(self._request, self.tidal_session.get_album, album_id=album_id),
+            partial(
+                self._request, self.tidal_session.get_album_tracks, album_id=album_id
+            ),
         )
         return self.converter.album_converter(
             album_raw=album_data, album_tracks=album_tracks
         )
 
-    def get_artist(self, artist_id: str) -> ArtistData:
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
         """Get artist data in the ArtistData format from tidal client
 
         Args:
             artist_id (str): the id of an artist
+            include (Optional[Collection[str]]): sub-resources to load now among
+                ARTIST_SUB_RESOURCES, default to all. The others are loaded on
+                first access.
 
         Returns:
             ArtistData: The artist data
@@ -90,30 +173,94 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
             >>> data.id
             '15099025'
         """
-        artist_data: tidal.models.Artist = self.tidal_session.get_artist(
-            artist_id=artist_id
+        include = ARTIST_SUB_RESOURCES if include is None else include
+        loaders: Dict[str, Callable[[str], Any]] = {
+            "albums": self._get_artist_albums,
+            "similar_artists": self._get_artist_similar,
+            "top_tracks": self._get_artist_top_tracks,
+        }
+        sub_resources: Dict[str, Any] = {
+            "albums": [],
+            "similar_artists": None,
+            "top_tracks": None,
+        }
+        included: List[str] = [name for name in loaders if name in include]
+        artist_data, *loaded = self._gather(
+            partial(self._request, self.tidal_session.get_artist, artist_id=artist_id),
+            *(partial(loaders[name], artist_id) for name in included),
+        )
+        sub_resources.update(zip(included, loaded))
+        artist: ArtistData = self.converter.artist_converter(
+            artist_raw=artist_data, **sub_resources
         )
-        albums: List[tidal.models.Album] = self.tidal_session.get_artist_albums(
-            artist_id=artist_id
+        for name, loader in loaders.items():
+            if name not in include:
+                artist.defer(
+                    ARTIST_FIELDS[name],
+                    partial(self._load_artist_field, artist_data, name, loader),
+                    unloaded=[],
+                )
+        return artist
+
+    def _load_artist_field(
+        self,
+        artist_data: tidal.models.Artist,
+        name: str,
+        loader: Callable[[str], Any],
+    ) -> List[str]:
+        sub_resources: Dict[str, Any] = {
+            "albums": [],
+            "similar_artists": None,
+            "top_tracks": None,
+        }
+        sub_resources[name] = loader(str(artist_data.id))
+        artist: ArtistData = self.converter.artist_converter(
+            artist_raw=artist_data, **sub_resources
         )
-        albums += self.tidal_session.get_artist_albums_ep_singles(artist_id=artist_id)
-        albums += self.tidal_session.get_artist_albums_other(artist_id=artist_id)
+        return getattr(artist, ARTIST_FIELDS[name])
+
+    def _get_artist_albums(self, artist_id: str) -> List[tidal.models.Album]:
+        albums, ep_singles, other_albums = self._gather(
+            *(
+                partial(self._request, get_albums, artist_id=artist_id)
+                for get_albums in (
+                    self.tidal_session.get_artist_albums,
+                    self.tidal_session.get_artist_albums_ep_singles,
+                    self.tidal_session.get_artist_albums_other,
+                )
+            )
+        )
+        return albums + ep_singles + other_albums
+
+    def _get_artist_similar(
+        self, artist_id: str
+    ) -> Optional[List[tidal.models.Artist]]:
         try:
-            similar_artists: Optional[
-                List[tidal.models.Artist]
-            ] = self.tidal_session.get_artist_similar(artist_id=artist_id)
+            return self._request(
+                self.tidal_session.get_artist_similar, artist_id=artist_id
+            )
         except requests.exceptions.HTTPError:
-            similar_artists = None
-        top_tracks: List[tidal.models.Track] = self.tidal_session.get_artist_top_tracks(
-            artist_id=artist_id
-        )
-        return self.converter.artist_converter(
-            artist_raw=artist_data,
-            albums=albums,
-            similar_artists=similar_artists,
-            top_tracks=top_tracks,
+            return None
+
+    def _get_artist_top_tracks(self, artist_id: str) -> List[tidal.models.Track]:
+        return self._request(
+            self.tidal_session.get_artist_top_tracks, artist_id=artist_id
         )
 
+    def get_tracks(self, track_ids: List[str]) -> List[TrackData]:
+        """Get several tracks, one call per track as tidal has no multi-id endpoint
+
+        The similar tracks are loaded on first access.
+        """
+        return [self.get_track(track_id, include=()) for track_id in track_ids]
+
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        """Get several artists, one call per artist as tidal has no multi-id endpoint
+
+        The albums, similar artists and top tracks are loaded on first access.
+        """
+        return [self.get_artist(artist_id, include=()) for artist_id in artist_ids]
+
     def get_playlist(self, playlist_id: str) -> PlaylistData:
         """Get playlist data in the PlaylistData format from tidal client
 
@@ -132,12 +279,16 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
             >>> data.id
             'eb1ffe34-77da-445e-814a-089957eaff4f'
         """
-        playlist_data: tidal.models.Playlist = self.tidal_session.get_playlist(
-            playlist_id=playlist_id
+        playlist_data, playlist_tracks = self._gather(
+            partial(
+                self._request, self.tidal_session.get_playlist, playlist_id=playlist_id
+            ),
+            partial(
+                self._request,
+                self.tidal_session.get_playlist_tracks,
+                playlist_id=playlist_id,
+            ),
         )
-        playlist_tracks: List[
-            tidal.models.Track
-        ] = self.tidal_session.get_playlist_tracks(playlist_id=playlist_id)
         return self.converter.playlist_converter(
             playlist_raw=playlist_data, playlist_tracks=playlist_tracks,
         )
@@ -169,12 +320,50 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
             logger.warning(
                 "When using Tidal, you can only get the user from the current session, this will crash until it's fixed in tidalapi lib"
             )
-            user_data = self.tidal_session.get_user(user_id=user_id)
-        return self.converter.user_converter(user_data=user_data)
+            user_data = self._request(self.tidal_session.get_user, user_id=user_id)
+        playlists, artists, albums, tracks = self._gather(
+            partial(self._request, user_data.playlists),
+            partial(self._request, user_data.favorites.artists),
+            partial(self._request, user_data.favorites.albums),
+            partial(self._request, user_data.favorites.tracks),
+        )
+        return self.converter.user_converter(
+            user_data=user_data,
+            playlists=playlists,
+            favorite_artists=artists,
+            favorite_albums=albums,
+            favorite_tracks=tracks,
+        )
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        similar_artists = self._get_artist_similar(artist_id)
+        return [] if similar_artists is None else [str(a.id) for a in similar_artists]
+
+    def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        raise NotImplementedError("Tidal does not provide similar playlists")
+
+    def get_audio_features(self, track_ids: List[str]) -> List[AudioFeatures]:
+        raise NotImplementedError("Tidal does not provide audio features")
+
+    def get_track_neighbors(self, track_id: str) -> List[str]:
+        return [str(t.id) for t in self._get_track_radio(track_id)]
+
+    def connection_stats(self) -> ConnectionStats:
+        """Reuse of the http connections of the tidal session"""
+        http: Optional[requests.Session] = getattr(self.tidal_session, "http", None)
+        return ConnectionStats() if http is None else connection_stats(http)
 
     @classmethod
-    def from_env(cls):
-        tidal_session = tidal.Session()
+    def from_env(cls, max_workers: int = 6, concurrency: int = 1):
+        """Tidal client authenticated from the TIDAL_* environment variables
+
+        Args:
+            max_workers (int): threads issuing the sub-requests of the client
+            concurrency (int): number of threads sharing the client, the session
+                keeps a keep-alive connection for each of them and each sub-request
+                thread
+        """
+        tidal_session = PooledTidalSession(pool_size=max_workers + concurrency)
         first_authentication: bool = os.getenv("TIDAL_FIRST_AUTH", False)
         if first_authentication:
             # This should be run outside of tests the first time to get the tidal login page
@@ -190,4 +379,6 @@ class TidalStreamingAPIClient(AbstractStreamingAPIClient):
                 access_token=TIDAL_ACCESS_TOKEN,
                 refresh_token=TIDAL_REFRESH_TOKEN,
             )
-        return TidalStreamingAPIClient(tidal_session=tidal_session)
+        return TidalStreamingAPIClient(
+            tidal_session=tidal_session, max_workers=max_workers
+        )
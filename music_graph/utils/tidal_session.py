@@ -0,0 +1,50 @@
+from urllib.parse import urljoin
+
+import requests
+import tidalapi as tidal
+from loguru import logger
+
+from music_graph.utils.http_session import pooled_session
+
+
+class PooledTidalSession(tidal.Session):
+    def __init__(self, config: tidal.Config = tidal.Config(), pool_size: int = 10):
+        """Tidal session sending its requests over a pool of keep-alive connections
+
+        tidalapi opens a new connection for each request, this session reuses up to
+        pool_size connections, so concurrent requests skip the tcp and tls
+        handshakes.
+
+        Args:
+            config (tidal.Config): the tidalapi configuration
+            pool_size (int): number of kept connections, at least the number of
+                threads issuing requests
+        """
+        super().__init__(config)
+        self.http: requests.Session = pooled_session(pool_size)
+
+    def basic_request(self, method, path, params=None, data=None, headers=None):
+        # Same as tidalapi Session.basic_request, over the pooled http session
+        request_params = {
+            "sessionId": self.session_id,
+            "countryCode": self.country_code,
+            "limit": "999",
+        }
+        if params:
+            request_params.update(params)
+        headers = dict(headers or {})
+        if self.token_type:
+            headers["authorization"] = self.token_type + " " + self.access_token
+        url: str = urljoin(self._config.api_location, path)
+        request = self.http.request(
+            method, url, params=request_params, data=data, headers=headers
+        )
+        if (
+            not request.ok
+            and request.json()["userMessage"].startswith("The token has expired.")
+            and self.refresh_token
+        ):
+            logger.debug("The access token has expired, trying to refresh it.")
+            if self.token_refresh(self.refresh_token):
+                return self.basic_request(method, path, params, data, headers)
+        return request
@@ -0,0 +1,122 @@
+"""Benchmark of the binary codec against json, on graph nodes and analyses
+
+The graph nodes of a replayed synthetic library, and tracks with their audio
+analysis, are encoded and decoded as a batch, with the codec and with json of
+their to_dict, the only other persistence format.
+
+Examples:
+    python scripts/benchmarks/codec_benchmark.py --n_artists=200
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import spotipy
+
+from music_graph.data.general_fetcher import GeneralFetcher, GraphBuildingModeEnum
+from music_graph.datamodel import codec
+from music_graph.datamodel.graph.graph import node_from_dict, node_to_dict
+from music_graph.datamodel.graph.node import GraphNode
+from music_graph.datamodel.track import TrackData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.replay_client import ReplayHTTPSession, ReplayStreamingAPIClient
+from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+def graph_nodes(n_artists: int) -> List[GraphNode]:
+    client = ReplayStreamingAPIClient(synthetic_payloads("spotify", n_artists))
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.TRACK)
+    track_ids: List[str] = [f"track{i}x0" for i in range(n_artists)]
+    user_info = UserInfo("user", "user", "", "", [], [], track_ids, [], [])
+    graph = fetcher.fetch_positive_graph(user_info)
+    return list(graph.raw_node.values())
+
+
+def analysed_tracks(n_tracks: int) -> List[TrackData]:
+    session = ReplayHTTPSession(synthetic_payloads("spotify", n_artists=1))
+    client = SpotifyStreamingAPIClient(spotipy.Spotify(requests_session=session))
+    return [client.get_track("track0x0") for _ in range(n_tracks)]
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def to_dict(obj: Any) -> Dict:
+    return node_to_dict(obj) if isinstance(obj, GraphNode) else obj.to_dict()
+
+
+def compare(objects: List[Any], repeat: int) -> Dict[str, Dict[str, float]]:
+    def json_encode() -> bytes:
+        return json.dumps([to_dict(obj) for obj in objects]).encode()
+
+    def codec_encode() -> bytes:
+        return codec.encode_batch(objects)
+
+    from_dict: Callable[[Dict], Any] = (
+        node_from_dict
+        if isinstance(objects[0], GraphNode)
+        else type(objects[0]).from_dict
+    )
+
+    def json_decode() -> List[Any]:
+        return [from_dict(data_dict) for data_dict in json.loads(json_data)]
+
+    json_data: bytes = json_encode()
+    codec_data: bytes = codec_encode()
+    results: Dict[str, Dict[str, float]] = {}
+    for name, encode, decode, data in (
+        ("json", json_encode, json_decode, json_data),
+        ("codec", codec_encode, lambda: codec.decode_batch(codec_data), codec_data),
+    ):
+        results[name] = {
+            "bytes": len(data),
+            "encode_objects_per_s": len(objects) / timed(encode, repeat),
+            "decode_objects_per_s": len(objects) / timed(decode, repeat),
+        }
+    return results
+
+
+def run(
+    n_artists: int = 200,
+    n_tracks: int = 20,
+    repeat: int = 5,
+    output: Optional[str] = None,
+) -> None:
+    """Size and throughput of the codec and of json
+
+    Both decode to the datamodel objects, json through their from_dict.
+
+    Args:
+        n_artists (int): number of artists of the synthetic library
+        n_tracks (int): number of tracks with an audio analysis
+        repeat (int): number of runs, the best one is kept
+        output (Optional[str]): path of a json file receiving the results
+    """
+    results: Dict[str, Dict[str, Dict[str, float]]] = {
+        "graph_nodes": compare(graph_nodes(n_artists), repeat),
+        "analysed_tracks": compare(analysed_tracks(n_tracks), repeat),
+    }
+    for objects, result in results.items():
+        for name, figures in result.items():
+            print(
+                f"{objects} {name}: {figures['bytes'] / 1000:.0f} kB, "
+                f"encode {figures['encode_objects_per_s']:.0f}/s, "
+                f"decode {figures['decode_objects_per_s']:.0f}/s"
+            )
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
@@ -0,0 +1,177 @@
+"""Offline benchmark of the graph building throughput and client call latencies
+
+The fetcher runs against a ReplayStreamingAPIClient serving a synthetic catalog,
+with a fixed latency per http request, at several concurrency levels.
+
+Examples:
+    python scripts/benchmarks/fetch_benchmark.py --n_artists=200 --latency=0.01
+    python scripts/benchmarks/fetch_benchmark.py --source=tidal --mode=track
+    python scripts/benchmarks/fetch_benchmark.py --mode=playlist
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.data.general_fetcher import GeneralFetcher, GraphBuildingModeEnum
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.replay_client import ReplayStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+# Graph building modes with a synthetic catalog and a fetcher implementation
+MODES: Sequence[str] = ("artist", "track", "playlist")
+
+
+class TimedClient:
+    """Client proxy recording the duration of every method call"""
+
+    def __init__(self, client: AbstractStreamingAPIClient) -> None:
+        self.client = client
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "client":
+            raise AttributeError(name)
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.durations[name].append(time.perf_counter() - start)
+
+        return timed
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered: List[float] = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def user_info(n_artists: int, tracks_per_artist: int) -> UserInfo:
+    return UserInfo(
+        id="user",
+        display_name="user",
+        href="",
+        uri="",
+        playlist_ids=[f"playlist{i}" for i in range(n_artists)],
+        artist_ids=[f"artist{i}" for i in range(n_artists)],
+        top_track_ids=[
+            f"track{i}x{j}" for i in range(n_artists) for j in range(tracks_per_artist)
+        ],
+        saved_track_ids=[],
+        saved_album_ids=[],
+    )
+
+
+def run(
+    source: str = "spotify",
+    mode: str = "artist",
+    n_artists: int = 500,
+    tracks_per_artist: int = 2,
+    concurrency: Sequence[int] = (1, 4, 16, 64),
+    latency: float = 0.02,
+    jitter: float = 0.01,
+    rate_limited: float = 0.0,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> None:
+    """Build the graph of a synthetic user at each concurrency level
+
+    Args:
+        source (str): "spotify" or "tidal"
+        mode (str): the graph building mode, "artist", "track" or "playlist". The
+            playlists have no neighbors on either source, so their graph is
+            the fetch of the playlists only
+        n_artists (int): number of artists of the user, i.e. of graph nodes
+        tracks_per_artist (int): number of tracks of each artist
+        concurrency (Sequence[int]): the fetcher max_workers values
+        latency (float): delay of each http response, in seconds
+        jitter (float): additional uniform random delay, in seconds
+        rate_limited (float): share of the requests answered with a 429, retried
+            by a rate limit scheduler
+        seed (int): seed of the catalog and of the replay draws
+        output (Optional[str]): path of a json file receiving the results, one
+            per concurrency level
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode}, use one of {', '.join(MODES)}")
+    payloads: Dict[str, Any] = synthetic_payloads(
+        source, n_artists=n_artists, tracks_per_artist=tracks_per_artist, seed=seed
+    )
+    user: UserInfo = user_info(n_artists, tracks_per_artist)
+    results: List[Dict] = []
+    for max_workers in concurrency:
+        scheduler: Optional[RateLimitScheduler] = None
+        if rate_limited:
+            scheduler = RateLimitScheduler(rate=1e6, base_backoff=latency)
+        replay = ReplayStreamingAPIClient(
+            payloads,
+            source,
+            latency=latency,
+            jitter=jitter,
+            error_rates={429: rate_limited},
+            seed=seed,
+            scheduler=scheduler,
+        )
+        client = TimedClient(replay)
+        fetcher = GeneralFetcher(
+            client, GraphBuildingModeEnum(mode), max_workers=max_workers
+        )
+        start: float = time.perf_counter()
+        graph = fetcher.fetch_positive_graph(user)
+        elapsed: float = time.perf_counter() - start
+        result: Dict = {
+            "source": source,
+            "mode": mode,
+            "max_workers": max_workers,
+            "nodes": graph.graph.number_of_nodes(),
+            "seconds": elapsed,
+            "nodes_per_second": graph.graph.number_of_nodes() / elapsed,
+            "http_requests": replay.stats.requests,
+            "rate_limited": replay.stats.injected_errors,
+            "latency": {
+                method: {
+                    "calls": len(durations),
+                    "p50": percentile(durations, 0.5),
+                    "p99": percentile(durations, 0.99),
+                }
+                for method, durations in client.durations.items()
+            },
+        }
+        results.append(result)
+        _report(result)
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+def _report(result: Dict) -> None:
+    print(
+        f"{result['source']} {result['mode']} workers={result['max_workers']}: "
+        f"{result['nodes']} nodes in {result['seconds']:.2f}s "
+        f"({result['nodes_per_second']:.1f} nodes/s, "
+        f"{result['http_requests']} requests, {result['rate_limited']} rate limited)"
+    )
+    for method, stats in result["latency"].items():
+        print(
+            f"    {method}: {stats['calls']} calls, "
+            f"p50={1000 * stats['p50']:.1f}ms p99={1000 * stats['p99']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
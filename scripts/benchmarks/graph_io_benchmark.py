@@ -0,0 +1,121 @@
+"""Benchmark of the graph files, gzipped json against the memory-mapped CSR format
+
+An artist graph, each artist with similar artists, is written in both formats,
+then read back as a MusicGraph, and queried through a MappedGraph without
+being loaded.
+
+Examples:
+    python scripts/benchmarks/graph_io_benchmark.py --n_artists=200000
+"""
+
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.graph.csr import MappedGraph
+from music_graph.datamodel.graph.graph import (
+    MusicGraph,
+    node_from_dict,
+    node_to_dict,
+)
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+
+
+def artist_graph(n_artists: int, similar: int, seed: int) -> MusicGraph:
+    rand = random.Random(seed)  # nosec
+    graph = MusicGraph()
+    for i in range(n_artists):
+        similar_ids: List[str] = [
+            f"artist{rand.randrange(n_artists)}" for _ in range(similar)
+        ]
+        artist = ArtistData(
+            f"artist{i}", [], i, "", ["pop"], "", f"Artist {i}", 0.5, "", similar_ids
+        )
+        neighbors = [NeighborData(_id, rand.random()) for _id in similar_ids]
+        graph.add_node(GraphNode(artist.id, artist, neighbors))
+    return graph
+
+
+def write_json(graph: MusicGraph, path: str) -> None:
+    content: Dict = {
+        "nodes": [node_to_dict(node) for node in graph.raw_node.values()],
+        "node_aliases": list(graph.node_aliases.items()),
+        "seed_versions": list(graph.seed_versions.items()),
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(content, file)
+
+
+def read_json(path: str) -> MusicGraph:
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        content: Dict = json.load(file)
+    graph = MusicGraph(seed_versions=dict(content["seed_versions"]))
+    for node_dict in content["nodes"]:
+        graph.add_node(node_from_dict(node_dict))
+    return graph
+
+
+def timed(func, *args) -> float:
+    start: float = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def query(path: str, node_ids: List[str]) -> None:
+    with MappedGraph(path) as mapped:
+        for node_id in node_ids:
+            mapped.neighbors(node_id)
+
+
+def run(
+    n_artists: int = 50000,
+    similar: int = 20,
+    queries: int = 1000,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> None:
+    """Write, read and query times of both graph formats
+
+    Args:
+        n_artists (int): number of fetched artists
+        similar (int): number of similar artists of each artist
+        queries (int): number of neighbor queries of the mapped graph
+        seed (int): seed of the similar artists
+        output (Optional[str]): path of a json file receiving the results
+    """
+    graph: MusicGraph = artist_graph(n_artists, similar, seed)
+    node_ids: List[str] = random.Random(seed).sample(  # nosec
+        list(graph.raw_node), min(queries, n_artists)
+    )
+    directory: str = tempfile.mkdtemp()
+    json_path: str = os.path.join(directory, "graph.gz")
+    csr_path: str = os.path.join(directory, "graph.csr")
+    results: Dict[str, float] = {
+        "edges": graph.graph.number_of_edges(),
+        "json_write_s": timed(write_json, graph, json_path),
+        "json_read_s": timed(read_json, json_path),
+        "json_bytes": os.path.getsize(json_path),
+        "csr_write_s": timed(graph.write, csr_path),
+        "csr_read_s": timed(MusicGraph.read, csr_path),
+        "csr_bytes": os.path.getsize(csr_path),
+        "mapped_open_s": timed(lambda: MappedGraph(csr_path).close()),
+        "mapped_queries_s": timed(query, csr_path, node_ids),
+    }
+    for name, value in results.items():
+        print(
+            f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}"
+        )
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
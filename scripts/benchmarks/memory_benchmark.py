@@ -0,0 +1,116 @@
+"""Memory benchmark of the graph nodes, plain and compact datamodel
+
+Artists with spotify-like 22 characters ids are parsed from json, as the
+clients do, and added to a MusicGraph, with and without compact nodes.
+
+Examples:
+    python scripts/benchmarks/memory_benchmark.py --n_artists=100000
+"""
+
+import gc
+import json
+import random
+import string
+import tracemalloc
+from typing import Dict, List, Optional
+
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.graph.node import GraphNode, NeighborData
+
+ID_ALPHABET: str = string.ascii_letters + string.digits
+
+
+def artist_payloads(n_artists: int, similar: int, seed: int) -> List[str]:
+    """Json of the artists and of their similar artists, one per artist"""
+    rand = random.Random(seed)  # nosec
+    ids: List[str] = [
+        "".join(rand.choices(ID_ALPHABET, k=22)) for _ in range(n_artists)
+    ]
+    payloads: List[str] = []
+    for i, artist_id in enumerate(ids):
+        similar_ids: List[str] = [ids[(i + k) % n_artists] for k in range(1, similar)]
+        artist: Dict = {
+            "id": artist_id,
+            "name": f"Artist {i}",
+            "popularity": rand.randint(0, 100),
+            "uri": f"spotify:artist:{artist_id}",
+            "href": f"https://api.spotify.com/v1/artists/{artist_id}",
+            "followers": {"href": None, "total": rand.randint(0, 10**6)},
+            "genres": ["pop", "rock"],
+        }
+        related: Dict = {"artists": [{"id": _id} for _id in similar_ids]}
+        payloads.append(json.dumps([artist, related]))
+    return payloads
+
+
+def build_graph(payloads: List[str], compact: bool) -> MusicGraph:
+    graph = MusicGraph(compact=compact)
+    for payload in payloads:
+        artist_data, related = json.loads(payload)
+        artist = ArtistData.from_spotify_dict(
+            artist_data["id"], artist_data, similar_artists=related
+        )
+        neighbors = [NeighborData(_id) for _id in artist.similar_artist_ids]
+        graph.add_node(GraphNode(artist.id, artist, neighbors))
+    return graph
+
+
+def measure(payloads: List[str], compact: bool) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    graph: Optional[MusicGraph] = build_graph(payloads, compact)
+    gc.collect()
+    total: int = tracemalloc.get_traced_memory()[0]
+    raw_nodes: int = sum(
+        stat.size
+        for stat in tracemalloc.take_snapshot().statistics("filename")
+        if "networkx" not in stat.traceback[0].filename
+    )
+    tracemalloc.stop()
+    n_nodes: int = len(payloads)
+    del graph
+    return {
+        "bytes_per_node": total / n_nodes,
+        "raw_node_bytes_per_node": raw_nodes / n_nodes,
+    }
+
+
+def run(
+    n_artists: int = 20000,
+    similar: int = 20,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> None:
+    """Bytes per node of an artist graph, plain and compact
+
+    Args:
+        n_artists (int): number of artists, i.e. of graph nodes
+        similar (int): number of similar artists of each artist
+        seed (int): seed of the ids and values
+        output (Optional[str]): path of a json file receiving the results
+    """
+    payloads: List[str] = artist_payloads(n_artists, similar, seed)
+    results: Dict[str, Dict[str, float]] = {
+        "plain": measure(payloads, compact=False),
+        "compact": measure(payloads, compact=True),
+    }
+    for name, result in results.items():
+        print(
+            f"{name}: {result['bytes_per_node']:.0f} bytes per node, "
+            f"{result['raw_node_bytes_per_node']:.0f} outside of networkx"
+        )
+    saved: float = 1 - (
+        results["compact"]["raw_node_bytes_per_node"]
+        / results["plain"]["raw_node_bytes_per_node"]
+    )
+    print(f"compact nodes save {100 * saved:.0f}% outside of networkx")
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
@@ -0,0 +1,85 @@
+from typing import Callable, Dict, Optional, Sequence
+
+import pytest
+import spotipy
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.data.general_fetcher import GeneralFetcher, GraphBuildingModeEnum
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.replay_client import ReplayHTTPSession, ReplayStreamingAPIClient
+from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+@pytest.fixture()
+def spotify_client() -> Callable[..., SpotifyStreamingAPIClient]:
+    """Factory of spotify clients replaying the synthetic catalog of 2 artists
+
+    The keyword arguments are the ones of SpotifyStreamingAPIClient.
+    """
+
+    def build(**kwargs) -> SpotifyStreamingAPIClient:
+        session = ReplayHTTPSession(synthetic_payloads("spotify", n_artists=2))
+        return SpotifyStreamingAPIClient(
+            spotipy.Spotify(requests_session=session), **kwargs
+        )
+
+    return build
+
+
+@pytest.fixture()
+def synthetic_user() -> Callable[..., UserInfo]:
+    """Factory of the users of the synthetic catalogs, with the given seeds"""
+
+    def build(
+        artist_ids: Sequence[str] = (),
+        track_ids: Sequence[str] = (),
+        playlist_ids: Sequence[str] = (),
+        playlist_snapshots: Optional[Dict[str, str]] = None,
+    ) -> UserInfo:
+        return UserInfo(
+            id="user",
+            display_name="user",
+            href="",
+            uri="",
+            playlist_ids=list(playlist_ids),
+            artist_ids=list(artist_ids),
+            top_track_ids=list(track_ids),
+            saved_track_ids=[],
+            saved_album_ids=[],
+            playlist_snapshots=dict(playlist_snapshots or {}),
+        )
+
+    return build
+
+
+@pytest.fixture()
+def replay_graph(synthetic_user) -> Callable[..., MusicGraph]:
+    """Factory of the positive graph of a user, fetched from a replayed catalog
+
+    The user is the synthetic user of the given seeds, unless one is given. The
+    client is a ReplayStreamingAPIClient over the synthetic catalog of n_artists
+    of the source, unless one is given, e.g. wrapping such a client. The other
+    keyword arguments are the ones of GeneralFetcher.
+    """
+
+    def build(
+        mode: GraphBuildingModeEnum,
+        artist_ids: Sequence[str] = (),
+        track_ids: Sequence[str] = (),
+        user_info: Optional[UserInfo] = None,
+        n_artists: int = 10,
+        source: str = "spotify",
+        client: Optional[AbstractStreamingAPIClient] = None,
+        **fetcher_kwargs,
+    ) -> MusicGraph:
+        if user_info is None:
+            user_info = synthetic_user(artist_ids, track_ids)
+        if client is None:
+            payloads = synthetic_payloads(source, n_artists=n_artists)
+            client = ReplayStreamingAPIClient(payloads, source)
+        fetcher = GeneralFetcher(client, mode, **fetcher_kwargs)
+        return fetcher.fetch_positive_graph(user_info)
+
+    return build
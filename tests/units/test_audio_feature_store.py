@@ -0,0 +1,86 @@
+import math
+from typing import List
+
+import numpy as np
+
+from music_graph.data.audio_feature_store import (
+    FEATURE_NAMES,
+    AudioFeatureStore,
+    graph_track_ids,
+)
+from music_graph.data.general_fetcher import GraphBuildingModeEnum
+from music_graph.utils.memory_cache_client import InMemoryCachingStreamingAPIClient
+from music_graph.utils.replay_client import ReplayStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+def _track_ids(n_artists: int) -> List[str]:
+    return [f"track{i}x{j}" for i in range(n_artists) for j in range(2)]
+
+
+def test_features_are_fetched_by_batches_of_100(replay_graph):
+    client = ReplayStreamingAPIClient(synthetic_payloads("spotify", n_artists=120))
+    graph = replay_graph(
+        GraphBuildingModeEnum.TRACK, track_ids=_track_ids(120), client=client
+    )
+    requests = client.stats.requests
+    store = AudioFeatureStore.fetch(client, graph, max_workers=4)
+
+    n_tracks = len(graph_track_ids(graph))
+    assert len(store) == n_tracks == 240
+    assert client.stats.requests - requests == math.ceil(n_tracks / 100)
+    assert store.matrix.shape == (n_tracks, len(FEATURE_NAMES))
+    assert store.matrix.flags["C_CONTIGUOUS"]
+    features = client.get_audio_features(store.track_ids)
+    np.testing.assert_allclose(
+        store.matrix,
+        [[getattr(f, name) for name in FEATURE_NAMES] for f in features],
+        rtol=1e-6,
+    )
+
+
+def test_filters_and_similarities_match_python_loops(replay_graph):
+    client = ReplayStreamingAPIClient(synthetic_payloads(n_artists=30))
+    graph = replay_graph(
+        GraphBuildingModeEnum.TRACK, track_ids=_track_ids(30), client=client
+    )
+    store = AudioFeatureStore.fetch(client, graph, max_workers=4)
+    features = dict(zip(store.track_ids, store.matrix.tolist()))
+    tempo, energy = FEATURE_NAMES.index("tempo"), FEATURE_NAMES.index("energy")
+
+    filtered = store.filter(tempo_range=(90, 150), min_energy=0.3)
+    assert filtered.track_ids == [
+        track_id
+        for track_id, values in features.items()
+        if 90 <= values[tempo] <= 150 and values[energy] >= 0.3
+    ]
+
+    normalized = store.normalized()
+    np.testing.assert_allclose(normalized.matrix.mean(axis=0), 0, atol=1e-5)
+    query = normalized.vector(store.track_ids[0]).tolist()
+
+    def cosine(values):
+        dot = sum(a * b for a, b in zip(query, values))
+        return dot / math.sqrt(sum(a * a for a in query) * sum(b * b for b in values))
+
+    expected = sorted(
+        (
+            (cosine(values), track_id)
+            for track_id, values in zip(store.track_ids, normalized.matrix.tolist())
+            if track_id != store.track_ids[0]
+        ),
+        reverse=True,
+    )[:5]
+    similar = normalized.most_similar(store.track_ids[0], k=5)
+    assert [track_id for track_id, _ in similar] == [t for _, t in expected]
+    np.testing.assert_allclose([s for _, s in similar], [s for s, _ in expected], 1e-5)
+
+
+def test_memory_cache_serves_the_features_again():
+    replay = ReplayStreamingAPIClient(synthetic_payloads(n_artists=3))
+    client = InMemoryCachingStreamingAPIClient(replay)
+    first = client.get_audio_features(["track0x0", "track1x0", "unknown"])
+    requests = replay.stats.requests
+    assert len(first) == 2
+    assert client.get_audio_features(["track1x0", "track0x0"]) == first[::-1]
+    assert replay.stats.requests == requests
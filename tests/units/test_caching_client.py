@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Collection, List, Optional
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.artist import ArtistData
+from music_graph.utils.caching_client import CachingStreamingAPIClient
+
+
+class CountingClient(AbstractStreamingAPIClient):
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        self.calls[artist_id] += 1
+        artist = ArtistData(
+            id=artist_id,
+            album_ids=["album"],
+            follower_num=3,
+            follower_href="",
+            genres=["jazz"],
+            href="",
+            name=artist_id,
+            popularity=12.0,
+            uri="",
+            similar_artist_ids=["other"],
+        )
+        if include is not None and "similar_artists" not in include:
+            artist.defer("similar_artist_ids", lambda: ["other"], unloaded=[])
+        return artist
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        self.calls[f"neighbors_{artist_id}"] += 1
+        return ["a", "b"]
+
+
+def test_cached_responses_round_trip_and_count_hits(tmp_path):
+    inner = CountingClient()
+    path = str(tmp_path / "cache.sqlite")
+    client = CachingStreamingAPIClient(inner, path=path)
+    first = client.get_artist("x")
+    assert client.get_artist("x") == first
+    assert client.get_artist_neighbors("x") == client.get_artist_neighbors("x")
+    assert client.get_artists(["x", "y"]) == [first, inner.get_artist("y")]
+    assert inner.calls["x"] == 2  # get_artist and get_artists are cached apart
+    assert client.stats.hit_count == 2
+    client.close()
+
+    warm = CachingStreamingAPIClient(CountingClient(), path=path)
+    assert warm.get_artist("x") == first
+    assert warm.stats.hit_count == 1 and warm.client.calls["x"] == 0
+
+
+def test_expired_entries_are_refetched():
+    inner = CountingClient()
+    client = CachingStreamingAPIClient(inner, path=":memory:", ttls={"get_artist": -1})
+    client.get_artist("x")
+    client.get_artist("x")
+    assert inner.calls["x"] == 2
+    assert client.stats.miss_count == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    inner = CountingClient()
+    client = CachingStreamingAPIClient(
+        inner, path=":memory:", max_entries=2, access_resolution=0
+    )
+    client.get_artist("x")
+    client.get_artist("y")
+    client.get_artist("x")
+    client.get_artist("z")
+    assert len(client) == 2
+    assert client.stats.evictions == 1
+    client.get_artist("x")
+    client.get_artist("y")
+    assert inner.calls == Counter({"x": 1, "y": 2, "z": 1})
+
+
+def test_access_times_are_only_written_once_per_resolution():
+    client = CachingStreamingAPIClient(CountingClient(), path=":memory:")
+    client.get_artist("x")
+    statements: List[str] = []
+    client._connection.set_trace_callback(statements.append)
+    client.get_artist("x")
+    assert not [s for s in statements if s.startswith("UPDATE")]
+
+    client.access_resolution = 0
+    client.get_artist("x")
+    assert [s for s in statements if s.startswith("UPDATE")]
+
+
+def test_pending_fields_are_not_stored_and_load_on_access():
+    inner = CountingClient()
+    client = CachingStreamingAPIClient(inner, path=":memory:")
+    client.get_artist("x", include=())
+    cached = client.get_artist("x", include=())
+    assert not cached.is_loaded("similar_artist_ids")
+    assert cached.similar_artist_ids == ["other"]
+    assert inner.calls["x"] == 2
@@ -0,0 +1,45 @@
+import numpy as np
+
+from music_graph.datamodel.audio_analysis import AudioAnalysis
+from music_graph.datamodel.columnar_audio_analysis import ColumnarAudioAnalysis
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+def _assert_same_dict(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            for actual_item, item in zip(actual[key], value):
+                _assert_same_dict(actual_item, item)
+            assert len(actual[key]) == len(value)
+        elif isinstance(value, (float, list)):
+            # The pitches and timbre are float32
+            np.testing.assert_allclose(actual[key], value, rtol=1e-6)
+        else:
+            assert actual[key] == value
+
+
+def test_columnar_analysis_matches_the_object_analysis():
+    payloads = synthetic_payloads("spotify", n_artists=2, segments_per_track=50)
+    payload = payloads["audio-analysis/track0x0"]
+    objects = AudioAnalysis.from_dict(payload)
+    columnar = ColumnarAudioAnalysis.from_dict(payload)
+
+    assert columnar.segments["timbre"].shape == (50, 12)
+    np.testing.assert_allclose(
+        columnar.segments["loudness_max"], [s.loudness_max for s in objects.segments]
+    )
+    _assert_same_dict(columnar.to_dict(), objects.to_dict())
+    _assert_same_dict(columnar.to_audio_analysis().to_dict(), objects.to_dict())
+    # The output of to_dict builds the same columns
+    again = ColumnarAudioAnalysis.from_dict(columnar.to_dict())
+    assert np.array_equal(again.segments, columnar.segments)
+
+
+def test_spotify_client_builds_columnar_analyses(spotify_client):
+    client = spotify_client(columnar_analysis=True)
+    assert isinstance(
+        client.get_track("track0x0").audio_analysis, ColumnarAudioAnalysis
+    )
+    lazy = client.get_track("track0x0", include=())
+    assert isinstance(lazy.audio_analysis, ColumnarAudioAnalysis)
@@ -0,0 +1,39 @@
+from music_graph.data.general_fetcher import GraphBuildingModeEnum
+from music_graph.datamodel.compact import CompactArtistData, CompactTrackData
+from music_graph.datamodel.graph.graph import MusicGraph, node_to_dict
+
+ARTIST_IDS = [f"artist{i}" for i in range(10)]
+TRACK_IDS = [f"track{i}x0" for i in range(10)]
+
+
+def test_compact_nodes_round_trip_and_share_their_ids(replay_graph):
+    plain = replay_graph(GraphBuildingModeEnum.ARTIST, ARTIST_IDS, TRACK_IDS)
+    assert plain.raw_node
+    compact = MusicGraph(compact=True)
+    for node in plain.raw_node.values():
+        compact.add_node(node)
+
+    assert set(compact.graph.edges) == set(plain.graph.edges)
+    for node_id, node in compact.raw_node.items():
+        assert isinstance(node.object, CompactArtistData)
+        assert not hasattr(node.object, "__dict__")
+        # Both sides hold the lazy fields loaded when the node was compacted
+        assert node_to_dict(node) == node_to_dict(plain.raw_node[node_id])
+        # The references to a node share the string of its id
+        for neighbor in node.neighbor_ids:
+            assert neighbor.id is compact.raw_node[neighbor.id].id
+        for similar_id in node.object.similar_artist_ids:
+            assert similar_id is compact.raw_node[similar_id].id
+
+
+def test_compact_graph_is_written_like_the_plain_graph(replay_graph, tmp_path):
+    plain = replay_graph(GraphBuildingModeEnum.TRACK, ARTIST_IDS, TRACK_IDS)
+    plain.write(str(tmp_path / "plain.gz"))
+    compact = MusicGraph.read(str(tmp_path / "plain.gz"), compact=True)
+    compact.write(str(tmp_path / "compact.gz"))
+
+    assert compact.raw_node and all(
+        isinstance(node.object, CompactTrackData) for node in compact.raw_node.values()
+    )
+    read = MusicGraph.read(str(tmp_path / "compact.gz"))
+    assert read.raw_node == MusicGraph.read(str(tmp_path / "plain.gz")).raw_node
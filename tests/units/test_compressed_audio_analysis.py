@@ -0,0 +1,52 @@
+import pickle
+import threading
+
+from music_graph.datamodel import audio_analysis
+from music_graph.datamodel.audio_analysis import AudioAnalysis, CompressedAudioAnalysis
+from music_graph.datamodel.columnar_audio_analysis import ColumnarAudioAnalysis
+from music_graph.datamodel.track import TrackData
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+def test_compressed_analysis_is_decoded_on_first_access_only(spotify_client):
+    eager: TrackData = spotify_client().get_track("track0x0")
+    track: TrackData = spotify_client(compressed_analysis=True).get_track("track0x0")
+    analysis = track.audio_analysis
+
+    assert isinstance(analysis, CompressedAudioAnalysis)
+    assert track.to_dict() == eager.to_dict()
+    assert not analysis.is_decoded()
+    assert analysis.tempo == eager.audio_analysis.tempo
+    assert analysis.decode() is analysis.decode()
+    assert isinstance(analysis.decode(), AudioAnalysis)
+    assert analysis == eager.audio_analysis
+    assert TrackData.from_dict(track.to_dict()) == eager
+
+    copy = pickle.loads(pickle.dumps(analysis))
+    assert not copy.is_decoded() and copy == analysis
+
+
+def test_compressed_analysis_decodes_to_columns(spotify_client):
+    client = spotify_client(compressed_analysis=True, columnar_analysis=True)
+    analysis = client.get_track("track0x0", include=()).audio_analysis
+    assert isinstance(analysis, CompressedAudioAnalysis)
+    assert isinstance(analysis.decode(), ColumnarAudioAnalysis)
+    assert analysis.segments["pitches"].shape == (10, 12)
+
+
+def test_compression_is_deferred_off_the_construction_path():
+    payloads = synthetic_payloads("spotify", n_artists=1, tracks_per_artist=1)
+    payload = payloads["audio-analysis/track0x0"]
+    analysis = CompressedAudioAnalysis.from_dict(payload)
+    compressed: bytes = analysis.compress()
+    assert repr(analysis) == f"CompressedAudioAnalysis({len(compressed)} bytes)"
+    assert analysis.compress() is compressed
+    assert analysis.payload() == payload
+    assert CompressedAudioAnalysis(compressed).to_dict() == analysis.to_dict()
+
+
+def test_compression_is_inline_once_too_many_are_pending(monkeypatch):
+    monkeypatch.setattr(audio_analysis, "_PENDING_COMPRESSIONS", threading.Semaphore(0))
+    payloads = synthetic_payloads("spotify", n_artists=1, tracks_per_artist=1)
+    analysis = CompressedAudioAnalysis.from_dict(payloads["audio-analysis/track0x0"])
+    assert repr(analysis) != "CompressedAudioAnalysis(pending compression)"
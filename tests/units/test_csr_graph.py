@@ -0,0 +1,67 @@
+import pytest
+
+from music_graph.data.general_fetcher import GraphBuildingModeEnum
+from music_graph.datamodel.graph.csr import MappedGraph
+from music_graph.datamodel.graph.graph import MusicGraph, node_to_dict
+
+TRACK_IDS = [f"track{i}x0" for i in range(0, 10, 2)]
+
+
+def _content(graph: MusicGraph):
+    return (
+        list(graph.graph.nodes(data=True)),
+        sorted(graph.graph.edges(data=True)),
+        [node_to_dict(node) for node in graph.raw_node.values()],
+        graph.seed_versions,
+    )
+
+
+def test_written_graph_is_read_back(replay_graph, tmp_path):
+    graph = replay_graph(GraphBuildingModeEnum.TRACK, track_ids=TRACK_IDS)
+    graph.seed_versions = {"track0x0": None}
+    path = str(tmp_path / "graph.csr")
+    graph.write(path)
+    read = MusicGraph.read(path)
+
+    assert _content(read) == _content(graph)
+    assert read.ids == graph.ids
+    compact = MusicGraph.read(path, compact=True)
+    compact.write(str(tmp_path / "compact.csr"))
+    assert _content(MusicGraph.read(str(tmp_path / "compact.csr"))) == _content(graph)
+
+
+def test_mapped_graph_serves_neighbors_and_nodes(replay_graph, tmp_path):
+    graph = replay_graph(GraphBuildingModeEnum.TRACK, track_ids=TRACK_IDS)
+    graph.seed_versions = {"track0x0": None}
+    path = str(tmp_path / "graph.csr")
+    graph.write(path)
+
+    with MappedGraph(path) as mapped:
+        assert len(mapped) == len(graph.ids)
+        for node_id in graph.graph.nodes:
+            neighbors = mapped.neighbors(node_id)
+            assert sorted(n.id for n in neighbors) == sorted(graph.graph[node_id])
+            for neighbor in neighbors:
+                edge = graph.graph.edges[node_id, neighbor.id]
+                assert (neighbor.edge_weight, neighbor.edge_cap) == (
+                    edge["weight"],
+                    edge["cap"],
+                )
+            assert mapped.degree(node_id) == graph.graph.degree(node_id)
+            assert mapped.index_of(node_id) == graph.ids.lookup(node_id)
+            node = mapped.node(node_id)
+            if node_id in graph.raw_node:
+                assert node_to_dict(node) == node_to_dict(graph.raw_node[node_id])
+            else:
+                assert node is None
+        assert "unknown" not in mapped
+        with pytest.raises(KeyError):
+            mapped.neighbors("unknown")
+
+
+def test_other_files_are_not_read(tmp_path):
+    path = tmp_path / "graph.gz"
+    path.write_bytes(b"not a graph")
+
+    with pytest.raises(ValueError):
+        MusicGraph.read(str(path))
@@ -0,0 +1,492 @@
+import threading
+import time
+from functools import partial
+from typing import Collection, Dict, List, Optional
+
+import pytest
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.data.async_fetcher import AsyncGeneralFetcher
+from music_graph.data.crawler import CrawlBudget
+from music_graph.data.general_fetcher import GeneralFetcher, GraphBuildingModeEnum
+from music_graph.data.multi_source_fetcher import MultiSourceFetcher
+from music_graph.datamodel.artist import ArtistData
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.playlist import PlaylistData
+from music_graph.datamodel.user_info import UserInfo
+from music_graph.utils.async_executor_client import ExecutorAsyncStreamingAPIClient
+from music_graph.utils.replay_client import ReplayStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+ARTIST_IDS: List[str] = [f"artist_{i}" for i in range(40)]
+
+
+class FakeStreamingAPIClient(AbstractStreamingAPIClient):
+    def __init__(self, delay: float = 0.0, fail_after: Optional[int] = None) -> None:
+        self.delay = delay
+        self.fail_after = fail_after
+        self.fetched: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def _call(self) -> None:
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+
+    def get_user_info(self, user_id: str) -> UserInfo:
+        return UserInfo(
+            id=user_id,
+            display_name=user_id,
+            href="",
+            uri="",
+            playlist_ids=[],
+            artist_ids=ARTIST_IDS,
+            top_track_ids=[],
+            saved_track_ids=[],
+            saved_album_ids=[],
+        )
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        self._call()
+        if self.fail_after is not None and len(self.fetched) >= self.fail_after:
+            raise ConnectionError("Network is down")
+        self.fetched.append(artist_id)
+        return ArtistData(
+            id=artist_id,
+            album_ids=[],
+            follower_num=0,
+            follower_href="",
+            genres=[],
+            href="",
+            name=artist_id,
+            popularity=0.0,
+            uri=f"spotify:artist:{artist_id}",
+        )
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        self._call()
+        index: int = int(artist_id.split("_")[1])
+        return [f"artist_{(index + k) % 50}" for k in (1, 3, 7)]
+
+
+class RelatedArtistsClient(FakeStreamingAPIClient):
+    """Client filling the similar artists with the artist, like get_artist does"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.neighbor_calls = 0
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        artist = super().get_artist(artist_id, include)
+        artist.similar_artist_ids = super().get_artist_neighbors(artist_id)
+        return artist
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        self.neighbor_calls += 1
+        return super().get_artist_neighbors(artist_id)
+
+
+def _graph_content(fetcher: GeneralFetcher):
+    return _content(fetcher.fetch_graph("user", augment_graph=False))
+
+
+def _content(graph):
+    return (
+        list(graph.graph.nodes(data=True)),
+        list(graph.graph.edges(data=True)),
+        list(graph.raw_node.keys()),
+    )
+
+
+def test_concurrent_graph_is_identical_to_sequential():
+    sequential = GeneralFetcher(
+        client=FakeStreamingAPIClient(),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+    )
+    concurrent = GeneralFetcher(
+        client=FakeStreamingAPIClient(delay=0.001),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+        max_workers=8,
+    )
+    assert _graph_content(sequential) == _graph_content(concurrent)
+
+
+def test_concurrent_fetch_respects_in_flight_limit():
+    client = FakeStreamingAPIClient(delay=0.005)
+    fetcher = GeneralFetcher(
+        client=client,
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+        max_workers=8,
+        max_in_flight=3,
+    )
+    fetcher.fetch_graph("user", augment_graph=False)
+    assert 1 < client.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_async_fetcher_matches_sync_and_bounds_concurrency():
+    client = FakeStreamingAPIClient(delay=0.005)
+    fetcher = AsyncGeneralFetcher(
+        client=ExecutorAsyncStreamingAPIClient(client, max_concurrency=4),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+    )
+    graph = await fetcher.fetch_graph("user", augment_graph=False)
+    sequential = GeneralFetcher(
+        client=FakeStreamingAPIClient(),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+    )
+    assert _content(graph) == _graph_content(sequential)
+    assert 1 < client.max_in_flight <= 4
+
+
+@pytest.mark.asyncio
+async def test_neighbors_are_read_from_the_fetched_relations():
+    expected = _graph_content(
+        GeneralFetcher(FakeStreamingAPIClient(), GraphBuildingModeEnum.ARTIST)
+    )
+    client = RelatedArtistsClient()
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.ARTIST)
+    assert _graph_content(fetcher) == expected
+    async_fetcher = AsyncGeneralFetcher(
+        client=ExecutorAsyncStreamingAPIClient(client),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+    )
+    graph = await async_fetcher.fetch_graph("user", augment_graph=False)
+    assert _content(graph) == expected
+    assert client.neighbor_calls == 0
+
+
+def _crawl(budget: CrawlBudget, max_workers: int = 1):
+    client = FakeStreamingAPIClient()
+    fetcher = GeneralFetcher(
+        client, GraphBuildingModeEnum.ARTIST, max_workers=max_workers
+    )
+    graph = fetcher.fetch_graph("user", augment_graph=False)
+    client.calls = 0
+    added = set(fetcher.enhance_recursive_graph(graph, budget).raw_node)
+    return added - set(ARTIST_IDS), client.calls
+
+
+def test_crawl_fetches_the_most_shared_neighbors_first():
+    # artist_40 is a neighbor of three seeds, artist_41 and artist_42 of two
+    added, _ = _crawl(CrawlBudget(max_nodes=3))
+    assert added == {"artist_40", "artist_41", "artist_42"}
+
+
+def test_crawl_respects_depth_fan_out_and_request_budgets():
+    added, _ = _crawl(CrawlBudget(max_depth=1, max_nodes=100))
+    assert added == {f"artist_{i}" for i in range(40, 47)}
+    added, _ = _crawl(CrawlBudget(max_depth=1, max_nodes=100, fan_out=1))
+    assert added == {"artist_40", "artist_41", "artist_42", "artist_43"}
+    # One artists lookup and one neighbors lookup per node
+    added, calls = _crawl(CrawlBudget(max_nodes=100, max_requests=7))
+    assert calls == 6 and len(added) == 3
+    # The fake client looks each artist up with its own call
+    added, calls = _crawl(CrawlBudget(max_nodes=100, max_requests=20), 4)
+    assert calls == 20 and len(added) == 10
+
+
+def test_interrupted_crawl_resumes_without_refetching(tmp_path):
+    budget = CrawlBudget(max_nodes=20)
+    path = str(tmp_path / "graph.gz")
+    flaky = FakeStreamingAPIClient(fail_after=len(ARTIST_IDS) + 5)
+    with pytest.raises(ConnectionError):
+        GeneralFetcher(
+            flaky, GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+        ).fetch_graph_and_write("user", path)
+
+    client = FakeStreamingAPIClient()
+    GeneralFetcher(
+        client, GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph_and_write("user", path)
+
+    # The fake catalog has 50 artists, all fetched exactly once over both runs
+    assert sorted(client.fetched + flaky.fetched) == sorted(
+        f"artist_{i}" for i in range(50)
+    )
+    expected = GeneralFetcher(
+        FakeStreamingAPIClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    assert _content(MusicGraph.read(path)) == _content(expected)
+    assert not (tmp_path / "graph.gz.journal").exists()
+
+
+class OverlappingUsersClient(FakeStreamingAPIClient):
+    def get_user_info(self, user_id: str) -> UserInfo:
+        user_info = super().get_user_info(user_id)
+        index: int = int(user_id.split("_")[1])
+        user_info.artist_ids = [f"artist_{i}" for i in range(index, index + 20)]
+        return user_info
+
+
+def test_batch_build_fetches_each_entity_once():
+    user_ids = [f"user_{i}" for i in range(0, 30, 5)]
+    budget = CrawlBudget(max_nodes=10)
+    client = OverlappingUsersClient()
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.ARTIST, crawl_budget=budget)
+    graphs, store = fetcher.fetch_graphs(user_ids)
+
+    assert sorted(client.fetched) == sorted(set(client.fetched))
+    assert len(store) == len(client.fetched)
+    for user_id in user_ids:
+        alone = GeneralFetcher(
+            OverlappingUsersClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+        )
+        assert _content(graphs[user_id]) == _content(alone.fetch_graph(user_id))
+
+
+class OtherSourceClient(FakeStreamingAPIClient):
+    """The same catalog under other ids, like the tidal version of a spotify one"""
+
+    def get_user_info(self, user_id: str) -> UserInfo:
+        user_info = super().get_user_info(user_id)
+        user_info.artist_ids = [_id.replace("artist", "other") for _id in ARTIST_IDS]
+        return user_info
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        artist = super().get_artist(artist_id, include)
+        artist.name = artist_id.replace("other", "artist")
+        artist.uri = f"https://tidal.com/browse/artist/{artist_id}"
+        return artist
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        neighbor_ids = super().get_artist_neighbors(artist_id)
+        return [_id.replace("artist", "other") for _id in neighbor_ids]
+
+
+def _catalog_edges(graph: MusicGraph):
+    index = {_id: _id.split("_")[1] for _id in graph.graph}
+    return {frozenset((index[u], index[v])) for u, v in graph.graph.edges}
+
+
+def test_multi_source_fetch_resolves_the_shared_entities():
+    budget = CrawlBudget(max_depth=10, max_nodes=100)
+    clients = [FakeStreamingAPIClient(delay=0.001), OtherSourceClient(delay=0.001)]
+    fetcher = MultiSourceFetcher(
+        clients, GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    )
+    graph = fetcher.fetch_graph("user")
+
+    single = GeneralFetcher(
+        FakeStreamingAPIClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    other = GeneralFetcher(
+        OtherSourceClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    assert graph.graph.number_of_nodes() == single.graph.number_of_nodes() == 50
+    assert sum(len(aliases) for aliases in graph.node_aliases.values()) == 50
+    assert len(graph.raw_node) == 100
+    assert _catalog_edges(graph) == _catalog_edges(single)
+    assert _catalog_edges(MusicGraph.merge([single, other])) == _catalog_edges(graph)
+
+
+class HomonymsClient(FakeStreamingAPIClient):
+    """Different artists of one source, all with the same name"""
+
+    def get_artist(
+        self, artist_id: str, include: Optional[Collection[str]] = None
+    ) -> ArtistData:
+        artist = super().get_artist(artist_id, include)
+        artist.name = "Nirvana"
+        return artist
+
+
+def test_entities_of_one_source_are_not_resolved():
+    budget = CrawlBudget(max_depth=10, max_nodes=100)
+    clients = [FakeStreamingAPIClient(), FakeStreamingAPIClient()]
+    graph = MultiSourceFetcher(
+        clients, GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    assert graph.graph.number_of_nodes() == 50 and not graph.node_aliases
+
+    single = GeneralFetcher(
+        HomonymsClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    assert not single.resolve_sources
+    merged = MusicGraph.merge([single])
+    assert merged.graph.number_of_nodes() == single.graph.number_of_nodes() == 50
+    assert not merged.node_aliases
+
+
+class FakePlaylistClient(AbstractStreamingAPIClient):
+    def __init__(self, snapshots: Dict[str, str]) -> None:
+        self.snapshots = snapshots
+        self.fetched: List[str] = []
+
+    def get_playlist(self, playlist_id: str) -> PlaylistData:
+        self.fetched.append(playlist_id)
+        index: int = int(playlist_id.split("_")[1])
+        return PlaylistData(
+            id=playlist_id,
+            follower_number=0,
+            name=playlist_id,
+            uri="",
+            description="",
+            duration=0,
+            track_ids=[f"track_{index}"],
+            snapshot_id=self.snapshots[playlist_id],
+        )
+
+    def get_playlist_neighbors(self, playlist_id: str) -> List[str]:
+        index: int = int(playlist_id.split("_")[1])
+        return [f"playlist_{index + 1}"]
+
+    def user_info(self) -> UserInfo:
+        return UserInfo(
+            id="user",
+            display_name="user",
+            href="",
+            uri="",
+            playlist_ids=list(self.snapshots),
+            artist_ids=[],
+            top_track_ids=[],
+            saved_track_ids=[],
+            saved_album_ids=[],
+            playlist_snapshots=dict(self.snapshots),
+        )
+
+
+def test_refresh_fetches_only_new_and_changed_playlists(tmp_path):
+    client = FakePlaylistClient({f"playlist_{i}": "v1" for i in range(5)})
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.PLAYLIST)
+    fetcher.fetch_positive_graph(client.user_info()).write(tmp_path / "graph.gz")
+    graph = MusicGraph.read(tmp_path / "graph.gz")
+
+    del client.snapshots["playlist_0"]
+    client.snapshots["playlist_2"] = "v2"
+    client.snapshots["playlist_7"] = "v1"
+    client.fetched.clear()
+    refreshed = fetcher.refresh_graph(graph, client.user_info())
+
+    assert sorted(client.fetched) == ["playlist_2", "playlist_7"]
+    rebuilt = GeneralFetcher(client, GraphBuildingModeEnum.PLAYLIST)
+    expected = rebuilt.fetch_positive_graph(client.user_info())
+    assert set(refreshed.graph.nodes) == set(expected.graph.nodes)
+    assert set(map(frozenset, refreshed.graph.edges)) == set(
+        map(frozenset, expected.graph.edges)
+    )
+    assert refreshed.seed_versions == expected.seed_versions
+    assert refreshed.raw_node["playlist_2"].object.snapshot_id == "v2"
+
+
+@pytest.mark.asyncio
+async def test_async_crawl_matches_sync_crawl():
+    budget = CrawlBudget(max_nodes=3)
+    sync_graph = GeneralFetcher(
+        FakeStreamingAPIClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user")
+    fetcher = AsyncGeneralFetcher(
+        client=ExecutorAsyncStreamingAPIClient(FakeStreamingAPIClient()),
+        graph_building_mode=GraphBuildingModeEnum.ARTIST,
+        crawl_budget=budget,
+        crawl_round_size=1,
+    )
+    assert _content(await fetcher.fetch_graph("user")) == _content(sync_graph)
+
+    fetcher.crawl_budget = CrawlBudget(max_depth=10, max_nodes=100)
+    fetcher.crawl_round_size = 8
+    graph = await fetcher.fetch_graph("user")
+    assert set(graph.raw_node) == {f"artist_{i}" for i in range(50)}
+
+
+def test_refresh_prunes_the_nodes_crawled_from_removed_seeds():
+    client = FakeStreamingAPIClient()
+    budget = CrawlBudget(max_nodes=10)
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.ARTIST, crawl_budget=budget)
+    graph = fetcher.fetch_graph("user")
+    assert len(graph.raw_node) == len(ARTIST_IDS) + 10
+
+    user_info = client.get_user_info("user")
+    user_info.artist_ids = ["artist_20"]
+    fetcher.refresh_graph(graph, user_info)
+    # The crawled artists are only connected to the removed seeds
+    assert list(graph.raw_node) == ["artist_20"]
+    assert sorted(graph.graph.nodes) == [f"artist_{i}" for i in (20, 21, 23, 27)]
+
+
+@pytest.mark.parametrize("source", ["spotify", "tidal"])
+def test_refresh_playlists_of_a_replayed_source(source):
+    payloads = synthetic_payloads(source, n_artists=6)
+    client = ReplayStreamingAPIClient(payloads, source)
+    fetcher = GeneralFetcher(client, GraphBuildingModeEnum.PLAYLIST)
+    playlist_ids = [f"playlist{i}" for i in range(5)]
+    user_info = UserInfo("user", "user", "", "", playlist_ids, [], [], [], [])
+    graph = fetcher.fetch_positive_graph(user_info)
+    assert sorted(graph.raw_node) == playlist_ids
+
+    if source == "spotify":
+        payloads["playlists/playlist2"]["snapshot_id"] = "playlist2v2"
+        payloads["playlists/playlist2"]["tracks"]["items"].pop()
+    user_info.playlist_ids = playlist_ids[1:] + ["playlist5"]
+    fetched = []
+    get_playlist = client.get_playlist
+    client.get_playlist = lambda _id: fetched.append(_id) or get_playlist(_id)
+    refreshed = fetcher.refresh_graph(graph, user_info)
+    # The tidal playlists have no snapshot id, they are all fetched again
+    changed = ["playlist2"] if source == "spotify" else playlist_ids[1:]
+    assert sorted(fetched) == changed + ["playlist5"]
+
+    expected = fetcher.fetch_positive_graph(user_info)
+    assert set(refreshed.raw_node) == set(expected.raw_node)
+    assert refreshed.seed_versions == expected.seed_versions
+    for playlist_id, node in expected.raw_node.items():
+        assert refreshed.raw_node[playlist_id].object == node.object
+
+
+def test_the_journal_of_another_user_is_not_resumed(tmp_path):
+    budget = CrawlBudget(max_nodes=20)
+    path = str(tmp_path / "graph.csr")
+    with pytest.raises(ConnectionError):
+        GeneralFetcher(
+            OverlappingUsersClient(fail_after=25),
+            GraphBuildingModeEnum.ARTIST,
+            crawl_budget=budget,
+        ).fetch_graph_and_write("user_0", path)
+
+    GeneralFetcher(
+        OverlappingUsersClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph_and_write("user_10", path)
+    expected = GeneralFetcher(
+        OverlappingUsersClient(), GraphBuildingModeEnum.ARTIST, crawl_budget=budget
+    ).fetch_graph("user_10")
+    assert _content(MusicGraph.read(path)) == _content(expected)
+
+
+def test_process_crawl_matches_in_process_crawl(tmp_path):
+    payloads = synthetic_payloads("spotify", n_artists=30, tracks_per_artist=1)
+    user_info = UserInfo("user", "user", "", "", [], ["artist0"], [], [], [])
+    budget = CrawlBudget(max_depth=30, max_nodes=100)
+    queue_path = str(tmp_path / "queue.sqlite")
+    graphs = []
+    # The second process crawl reuses the queue file of the first one
+    for use_processes in (False, True, True):
+        client = ReplayStreamingAPIClient(payloads)
+        fetcher = GeneralFetcher(client, GraphBuildingModeEnum.ARTIST)
+        graph = fetcher.fetch_positive_graph(user_info)
+        if use_processes:
+            factory = partial(ReplayStreamingAPIClient, payloads)
+            graph = fetcher.enhance_with_processes(
+                graph, factory, 2, budget, queue_path=queue_path
+            )
+        else:
+            graph = fetcher.enhance_recursive_graph(graph, budget)
+        graphs.append(graph)
+    assert len(graphs[0].raw_node) == 30
+    for graph in graphs[1:]:
+        assert set(graph.raw_node) == set(graphs[0].raw_node)
+        assert set(map(frozenset, graph.graph.edges)) == set(
+            map(frozenset, graphs[0].graph.edges)
+        )
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from music_graph.utils.http_session import (
+    PooledHTTPAdapter,
+    connection_stats,
+    pooled_session,
+)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        # Long enough for the requests of every thread to overlap
+        time.sleep(0.02)
+        body: bytes = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def _get_concurrently(session: requests.Session, url: str, threads: int) -> None:
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for response in executor.map(lambda _: session.get(url), range(threads * 10)):
+            assert response.ok
+
+
+def test_pooled_session_reuses_a_connection_per_thread(server_url):
+    session = pooled_session(16)
+    _get_concurrently(session, server_url, threads=16)
+    stats = connection_stats(session)
+    assert stats.requests == 160
+    assert stats.connections <= 16
+    assert stats.reuse_rate >= 0.9
+
+
+def test_pooled_session_keeps_the_retries_of_the_session():
+    session = requests.Session()
+    retry = Retry(total=3, status_forcelist=(429, 500))
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    pooled_session(32, session)
+    adapter = session.get_adapter("https://api.spotify.com")
+    assert isinstance(adapter, PooledHTTPAdapter)
+    assert adapter.max_retries is retry
+    assert connection_stats(requests.Session()).reuse_rate == 0.0
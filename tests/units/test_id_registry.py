@@ -0,0 +1,36 @@
+from music_graph.data.general_fetcher import GraphBuildingModeEnum
+from music_graph.datamodel.graph.graph import MusicGraph
+from music_graph.datamodel.graph.id_registry import IdRegistry
+
+ARTIST_IDS = [f"artist{i}" for i in range(0, 10, 2)]
+
+
+def test_graph_nodes_have_dense_indices_and_sources(replay_graph):
+    graph = replay_graph(GraphBuildingModeEnum.ARTIST, ARTIST_IDS)
+    ids: IdRegistry = graph.ids
+
+    assert sorted(ids.index.values()) == list(range(len(ids)))
+    assert set(ids.ids) == set(graph.graph.nodes)
+    for node_id in graph.graph.nodes:
+        assert ids.id_of(ids.lookup(node_id)) == node_id
+    # The neighbors not fetched have no known source yet
+    for node_id in graph.graph.nodes:
+        expected = ("spotify", "artist") if node_id in graph.raw_node else ("", "")
+        assert ids.source_of(ids.lookup(node_id)) == expected
+
+    sources, targets = graph.edge_indices()
+    assert sources.itemsize == 4 and len(sources) == graph.graph.number_of_edges()
+    assert {
+        frozenset((ids.id_of(s), ids.id_of(t))) for s, t in zip(sources, targets)
+    } == {frozenset(edge) for edge in graph.graph.edges}
+
+
+def test_indices_are_kept_by_write_and_read(replay_graph, tmp_path):
+    graph = replay_graph(GraphBuildingModeEnum.ARTIST, ARTIST_IDS)
+    graph.write(str(tmp_path / "graph.gz"))
+    read = MusicGraph.read(str(tmp_path / "graph.gz"))
+
+    assert read.ids == graph.ids
+    assert read.edge_indices() == graph.edge_indices()
+    # New entities are appended after the written ones
+    assert read.ids.register("new") == len(graph.ids)
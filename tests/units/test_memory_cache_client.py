@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from music_graph.abstract.client import AbstractStreamingAPIClient
+from music_graph.datamodel.artist import ArtistData
+from music_graph.utils.memory_cache_client import InMemoryCachingStreamingAPIClient
+
+
+class SlowClient(AbstractStreamingAPIClient):
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.lock = threading.Lock()
+
+    def get_artist_neighbors(self, artist_id: str) -> List[str]:
+        with self.lock:
+            self.calls.append(artist_id)
+        time.sleep(0.05)
+        if artist_id == "broken":
+            raise ValueError(artist_id)
+        return [f"{artist_id}_neighbor"]
+
+
+def test_concurrent_calls_for_one_id_share_one_upstream_call():
+    inner = SlowClient()
+    client = InMemoryCachingStreamingAPIClient(inner)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(client.get_artist_neighbors, ["a"] * 8))
+    assert results == [["a_neighbor"]] * 8
+    assert inner.calls == ["a"]
+    assert client.stats.upstream_calls == 1
+    assert client.stats.saved_calls == 7
+
+
+def test_errors_are_propagated_and_not_cached():
+    inner = SlowClient()
+    client = InMemoryCachingStreamingAPIClient(inner)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            client.get_artist_neighbors("broken")
+    assert inner.calls == ["broken", "broken"]
+
+
+def test_least_recently_used_entries_are_evicted():
+    inner = SlowClient()
+    client = InMemoryCachingStreamingAPIClient(inner, max_entries=2)
+    for artist_id in ["a", "b", "a", "c", "a", "b"]:
+        client.get_artist_neighbors(artist_id)
+    assert inner.calls == ["a", "b", "c", "b"]
+    assert client.stats.evictions == 2
+
+
+class SlowBatchClient(SlowClient):
+    def get_artists(self, artist_ids: List[str]) -> List[ArtistData]:
+        with self.lock:
+            self.calls.extend(artist_ids)
+        time.sleep(0.05)
+        return [
+            ArtistData(_id, [], 0, "", [], "", _id, 0.0, "")
+            for _id in artist_ids
+            if _id != "unknown"
+        ]
+
+
+def test_overlapping_batches_fetch_each_id_once():
+    inner = SlowBatchClient()
+    client = InMemoryCachingStreamingAPIClient(inner)
+    batches = [["a", "b", "unknown"], ["b", "c"], ["a", "c", "d"]]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(client.get_artists, batches))
+    assert [[artist.id for artist in result] for result in results] == [
+        ["a", "b"],
+        ["b", "c"],
+        ["a", "c", "d"],
+    ]
+    assert sorted(inner.calls) == ["a", "b", "c", "d", "unknown"]
+    assert client.stats.misses == 5
+    upstream_calls, hits = client.stats.upstream_calls, client.stats.hits
+    assert upstream_calls <= 3
+    client.get_artists(["a", "b", "c", "d"])
+    assert client.stats.upstream_calls == upstream_calls
+    assert client.stats.hits == hits + 4
+
+
+def test_a_batch_is_one_upstream_call():
+    client = InMemoryCachingStreamingAPIClient(SlowBatchClient())
+    client.get_artists([f"artist_{i}" for i in range(40)])
+    assert client.stats.misses == 40
+    assert client.stats.upstream_calls == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from music_graph.utils.rate_limiter import RateLimitScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class RateLimited(Exception):
+    http_status = 429
+
+    def __init__(self, retry_after=None) -> None:
+        super().__init__("Too many requests")
+        self.headers = {} if retry_after is None else {"Retry-After": retry_after}
+
+
+def _scheduler(clock: FakeClock, **kwargs) -> RateLimitScheduler:
+    return RateLimitScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_global_and_endpoint_budgets_are_enforced():
+    clock = FakeClock()
+    scheduler = _scheduler(
+        clock, rate=10.0, capacity=10.0, endpoint_budgets={"audio_analysis": (1, 1)}
+    )
+    for _ in range(3):
+        scheduler.call("audio_analysis", lambda: None)
+    assert clock.now == pytest.approx(2.0)
+    for _ in range(20):
+        scheduler.call("track", lambda: None)
+    assert clock.now == pytest.approx(3.0, abs=0.2)
+    assert scheduler.stats().queue_depth == 0
+    assert scheduler.throughput == pytest.approx(23 / 60)
+
+
+def test_retry_after_pauses_calls_and_lowers_the_rate():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, rate=10.0)
+    answers = [RateLimited(retry_after="7"), "ok"]
+
+    def call():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert scheduler.call("artist", call) == "ok"
+    assert clock.now == pytest.approx(7.0)
+    stats = scheduler.stats()
+    assert stats.rate_limited == 1
+    assert stats.rates["global"] == pytest.approx(5.1)
+
+
+def test_errors_are_raised_after_max_retries_or_when_not_rate_limited():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, max_retries=2, base_backoff=1.0)
+
+    def rate_limited():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        scheduler.call("artist", rate_limited)
+    assert scheduler.retried == 2
+    assert 0 <= clock.now <= 3.0
+
+    def broken():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        scheduler.call("artist", broken)
+    assert scheduler.retried == 2
+
+
+@pytest.mark.asyncio
+async def test_async_calls_share_the_budget():
+    scheduler = RateLimitScheduler(rate=1000.0, endpoint_budgets={"track": (50, 1)})
+
+    async def track(track_id):
+        return track_id
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await asyncio.gather(
+        *[scheduler.acall("track", track, i) for i in range(5)]
+    )
+    assert results == list(range(5))
+    assert loop.time() - start >= 0.07
@@ -0,0 +1,41 @@
+import pytest
+import spotipy
+
+from music_graph.data.general_fetcher import GraphBuildingModeEnum
+from music_graph.utils.rate_limiter import RateLimitScheduler
+from music_graph.utils.replay_client import ReplayStreamingAPIClient
+from music_graph.utils.synthetic_payloads import synthetic_payloads
+
+
+@pytest.mark.parametrize("source", ["spotify", "tidal"])
+def test_artist_graph_is_built_offline(source, replay_graph):
+    client = ReplayStreamingAPIClient(synthetic_payloads(source, n_artists=5), source)
+    artist_ids = [f"artist{i}" for i in range(5)]
+    graph = replay_graph(
+        GraphBuildingModeEnum.ARTIST, artist_ids, client=client, max_workers=4
+    )
+    assert sorted(graph.graph.nodes) == artist_ids
+    assert graph.graph.has_edge("artist0", "artist1")
+    assert client.stats.missing == 0
+
+
+def test_current_user_libraries_are_replayed_page_by_page():
+    client = ReplayStreamingAPIClient(synthetic_payloads("spotify", n_artists=30))
+    user_info = client.get_user_info("user", is_current_user=True)
+    assert len(user_info.saved_track_ids) == 150
+    assert len(user_info.artist_ids) == 30
+
+
+def test_injected_errors_are_real_http_errors():
+    payloads = synthetic_payloads("spotify", n_artists=2)
+    client = ReplayStreamingAPIClient(payloads, error_rates={500: 1.0})
+    with pytest.raises(spotipy.SpotifyException) as error:
+        client.get_artist_neighbors("artist0")
+    assert error.value.http_status == 500
+
+    scheduler = RateLimitScheduler(rate=1000.0, max_retries=100, sleep=lambda _: None)
+    client = ReplayStreamingAPIClient(
+        payloads, error_rates={429: 0.5}, seed=0, scheduler=scheduler
+    )
+    assert client.get_artist_neighbors("artist0") == ["artist1"]
+    assert client.stats.injected_errors == scheduler.retried
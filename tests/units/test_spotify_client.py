@@ -0,0 +1,130 @@
+import copy
+import pickle
+from typing import Dict, List, Optional
+
+from music_graph.utils.spotify_client import SpotifyStreamingAPIClient
+
+
+def _artist(artist_id: str) -> Dict:
+    return {
+        "id": artist_id,
+        "popularity": 50,
+        "uri": f"spotify:artist:{artist_id}",
+        "name": artist_id,
+        "href": "",
+        "followers": {"href": None, "total": 10},
+        "genres": ["rock"],
+    }
+
+
+class FakeSpotify:
+    def __init__(self) -> None:
+        self.calls: List[List[str]] = []
+        self.sub_resource_calls: List[str] = []
+
+    def artist(self, artist_id: str) -> Dict:
+        return _artist(artist_id)
+
+    def artists(self, artists: List[str]) -> Dict:
+        self.calls.append(artists)
+        return {"artists": [None if a == "unknown" else _artist(a) for a in artists]}
+
+    def artist_albums(self, artist_id: str) -> Dict:
+        self.sub_resource_calls.append("albums")
+        return {"items": [{"id": f"{artist_id}_album"}]}
+
+    def artist_top_tracks(self, artist_id: str) -> Dict:
+        self.sub_resource_calls.append("top_tracks")
+        return {"tracks": [{"id": f"{artist_id}_track"}]}
+
+    def artist_related_artists(self, artist_id: str) -> Dict:
+        self.sub_resource_calls.append("similar_artists")
+        return {"artists": [{"id": f"{artist_id}_similar"}]}
+
+    def user(self, user: str) -> Dict:
+        return {"id": user, "display_name": user, "href": "", "uri": ""}
+
+    def _page(self, offset: int, limit: int, total: int) -> Dict:
+        items = [
+            {"track": {"id": f"t{i}"}}
+            for i in range(offset, min(total, offset + limit))
+        ]
+        has_next: bool = offset + limit < total
+        return {
+            "items": items,
+            "next": (offset + limit, limit, total) if has_next else None,
+        }
+
+    def current_user_saved_tracks(self, limit: int) -> Dict:
+        return self._page(0, limit, 120)
+
+    def current_user_followed_artists(self, limit: int) -> Dict:
+        return {"artists": {"items": [{"id": "a"}], "next": None}}
+
+    def current_user_playlists(self, limit: int) -> Dict:
+        return {"items": [], "next": None}
+
+    current_user_top_tracks = current_user_playlists
+    current_user_saved_albums = current_user_playlists
+
+    def next(self, result: Dict) -> Optional[Dict]:
+        if result["next"] is None:
+            return None
+        self.calls.append(["next"])
+        return self._page(*result["next"])
+
+
+def test_get_artists_chunks_ids_and_skips_unknown():
+    spotify = FakeSpotify()
+    client = SpotifyStreamingAPIClient(spotify)
+    ids = [f"artist_{i}" for i in range(120)] + ["unknown"]
+    artists = client.get_artists(ids)
+    assert [len(c) for c in spotify.calls] == [50, 50, 21]
+    assert [a.id for a in artists] == ids[:-1]
+    assert artists[0].genres == ["rock"]
+    assert spotify.sub_resource_calls == []
+
+
+def test_sub_resources_left_out_are_loaded_on_first_access():
+    spotify = FakeSpotify()
+    client = SpotifyStreamingAPIClient(spotify)
+    assert client.get_artist("a").top_track_ids == ["a_track"]
+    assert spotify.sub_resource_calls == ["albums", "top_tracks", "similar_artists"]
+
+    spotify.sub_resource_calls.clear()
+    artist = client.get_artist("a", include=("similar_artists",))
+    assert spotify.sub_resource_calls == ["similar_artists"]
+    assert artist.loaded_only().album_ids == []
+    assert artist.album_ids == ["a_album"]
+    assert artist.album_ids == ["a_album"]
+    assert spotify.sub_resource_calls == ["similar_artists", "albums"]
+    assert artist.to_dict()["top_track_ids"] == ["a_track"]
+
+
+def test_pending_sub_resources_are_not_loaded_by_repr_eq_and_copies():
+    spotify = FakeSpotify()
+    client = SpotifyStreamingAPIClient(spotify)
+    artist = client.get_artist("a", include=())
+    assert "album_ids" not in repr(artist)
+    # A pending field only equals the same pending field, never a loaded one
+    assert artist == client.get_artist("a", include=())
+    assert artist != client.get_artist("a")
+    for copied in (pickle.loads(pickle.dumps(artist)), copy.deepcopy(artist)):
+        assert copied.pending_fields() == []
+        assert copied.album_ids == []
+        assert copied == artist.loaded_only()
+    assert spotify.sub_resource_calls == ["albums", "top_tracks", "similar_artists"]
+    assert artist.album_ids == ["a_album"]
+
+
+def test_user_libraries_are_read_past_the_first_page():
+    spotify = FakeSpotify()
+    client = SpotifyStreamingAPIClient(spotify)
+    user_info = client.get_user_info("u", is_current_user=True)
+    assert user_info.saved_track_ids == [f"t{i}" for i in range(120)]
+    assert user_info.artist_ids == ["a"]
+    assert spotify.calls == [["next"], ["next"]]
+
+    track_ids = client.iter_library_ids("saved_track_ids")
+    assert next(track_ids) == "t0"
+    track_ids.close()
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from music_graph.utils.concurrency import gather
+from music_graph.utils.tidal_client import TidalStreamingAPIClient
+
+
+class FakeTidalSession:
+    def __init__(self, parties: int) -> None:
+        # Every call waits for the others, so the calls must run concurrently
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def _item(self, item_id: str) -> SimpleNamespace:
+        self.barrier.wait()
+        return SimpleNamespace(id=item_id, name=item_id)
+
+    def get_artist(self, artist_id: str) -> SimpleNamespace:
+        return self._item(artist_id)
+
+    def get_artist_albums(self, artist_id: str):
+        return [self._item("album")]
+
+    def get_artist_albums_ep_singles(self, artist_id: str):
+        return [self._item("single")]
+
+    def get_artist_albums_other(self, artist_id: str):
+        return [self._item("other")]
+
+    def get_artist_similar(self, artist_id: str):
+        return [self._item("similar")]
+
+    def get_artist_top_tracks(self, artist_id: str):
+        return [self._item("top")]
+
+
+def test_get_artist_issues_its_six_calls_concurrently():
+    with TidalStreamingAPIClient(FakeTidalSession(parties=6), max_workers=6) as client:
+        artist = client.get_artist("a")
+    assert client.executor._shutdown
+    assert artist.album_ids == ["album", "single", "other"]
+    assert artist.similar_artist_ids == ["similar"]
+    assert artist.top_track_ids == ["top"]
+
+
+def test_nested_gather_on_a_busy_executor_does_not_deadlock():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        inner = [lambda: 1, lambda: 2]
+        results = gather([lambda: gather(inner, executor)] * 3, executor)
+    assert results == [[1, 2]] * 3
@@ -0,0 +1,20 @@
+import time
+
+from music_graph.data.work_queue import SQLiteWorkQueue
+
+
+def test_late_results_of_an_expired_claim_are_ignored(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"), lease=0.01)
+    queue.put([("a", 1.0)])
+    assert queue.claim("w1", 1) == ["a"]
+    time.sleep(0.02)
+    assert queue.claim("w2", 1) == ["a"]
+
+    queue.complete("w1", {"a": b"late"})
+    queue.fail("w1", ["a"], "late")
+    assert queue.collect() == []
+    queue.complete("w2", {"a": b"x"})
+    assert queue.collect() == [("a", b"x", None)]
+    queue.complete("w1", {"a": b"late"})
+    assert queue.collect() == []
+    assert queue.counts()["collected"] == 1